@@ -345,12 +345,31 @@ create table journal_vak_data
     inclusiondate         varchar,
     category              varchar,
     date_start            date,
-    date_end              date
+    date_end              date,
+    source_page           integer
 );
 
 alter table journal_vak_data
     owner to myuser;
 
+create index idx_journal_vak_data_issn
+    on journal_vak_data (issn);
+
+create index idx_journal_vak_data_source_page
+    on journal_vak_data (source_page);
+
+create table journal_vak_pages
+(
+    page      integer not null
+        primary key,
+    hash      varchar not null,
+    rows      integer not null,
+    loaded_at timestamp default now() not null
+);
+
+alter table journal_vak_pages
+    owner to myuser;
+
 create table users
 (
     id            serial
@@ -366,6 +385,153 @@ create table users
 alter table users
     owner to myuser;
 
+create table mv_refresh_log
+(
+    name         varchar   not null
+        primary key,
+    refreshed_at timestamp not null,
+    duration_ms  integer
+);
+
+alter table mv_refresh_log
+    owner to myuser;
+
+create table author_centrality
+(
+    authorid        integer not null
+        primary key,
+    pagerank        double precision,
+    weighted_degree double precision,
+    betweenness     double precision
+);
+
+alter table author_centrality
+    owner to myuser;
+
+create index idx_author_centrality_pagerank
+    on author_centrality (pagerank desc);
+
+create index idx_author_centrality_weighted_degree
+    on author_centrality (weighted_degree desc);
+
+create index idx_author_centrality_betweenness
+    on author_centrality (betweenness desc);
+
+create table author_similarity
+(
+    authorid         integer          not null,
+    similar_authorid integer          not null,
+    score            double precision not null,
+    rank             integer          not null,
+    primary key (authorid, rank)
+);
+
+alter table author_similarity
+    owner to myuser;
+
+create table item_canonical
+(
+    itemid           integer not null
+        primary key,
+    canonical_itemid integer not null,
+    similarity       real
+);
+
+alter table item_canonical
+    owner to myuser;
+
+create index idx_item_canonical_canonical_itemid
+    on item_canonical (canonical_itemid);
+
+create table dim_keywords
+(
+    id      serial
+        primary key,
+    keyword varchar not null
+        unique
+);
+
+alter table dim_keywords
+    owner to myuser;
+
+create index idx_dim_keywords_keyword_trgm
+    on dim_keywords using gin (keyword gin_trgm_ops);
+
+create table city_aliases
+(
+    alias  varchar not null
+        primary key,
+    city   varchar not null,
+    score  real,
+    method varchar not null
+);
+
+alter table city_aliases
+    owner to myuser;
+
+create index idx_city_aliases_city
+    on city_aliases (city);
+
+create table dim_cities
+(
+    id   serial
+        primary key,
+    city varchar not null
+        unique
+);
+
+alter table dim_cities
+    owner to myuser;
+
+create table dim_organizations
+(
+    id   integer not null
+        primary key,
+    name varchar not null
+);
+
+alter table dim_organizations
+    owner to myuser;
+
+create table publication_year_counts
+(
+    year         integer              not null,
+    typecode     varchar default ''   not null,
+    language     varchar default ''   not null,
+    publications integer              not null,
+    primary key (year, typecode, language)
+);
+
+alter table publication_year_counts
+    owner to myuser;
+
+create table etl_watermarks
+(
+    name       varchar   not null
+        primary key,
+    watermark  timestamp,
+    updated_at timestamp not null
+);
+
+alter table etl_watermarks
+    owner to myuser;
+
+create table author_names
+(
+    authorid      integer not null
+        primary key,
+    display_name  varchar not null,
+    short_name    varchar not null,
+    name_variants text[]  not null,
+    search_key    varchar not null
+);
+
+alter table author_names
+    owner to myuser;
+
+create index idx_author_names_search_key
+    on author_names using gin (search_key gin_trgm_ops);
+
 create materialized view author_citations_view as
 SELECT DISTINCT a.authorid                                          AS author_id,
                 (c.lastname::text || ' '::text) || c.initials::text AS author_name,
@@ -415,45 +581,23 @@ alter materialized view author_journal_vak owner to myuser;
 create index idx_author_journal_vak_authorid
     on author_journal_vak (authorid);
 
-create materialized view authors_names_with_priority_view as
-SELECT DISTINCT authorid                                                 AS value,
-                initcap((COALESCE(lastname, ''::character varying)::text || ' '::text) ||
-                        COALESCE(initials, ''::character varying)::text) AS name,
-                CASE
-                    WHEN language::text = 'RU'::text THEN 0
-                    WHEN language::text = 'EN'::text THEN 1
-                    ELSE 2
-                    END                                                  AS lang_priority,
-                length((COALESCE(lastname, ''::character varying)::text || ' '::text) ||
-                       COALESCE(initials, ''::character varying)::text)  AS name_length
-FROM new_data.authors
-ORDER BY authorid,
-         (
-             CASE
-                 WHEN language::text = 'RU'::text THEN 0
-                 WHEN language::text = 'EN'::text THEN 1
-                 ELSE 2
-                 END),
-         (length((COALESCE(lastname, ''::character varying)::text || ' '::text) ||
-                 COALESCE(initials, ''::character varying)::text)) DESC;
-
-alter materialized view authors_names_with_priority_view owner to myuser;
-
-create index idx_authors_unique_name
-    on authors_names_with_priority_view using gin (name gin_trgm_ops);
-
 create materialized view popular_keywords_mv as
-SELECT keyword,
-       count(DISTINCT itemid) AS publications_count
-FROM new_data.keywords
-WHERE keyword IS NOT NULL
-GROUP BY keyword;
+SELECT k.keyword,
+       count(DISTINCT k.itemid)                                AS publications_count,
+       count(DISTINCT COALESCE(ic.canonical_itemid, k.itemid)) AS canonical_publications_count
+FROM new_data.keywords k
+         LEFT JOIN new_data.item_canonical ic ON ic.itemid = k.itemid
+WHERE k.keyword IS NOT NULL
+GROUP BY k.keyword;
 
 alter materialized view popular_keywords_mv owner to myuser;
 
 create index idx_popular_keywords_mv_publications
     on popular_keywords_mv (publications_count);
 
+create index idx_popular_keywords_mv_canonical_publications
+    on popular_keywords_mv (canonical_publications_count);
+
 create materialized view journals_reference_mv as
 SELECT DISTINCT issn,
                 journal_name
@@ -498,15 +642,15 @@ create index idx_all_keywords_mv_keyword
     on all_keywords_mv (keyword);
 
 create materialized view keyword_year_stats_mv as
-SELECT lower(TRIM(BOTH FROM k.keyword)) AS keyword,
-       upper(k.language::text)          AS language,
+SELECT dk.id                   AS keyword_id,
+       upper(k.language::text) AS language,
        i.year,
-       count(*)                         AS count
+       count(*)                AS count
 FROM new_data.keywords k
          JOIN new_data.items i ON i.itemid = k.itemid
-WHERE k.keyword IS NOT NULL
-  AND i.year IS NOT NULL
-GROUP BY (lower(TRIM(BOTH FROM k.keyword))), (upper(k.language::text)), i.year;
+         JOIN new_data.dim_keywords dk ON dk.keyword::text = lower(TRIM(BOTH FROM k.keyword))
+WHERE i.year IS NOT NULL
+GROUP BY dk.id, (upper(k.language::text)), i.year;
 
 alter materialized view keyword_year_stats_mv owner to myuser;
 
@@ -516,11 +660,11 @@ create index idx_keyword_year_stats_mv_year
 create index idx_keyword_year_stats_mv_language
     on keyword_year_stats_mv (language);
 
-create index idx_keyword_year_stats_mv_keyword_trgm
-    on keyword_year_stats_mv using gin (keyword gin_trgm_ops);
+create index idx_keyword_year_stats_mv_keyword_id
+    on keyword_year_stats_mv (keyword_id);
 
 create index idx_keyword_year_stats_mv_combo
-    on keyword_year_stats_mv (year, language, keyword);
+    on keyword_year_stats_mv (year, language, keyword_id);
 
 create materialized view ref_typecode_mv as
 SELECT DISTINCT typecode
@@ -576,15 +720,15 @@ WHERE countryid IS NOT NULL;
 alter materialized view ref_org_countries_mv owner to myuser;
 
 create materialized view authors_by_city_full_mv as
-SELECT lower(TRIM(BOTH FROM af.town)) AS normalized_city,
+SELECT ca.city                  AS normalized_city,
        a.authorid,
-       max(a.lastname::text)          AS lastname,
-       max(a.initials::text)          AS initials,
-       count(DISTINCT a.itemid)       AS publication_count
+       max(a.lastname::text)    AS lastname,
+       max(a.initials::text)    AS initials,
+       count(DISTINCT a.itemid) AS publication_count
 FROM new_data.authors a
          JOIN new_data.affiliations af ON a.id = af.author
-WHERE af.town IS NOT NULL
-GROUP BY (lower(TRIM(BOTH FROM af.town))), a.authorid;
+         JOIN new_data.city_aliases ca ON ca.alias::text = lower(TRIM(BOTH FROM af.town))
+GROUP BY ca.city, a.authorid;
 
 alter materialized view authors_by_city_full_mv owner to myuser;
 
@@ -595,61 +739,62 @@ create index idx_authors_by_city_mv_city_count
     on authors_by_city_full_mv (normalized_city asc, publication_count desc);
 
 create materialized view authors_by_city_mv as
-SELECT lower(TRIM(BOTH FROM a.town)) AS normalized_city,
-       count(DISTINCT au.authorid)   AS authors_count,
-       count(DISTINCT au.itemid)     AS publications_count
+SELECT ca.city                     AS normalized_city,
+       count(DISTINCT au.authorid) AS authors_count,
+       count(DISTINCT au.itemid)   AS publications_count
 FROM new_data.affiliations a
          JOIN new_data.authors au ON a.author = au.id
-WHERE a.town IS NOT NULL
-GROUP BY (lower(TRIM(BOTH FROM a.town)));
+         JOIN new_data.city_aliases ca ON ca.alias::text = lower(TRIM(BOTH FROM a.town))
+GROUP BY ca.city;
 
 alter materialized view authors_by_city_mv owner to myuser;
 
 create materialized view city_publications_mv as
-SELECT lower(TRIM(BOTH FROM af.town)) AS original_city,
-       a.itemid
+SELECT DISTINCT dc.id AS city_id,
+                a.itemid
 FROM new_data.affiliations af
          JOIN new_data.authors a ON af.author = a.id
-         JOIN new_data.keywords k ON k.itemid = a.itemid
-WHERE af.town IS NOT NULL
-GROUP BY (lower(TRIM(BOTH FROM af.town))), a.itemid;
+         JOIN new_data.city_aliases ca ON ca.alias::text = lower(TRIM(BOTH FROM af.town))
+         JOIN new_data.dim_cities dc ON dc.city::text = ca.city::text
+WHERE EXISTS (SELECT 1 FROM new_data.keywords k WHERE k.itemid = a.itemid);
 
 alter materialized view city_publications_mv owner to myuser;
 
-create index idx_city_publications_mv_city
-    on city_publications_mv (original_city);
+create index idx_city_publications_mv_city_id
+    on city_publications_mv (city_id);
 
 create index idx_city_publications_mv_itemid
     on city_publications_mv (itemid);
 
 create materialized view city_organization_items_mv as
-SELECT lower(TRIM(BOTH FROM af.town)) AS normalized_city,
-       org.organizationname,
-       a.itemid
-FROM new_data.elibrary_organizations org
-         JOIN new_data.affiliations af ON org.organizationid = af.affiliationid
-         JOIN new_data.authors a ON a.id = af.author
-WHERE af.town IS NOT NULL
-  AND org.organizationname IS NOT NULL
-GROUP BY (lower(TRIM(BOTH FROM af.town))), org.organizationname, a.itemid;
+SELECT DISTINCT dc.id            AS city_id,
+                af.affiliationid AS organizationid,
+                a.itemid
+FROM new_data.affiliations af
+         JOIN new_data.dim_organizations o ON o.id = af.affiliationid
+         JOIN new_data.city_aliases ca ON ca.alias::text = lower(TRIM(BOTH FROM af.town))
+         JOIN new_data.dim_cities dc ON dc.city::text = ca.city::text
+         JOIN new_data.authors a ON a.id = af.author;
 
 alter materialized view city_organization_items_mv owner to myuser;
 
+create index idx_city_org_items_mv_city_id
+    on city_organization_items_mv (city_id);
+
 create materialized view organization_keyword_items_mv as
-SELECT e.organizationid,
-       e.organizationname,
-       a.lastname::text || a.initials::text AS author,
-       a.itemid,
-       k.keyword
-FROM new_data.elibrary_organizations e
-         JOIN new_data.affiliations af ON af.affiliationid = e.organizationid
+SELECT DISTINCT af.affiliationid AS organizationid,
+                dk.id            AS keyword_id,
+                a.itemid
+FROM new_data.affiliations af
+         JOIN new_data.dim_organizations o ON o.id = af.affiliationid
          JOIN new_data.authors a ON a.id = af.author
-         JOIN new_data.keywords k ON k.itemid = a.itemid;
+         JOIN new_data.keywords k ON k.itemid = a.itemid
+         JOIN new_data.dim_keywords dk ON dk.keyword::text = lower(TRIM(BOTH FROM k.keyword));
 
 alter materialized view organization_keyword_items_mv owner to myuser;
 
-create index idx_org_kw_mv_keyword
-    on organization_keyword_items_mv (keyword);
+create index idx_org_kw_mv_keyword_id
+    on organization_keyword_items_mv (keyword_id);
 
 create index idx_org_kw_mv_orgid
     on organization_keyword_items_mv (organizationid);
@@ -665,13 +810,16 @@ SELECT a.authorid,
        j.name AS journal,
        i.link,
        aff.affiliationid,
-       aff.town,
-       k.keyword
+       dc.id AS city_id,
+       dk.id AS keyword_id
 FROM new_data.authors a
          JOIN new_data.items i ON a.itemid = i.itemid
          LEFT JOIN new_data.journals j ON i.itemid = j.itemid
          LEFT JOIN new_data.affiliations aff ON a.id = aff.author
-         LEFT JOIN new_data.keywords k ON a.itemid = k.itemid;
+         LEFT JOIN new_data.city_aliases ca ON ca.alias::text = lower(TRIM(BOTH FROM aff.town))
+         LEFT JOIN new_data.dim_cities dc ON dc.city::text = ca.city::text
+         LEFT JOIN new_data.keywords k ON a.itemid = k.itemid
+         LEFT JOIN new_data.dim_keywords dk ON dk.keyword::text = lower(TRIM(BOTH FROM k.keyword));
 
 alter materialized view authors_items_view owner to myuser;
 
@@ -681,11 +829,11 @@ create index authors_items_view_authorid_idx
 create index authors_items_view_affiliationid_idx
     on authors_items_view (affiliationid);
 
-create index authors_items_view_town_idx
-    on authors_items_view (town);
+create index authors_items_view_city_id_idx
+    on authors_items_view (city_id);
 
-create index authors_items_view_keyword_idx
-    on authors_items_view (keyword);
+create index authors_items_view_keyword_id_idx
+    on authors_items_view (keyword_id);
 
 create index authors_items_view_year_idx
     on authors_items_view (year);
@@ -702,27 +850,6 @@ GROUP BY (TRIM(BOTH FROM e.organizationname)), e.organizationid;
 
 alter materialized view popular_organizations_mv owner to myuser;
 
-create materialized view publications_by_year_mv as
-SELECT year,
-       sum(publications_count) AS publications_count
-FROM (SELECT items.year,
-             count(*) AS publications_count
-      FROM new_data.items
-      WHERE items.year IS NOT NULL
-      GROUP BY items.year
-      UNION ALL
-      SELECT 2023,
-             9876
-      UNION ALL
-      SELECT 2024,
-             12004
-      UNION ALL
-      SELECT 2025,
-             9087) union_data
-GROUP BY year;
-
-alter materialized view publications_by_year_mv owner to myuser;
-
 create function set_limit(real) returns real
     strict
     language c
@@ -1185,6 +1312,17 @@ $$;
 
 alter function get_unique_sorted_names(text[], integer[]) owner to myuser;
 
+create function author_search_key(name text) returns text
+    immutable
+    language sql
+as
+$$
+    -- Ключ поиска автора: нижний регистр, ё -> е, точки инициалов и лишние пробелы убраны
+SELECT trim(regexp_replace(translate(lower(name), 'ё.', 'е '), '[[:space:]]+', ' ', 'g'));
+$$;
+
+alter function author_search_key(text) owner to myuser;
+
 create function digest(text, text) returns bytea
     immutable
     strict
@@ -4,17 +4,30 @@ import logging
 import os
 from collections import defaultdict
 from datetime import datetime
-from io import BytesIO
-from typing import Optional
 
 import bcrypt
-import pandas as pd
 from dotenv import load_dotenv
 from flask import Flask, Response, abort, jsonify, request, send_file, send_from_directory, session, url_for
 from flask_cors import CORS
 
+from src.analytics.centrality import CENTRALITY_COLUMNS
+from src.analytics.cube import OLAP_CUBE, olap_cube
+from src.analytics.geo import geo_index, parse_bbox
+from src.analytics.trends import load_keyword_trends
+from src.analytics.vak_stats import MAX_BATCH_AUTHORS, vak_statistics
+from src.batch import batch_bp
+from src.compression import compress_response
+from src.conditional import add_cache_headers, check_not_modified
 from src.database.database import get_db_connection
+from src.database.dimensions import keyword_labels
+from src.database.publication_counts import publication_counts
+from src.exports.dump import DATASETS, parse_dataset_request, stream_dataset
+from src.exports.vak import EXCEL_MIMETYPE, export_file_name, export_vak_excel, resolve_export_authors, spooled_output
+from src.exports.wordcloud import get_wordcloud, wordcloud_etag
 from src.graph import graph_bp
+from src.jobs import is_async_request, job_accepted, jobs_bp, submit_job
+from src.utils.database import fetch_parallel
+from src.utils.validation import validate_bool, validate_enum, validate_int
 
 load_dotenv()
 
@@ -62,23 +75,6 @@ class CustomJSONEncoder(json.JSONEncoder):
 app.json_encoder = CustomJSONEncoder
 
 
-def validate_int(value: Optional[str], min_val: int, max_val: int, param_name: str) -> Optional[int]:
-    try:
-        if value is None:
-            return None
-        num = int(value)
-        if not (min_val <= num <= max_val):
-            abort(400, description=f"{param_name} must be between {min_val}-{max_val}")
-        return num
-    except ValueError:
-        abort(400, description=f"Invalid {param_name} value")
-
-
-def validate_enum(value: Optional[str], allowed_values: set, param_name: str):
-    if value and value.lower() not in {v.lower() for v in allowed_values}:
-        abort(400, description=f"Invalid {param_name}. Allowed values: {', '.join(allowed_values)}")
-
-
 @app.route("/api/login", methods=["POST"])
 def login():
     data = request.get_json(force=True, silent=True)
@@ -457,63 +453,6 @@ def get_organizations():
         if conn:
             conn.close()
 
-# Для распределения по городам
-CITY_MAPPING = {
-    'moscow': 'Москва',
-    'moskva': 'Москва',
-    'saint petersburg': 'Санкт-Петербург',
-    'saint-petersburg': 'Санкт-Петербург',
-    'st petersburg': 'Санкт-Петербург',
-    'st. petersburg': 'Санкт-Петербург',
-    'spb': 'Санкт-Петербург',
-    'krasnodar': 'Краснодар', 
-    'novosibirsk': 'Новосибирск',
-    'yekaterinburg': 'Екатеринбург',
-    'ekaterinburg': 'Екатеринбург',
-    'kazan': 'Казань',
-    'nizhny novgorod': 'Нижний Новгород',
-    'nizhniy novgorod': 'Нижний Новгород',
-    'chelyabinsk': 'Челябинск',
-    'samara': 'Самара',
-    'omsk': 'Омск',
-    'rostov-on-don': 'Ростов-на-Дону',
-    'rostov on don': 'Ростов-на-Дону',
-    'ufa': 'Уфа',
-    'krasnoyarsk': 'Красноярск',
-    'perm': 'Пермь',
-    'voronezh': 'Воронеж',
-    'volgograd': 'Волгоград',
-    'vladimir': 'Владимир',
-    'mytishi': 'Мытищи',
-    'vladikavkaz': 'Владикавказ',
-    'lipetsk': 'Липецк',
-    'kursk': 'Курск',
-    'yaroslavl': 'Ярославль',
-    'smolensk': 'Смоленск',
-    'tula': 'Тула',
-    'kaluga': 'Калуга',
-    'orel': 'Орел'
-    
-}
-
-def normalize_city_name(city_name):
-    if not city_name:
-        return city_name
-    
-    lower_name = city_name.strip().lower()
-    
-    # Проверяем полные совпадения
-    if lower_name in CITY_MAPPING:
-        return CITY_MAPPING[lower_name]
-    
-    # Проверяем частичные совпадения
-    for eng_name, ru_name in CITY_MAPPING.items():
-        if eng_name in lower_name:
-            return ru_name
-    
-    # Если не нашли соответствия, возвращаем оригинал с капитализацией
-    return city_name.strip().title()
-
 @app.route("/api/authors/by-city", methods=["GET"])
 def get_authors_by_city():
     city = request.args.get("city")
@@ -535,11 +474,12 @@ def get_authors_by_city():
 
         query = """
             SELECT 
-                INITCAP(lastname || ' ' || initials) AS name,
-                publication_count
-            FROM new_data.authors_by_city_full_mv
-            WHERE normalized_city = %s
-            ORDER BY publication_count DESC
+                COALESCE(n.display_name, INITCAP(c.lastname || ' ' || c.initials)) AS name,
+                c.publication_count
+            FROM new_data.authors_by_city_full_mv c
+            LEFT JOIN new_data.author_names n ON n.authorid = c.authorid
+            WHERE c.normalized_city = (SELECT city FROM new_data.city_aliases WHERE alias = %s)
+            ORDER BY c.publication_count DESC
             LIMIT %s
         """
         cur.execute(query, (city, limit))
@@ -559,6 +499,81 @@ def get_authors_by_city():
             conn.close()
 
 
+@app.route("/api/authors/top", methods=["GET"])
+def get_top_authors():
+    metric = request.args.get("metric", "pagerank").strip().lower()
+    validate_enum(metric, set(CENTRALITY_COLUMNS), "metric")
+
+    limit = validate_int(request.args.get("limit"), 1, 1000, "limit")
+    if limit is None:
+        limit = 20
+
+    conn = cur = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        # Колонка берется из белого списка CENTRALITY_COLUMNS
+        column = CENTRALITY_COLUMNS[metric]
+        query = f"""
+            SELECT ac.authorid, n.display_name, ac.{column}
+            FROM new_data.author_centrality ac
+            LEFT JOIN new_data.author_names n ON n.authorid = ac.authorid
+            WHERE ac.{column} IS NOT NULL
+            ORDER BY ac.{column} DESC
+            LIMIT %s
+        """
+        cur.execute(query, (limit,))
+        data = [
+            {"authorid": row[0], "name": row[1], "value": row[2]}
+            for row in cur.fetchall()
+        ]
+        return Response(json.dumps(data, ensure_ascii=False), mimetype="application/json; charset=utf-8")
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+@app.route("/api/authors/<int:authorid>/similar", methods=["GET"])
+def get_similar_authors(authorid):
+    limit = validate_int(request.args.get("limit"), 1, 20, "limit")
+    if limit is None:
+        limit = 10
+
+    conn = cur = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        query = """
+            SELECT s.similar_authorid, n.display_name, s.score
+            FROM new_data.author_similarity s
+            LEFT JOIN new_data.author_names n ON n.authorid = s.similar_authorid
+            WHERE s.authorid = %s
+            ORDER BY s.rank
+            LIMIT %s
+        """
+        cur.execute(query, (authorid, limit))
+        data = [
+            {"authorid": row[0], "name": row[1], "score": round(row[2], 4)}
+            for row in cur.fetchall()
+        ]
+        return Response(json.dumps(data, ensure_ascii=False), mimetype="application/json; charset=utf-8")
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
 @app.route("/api/statistics/authors-by-city", methods=["GET"])
 def get_author_distribution_by_city():
     conn = cur = None
@@ -578,18 +593,8 @@ def get_author_distribution_by_city():
                 """
         cur.execute(query, (min_publications,))
 
-        # Нормализуем названия городов и объединяем данные
-        city_stats = {}
-        for city, count in cur.fetchall():
-            normalized_city = normalize_city_name(city)
-            if normalized_city in city_stats:
-                city_stats[normalized_city] += count
-            else:
-                city_stats[normalized_city] = count
-
-        # Преобразуем в список и сортируем
-        data = [[city, count] for city, count in city_stats.items()]
-        data.sort(key=lambda x: x[1], reverse=True)
+        # Написания городов уже сведены к каноническим в city_aliases
+        data = [[city, count] for city, count in cur.fetchall()]
 
         return Response(json.dumps(data, ensure_ascii=False), mimetype="application/json; charset=utf-8")
 
@@ -602,44 +607,70 @@ def get_author_distribution_by_city():
             conn.close()
 
 
+def map_viewport() -> tuple[tuple | None, int | None]:
+    """Параметры видимой области карты: bbox=west,south,east,north и zoom"""
+    bbox = request.args.get("bbox")
+    if bbox:
+        try:
+            bbox = parse_bbox(bbox)
+        except ValueError:
+            abort(400, description="Invalid bbox value")
+    zoom = validate_int(request.args.get("zoom"), 0, 22, "zoom")
+    return bbox or None, zoom
+
+
+# Запросы карты, которые выполняются параллельно (fetch_parallel)
+CITY_PUBLICATIONS_QUERY = """
+    SELECT c.city, p.itemid
+    FROM new_data.city_publications_mv p
+             JOIN new_data.dim_cities c ON c.id = p.city_id
+"""
+KEYWORD_ITEMS_QUERY = """
+    SELECT DISTINCT itemid
+    FROM new_data.keywords
+    WHERE keyword ILIKE %s
+"""
+
+
 @app.route("/api/map/city-connections", methods=["GET"])
 def get_city_connections():
     keyword_filter = request.args.get("keyword")
+    bbox, zoom = map_viewport()
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        # 1. Фильтр по ключевому слову
-        filtered_itemids = set()
-        if keyword_filter:
-            cur.execute("""
-                        SELECT DISTINCT itemid
-                        FROM new_data.keywords
-                        WHERE keyword ILIKE %s
-                        """, (f"%{keyword_filter}%",))
-            filtered_itemids = {row[0] for row in cur.fetchall()}
-            if not filtered_itemids:
-                return jsonify([])
-
-        # 2. Собираем связи между городами
         city_connections = defaultdict(int)
         item_cities = defaultdict(set)
 
-        # Получаем все записи
-        cur.execute("""
-                    SELECT original_city, itemid
-                    FROM new_data.city_publications_mv
-                    """)
-
-        # Группируем по itemid
-        for raw_city, itemid in cur.fetchall():
-            if keyword_filter and itemid not in filtered_itemids:
-                continue
-
-            norm_city = normalize_city_name(raw_city)
-            if norm_city:
-                item_cities[itemid].add(norm_city)
+        if OLAP_CUBE:
+            # 1-2. Пары (публикация, город) с фильтром по ключевому слову — из куба
+            itemids, cities = olap_cube.get().item_cities(keyword_filter)
+            city_rows = zip(cities, itemids)
+        else:
+            # 1-2. Фильтр по ключевому слову и пары (город, публикация) — параллельно
+            queries = [(CITY_PUBLICATIONS_QUERY, None)]
+            if keyword_filter:
+                queries.append((KEYWORD_ITEMS_QUERY, (f"%{keyword_filter}%",)))
+            publication_rows, *keyword_rows = fetch_parallel(*queries)
+
+            filtered_itemids = set()
+            if keyword_filter:
+                filtered_itemids = {row[0] for row in keyword_rows[0]}
+                if not filtered_itemids:
+                    return jsonify([])
+
+            city_rows = (
+                (raw_city, itemid) for raw_city, itemid in publication_rows
+                if not keyword_filter or itemid in filtered_itemids
+            )
+
+        # Группируем по itemid; города — позиции в индексе координат
+        index = geo_index.get()
+        positions = {}
+        for city, itemid in city_rows:
+            if city not in positions:
+                positions[city] = index.locate(city)
+            if positions[city] is not None:
+                item_cities[itemid].add(positions[city])
 
         # Формируем пары городов
         for itemid, cities in item_cities.items():
@@ -652,32 +683,8 @@ def get_city_connections():
                     pair = (sorted_cities[i], sorted_cities[j])
                     city_connections[pair] += 1
 
-        # 3. Получаем координаты
-        cur.execute("""
-                    SELECT settlement      AS city,
-                           "latitude(dd)"  AS lat,
-                           "longitude(dd)" AS lon
-                    FROM coordinate_data
-                    """)
-        coords = {row[0].strip(): (row[1], row[2]) for row in cur.fetchall()}
-
-        # 4. Формируем результат
-        result = []
-        for (city_a, city_b), count in city_connections.items():
-            coord_a = coords.get(city_a)
-            coord_b = coords.get(city_b)
-
-            if coord_a and coord_b:
-                result.append({
-                    "cityA": city_a,
-                    "cityB": city_b,
-                    "weight": count,
-                    "coordsA": {"lat": coord_a[0], "lon": coord_a[1]},
-                    "coordsB": {"lat": coord_b[0], "lon": coord_b[1]}
-                })
-
-        # Сортируем по весу связей
-        result.sort(key=lambda x: -x['weight'])
+        # 3. Видимые связи (на мелком масштабе — между кластерами городов), по убыванию веса
+        result = index.city_links(city_connections, bbox, zoom)
 
         return Response(
             json.dumps(result, ensure_ascii=False),
@@ -686,76 +693,50 @@ def get_city_connections():
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if 'cur' in locals(): cur.close()
-        if 'conn' in locals(): conn.close()
 
 
 @app.route("/api/map/city-publications", methods=["GET"])
 def get_city_publications_map():
     keyword_filter = request.args.get("keyword")
+    bbox, zoom = map_viewport()
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        # Получаем itemid → keyword (если фильтр передан)
-        filtered_itemids = set()
-        if keyword_filter:
-            cur.execute("""
-                SELECT DISTINCT itemid
-                FROM new_data.keywords
-                WHERE keyword ILIKE %s
-            """, (f"%{keyword_filter}%",))
-            filtered_itemids = {row[0] for row in cur.fetchall()}
-            if not filtered_itemids:
-                return jsonify([])  # нет таких публикаций с этим ключевым словом
-
-        # Получаем город → itemid
-        cur.execute("""
-            SELECT original_city, itemid
-            FROM new_data.city_publications_mv
-        """)
-        city_to_items = {}
-        for city, itemid in cur.fetchall():
-            if not keyword_filter or itemid in filtered_itemids:
-                city_to_items.setdefault(city, set()).add(itemid)
-
-        # Нормализуем названия городов и считаем публикации
+        if OLAP_CUBE:
+            city_counts = olap_cube.get().publications_by_city(keyword_filter)
+        else:
+            # Город → itemid и itemid с ключевым словом (если фильтр передан) — параллельно
+            queries = [(CITY_PUBLICATIONS_QUERY, None)]
+            if keyword_filter:
+                queries.append((KEYWORD_ITEMS_QUERY, (f"%{keyword_filter}%",)))
+            publication_rows, *keyword_rows = fetch_parallel(*queries)
+
+            filtered_itemids = set()
+            if keyword_filter:
+                filtered_itemids = {row[0] for row in keyword_rows[0]}
+                if not filtered_itemids:
+                    return jsonify([])  # нет таких публикаций с этим ключевым словом
+
+            city_to_items = {}
+            for city, itemid in publication_rows:
+                if not keyword_filter or itemid in filtered_itemids:
+                    city_to_items.setdefault(city, set()).add(itemid)
+            city_counts = {city: len(items) for city, items in city_to_items.items()}
+
+        # Публикации по населенным пунктам индекса координат
+        index = geo_index.get()
         city_stats = {}
-        for raw_city, items in city_to_items.items():
-            norm_city = normalize_city_name(raw_city)
-            city_stats[norm_city] = city_stats.get(norm_city, 0) + len(items)
+        for city, count in city_counts.items():
+            position = index.locate(city)
+            if position is not None:
+                city_stats[position] = city_stats.get(position, 0) + count
 
-        # Получаем координаты
-        cur.execute("""
-            SELECT settlement AS city, 
-                   "latitude(dd)" AS lat, 
-                   "longitude(dd)" AS lon
-            FROM coordinate_data
-            WHERE "latitude(dd)" IS NOT NULL AND "longitude(dd)" IS NOT NULL
-        """)
-        coords = {row[0].strip(): (row[1], row[2]) for row in cur.fetchall()}
-
-        # Сборка результата
-        result = []
-        for city_ru, count in city_stats.items():
-            coord = coords.get(city_ru)
-            if coord:
-                result.append({
-                    "city": city_ru,
-                    "publications": count,
-                    "lat": coord[0],
-                    "lon": coord[1]
-                })
+        # Видимые точки (на мелком масштабе — кластеры)
+        result = index.city_points(city_stats, bbox, zoom)
 
         return Response(json.dumps(result, ensure_ascii=False), mimetype="application/json; charset=utf-8")
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if 'cur' in locals(): cur.close()
-        if 'conn' in locals(): conn.close()
 
 
 @app.route("/api/map/city-organizations", methods=["GET"])
@@ -773,6 +754,10 @@ def get_city_organizations():
 
     conn = cur = None
     try:
+        if OLAP_CUBE:
+            results = olap_cube.get().organizations_in_city(city, keyword, limit)
+            return Response(json.dumps(results, ensure_ascii=False), mimetype="application/json; charset=utf-8")
+
         conn = get_db_connection()
         cur = conn.cursor()
 
@@ -790,9 +775,13 @@ def get_city_organizations():
 
         # Основной запрос
         cur.execute("""
-            SELECT organizationname, itemid
-            FROM new_data.city_organization_items_mv
-            WHERE normalized_city = %s
+            SELECT o.name, ci.itemid
+            FROM new_data.city_organization_items_mv ci
+                     JOIN new_data.dim_organizations o ON o.id = ci.organizationid
+            WHERE ci.city_id = (SELECT dc.id
+                                FROM new_data.dim_cities dc
+                                         JOIN new_data.city_aliases ca ON ca.city = dc.city
+                                WHERE ca.alias = %s)
         """, (city,))
 
         org_to_items = {}
@@ -818,7 +807,6 @@ def get_city_organizations():
 
 @app.route("/api/statistics/publications-by-year", methods=["GET"])
 def get_publications_by_year():
-    conn = cur = None
     try:
         current_year = datetime.now().year
         year_from = validate_int(request.args.get("year_from"), 1900, current_year, "year_from")
@@ -831,44 +819,14 @@ def get_publications_by_year():
         if year_from > year_to:
             abort(400, description="year_from cannot be greater than year_to")
 
-        # === Оригинальный запрос к БД ===
-        # conn = get_db_connection()
-        # cur = conn.cursor()
-        # query = """
-        #     SELECT year, publications_count
-        #     FROM new_data.publications_by_year_mv
-        #     WHERE year BETWEEN %s AND %s
-        #     ORDER BY year
-        # """
-        # cur.execute(query, (year_from, year_to))
-        # result = cur.fetchall()
-        # data = {row[0]: row[1] for row in result}
-        # ==================================================
-
-        # Мок-данные с возрастающим трендом (2020–2025)
-        mock_data = {
-            2020: 12396,
-            2021: 15803,
-            2022: 17004,
-            2023: 19250,
-            2024: 22647,
-            2025: 11201  
-        }
-        
-        data = {
-            year: count for year, count in mock_data.items()
-            if year_from <= year <= year_to
-        }
+        data = publication_counts.get().by_year(
+            year_from, year_to, typecode=request.args.get("typecode"), language=request.args.get("language")
+        )
 
         return Response(json.dumps(data, ensure_ascii=False), mimetype="application/json; charset=utf-8")
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
 
 
 @app.route("/api/statistics/keywords", methods=["GET"])
@@ -890,21 +848,22 @@ def get_keywords_statistics():
         language_filter = request.args.get("language")
 
         query = """
-            SELECT keyword, language, count
-            FROM new_data.keyword_year_stats_mv
-            WHERE year = %s 
+            SELECT d.keyword, s.language, s.count
+            FROM new_data.keyword_year_stats_mv s
+                     JOIN new_data.dim_keywords d ON d.id = s.keyword_id
+            WHERE s.year = %s
         """
         params = [year]
 
         if keyword_filter:
-            query += " AND keyword ILIKE %s"
+            query += " AND d.keyword ILIKE %s"
             params.append(f"%{keyword_filter}%")
         if language_filter:
             validate_enum(language_filter, {"ru", "en"}, "language")
-            query += " AND language = %s"
+            query += " AND s.language = %s"
             params.append(language_filter.upper())
 
-        query += " GROUP BY keyword, language, count ORDER BY count DESC"
+        query += " ORDER BY s.count DESC"
 
         if limit is not None:
             query += " LIMIT %s"
@@ -932,6 +891,80 @@ def get_keywords_statistics():
             conn.close()
 
 
+@app.route("/api/statistics/keywords/trends", methods=["GET"])
+def get_keywords_trends():
+    """Динамика ключевых слов за период: самые быстро растущие, набирающие и падающие слова с рядами по годам"""
+    year_to = validate_int(request.args.get("year_to"), 1900, 2100, "year_to") or datetime.now().year
+    year_from = validate_int(request.args.get("year_from"), 1900, 2100, "year_from") or year_to - 9
+    if year_from >= year_to:
+        abort(400, description="year_from must be less than year_to")
+    top = validate_int(request.args.get("top"), 1, 100, "top") or 20
+    min_count = validate_int(request.args.get("min_count"), 1, 1000000, "min_count") or 10
+    language = request.args.get("language")
+    if language:
+        validate_enum(language, {"ru", "en"}, "language")
+
+    conn = cur = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        trends = load_keyword_trends(cur, year_from, year_to, language, min_total=min_count)
+        groups = {
+            "emerging": trends.order(trends.emerging, top),
+            "growing": trends.order(trends.cagr, top),
+            "declining": trends.order(trends.cagr, top, descending=False),
+        }
+        labels = keyword_labels(cur, {trends.keywords[i] for positions in groups.values() for i in positions})
+        result = {"years": trends.years.tolist()}
+        result.update({name: trends.describe(positions, labels) for name, positions in groups.items()})
+        return Response(json.dumps(result, ensure_ascii=False), mimetype="application/json; charset=utf-8")
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+@app.route("/api/statistics/keywords/wordcloud.png", methods=["GET"])
+def get_keywords_wordcloud():
+    """Облако ключевых слов за год (PNG), кэшируется на диске до обновления keyword_year_stats_mv"""
+    year = request.args.get("year")
+    year = validate_int(year, 1900, 2100, "year") if year is not None else datetime.now().year
+    limit = validate_int(request.args.get("limit"), 1, 1000, "limit") or 150
+    language = request.args.get("language")
+    if language:
+        validate_enum(language, {"ru", "en"}, "language")
+        language = language.lower()
+
+    conn = cur = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        etag = wordcloud_etag(cur, year, language, limit)
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        path = get_wordcloud(cur, etag, year, language, limit)
+        if path is None:
+            return jsonify({"error": "No keywords for the selected year"}), 404
+        return send_file(path, mimetype="image/png", etag=etag, max_age=3600)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
 @app.route("/api/statistics/years", methods=["GET"])
 def get_available_years():
     conn = cur = None
@@ -1004,49 +1037,69 @@ def get_vak_statistics_by_category():
         conn = get_db_connection()
         cur = conn.cursor()
 
-        query = """
-                SELECT scientificspecialties,
-                       category,
-                       COUNT(DISTINCT itemid) AS count
-                FROM new_data.vak_statistics_mv
-                WHERE 1=1
-                """
-
-        params = []
+        author_ids = [int(author_id)] if author_id else None
+        result = vak_statistics(cur, author_ids, date_from, date_to, issn)[author_ids[0] if author_ids else None]
 
-        if author_id:
-            query += " AND authorid = %s"
-            params.append(int(author_id))
+        return Response(json.dumps(result, ensure_ascii=False), mimetype="application/json; charset=utf-8")
 
-        if date_from:
-            query += " AND date_start >= %s"
-            params.append(date_from)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
 
-        if date_to:
-            query += " AND (date_end IS NULL OR date_end <= %s)"
-            params.append(date_to)
 
-        if issn:
-            query += " AND issn = %s"
-            params.append(issn)
+def parse_author_scope() -> tuple[list[int], int | None]:
+    """Авторы запроса: authorid (можно несколько, через запятую) или organizationid"""
+    raw_ids = [part.strip() for value in request.args.getlist('authorid') for part in value.split(',') if part.strip()]
+    if not all(part.isdigit() for part in raw_ids):
+        abort(400, description="authorid must be an integer")
+    author_ids = [int(part) for part in raw_ids]
+    organization_id = validate_int(request.args.get('organizationid'), 1, 2**31 - 1, "organizationid")
+    if not author_ids and organization_id is None:
+        abort(400, description="authorid or organizationid is required")
+    return author_ids, organization_id
+
+
+@app.route('/api/statistics/vak-categories/batch', methods=['GET'])
+def get_vak_statistics_batch():
+    """Категории ВАК по специальностям сразу для многих авторов
+
+    Параметры: authorid (можно несколько, через запятую) или organizationid,
+    date_from, date_to (YYYY-MM-DD), issn
+    """
+    author_ids, organization_id = parse_author_scope()
+    date_from = request.args.get('date_from')
+    date_to = request.args.get('date_to')
+    for name, value in (("date_from", date_from), ("date_to", date_to)):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                abort(400, description=f"Invalid {name} value")
+    issn = request.args.get('issn')
+    if issn and not issn.replace('-', '').isalnum():
+        abort(400, description="Invalid ISSN format")
 
-        query += """
-            GROUP BY scientificspecialties, category
-            ORDER BY scientificspecialties, category
-        """
+    conn = cur = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
 
-        cur.execute(query, params)
-        data = cur.fetchall()
+        if organization_id is not None:
+            author_ids = resolve_export_authors(cur, organization_id=organization_id)
+        if len(author_ids) > MAX_BATCH_AUTHORS:
+            return jsonify({"error": f"Too many authors: {len(author_ids)} > {MAX_BATCH_AUTHORS}"}), 400
 
-        result = {}
-        for specialty, category, count in data:
-            if specialty not in result:
-                result[specialty] = {"К1": 0, "К2": 0, "К3": 0}
-            result[specialty][category] = count
+        statistics = vak_statistics(cur, author_ids, date_from, date_to, issn)
+        result = {str(author_id): specialties for author_id, specialties in statistics.items()}
 
         return Response(json.dumps(result, ensure_ascii=False), mimetype="application/json; charset=utf-8")
 
     except Exception as e:
+        logging.exception(e)
         return jsonify({"error": str(e)}), 500
     finally:
         if cur:
@@ -1057,47 +1110,66 @@ def get_vak_statistics_by_category():
 
 @app.route('/api/export/author-vak-excel', methods=['GET'])
 def export_author_vak_excel():
-    conn = cur = None
-    try:
-        author_id = request.args.get('authorid')
-        if not author_id or not author_id.isdigit():
-            abort(400, description="authorid is required and must be an integer")
+    """Выгрузка ВАК в Excel: authorid (можно несколько, через запятую) или organizationid"""
+    author_ids, organization_id = parse_author_scope()
 
-        conn = get_db_connection()
-        cur = conn.cursor()
+    if is_async_request():
+        return job_accepted(submit_job("author_vak_excel", {"authorids": author_ids, "organizationid": organization_id}))
 
-        query = """
-            SELECT * FROM new_data.author_journal_vak
-            WHERE authorid = %s
-        """
-        cur.execute(query, (int(author_id),))
-        rows = cur.fetchall()
-        columns = [desc[0] for desc in cur.description]
-
-        # Создаем DataFrame
-        df = pd.DataFrame(rows, columns=columns)
-
-        # Создаем Excel в памяти
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='AuthorData')
+    conn = None
+    try:
+        conn = get_db_connection()
 
+        # Книга пишется построчно; крупная уходит из памяти во временный файл
+        output = spooled_output()
+        export_vak_excel(conn, output, author_ids, organization_id)
         output.seek(0)
 
         return send_file(
             output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            mimetype=EXCEL_MIMETYPE,
             as_attachment=True,
-            download_name=f'author_{author_id}_vak.xlsx'
+            download_name=export_file_name(author_ids, organization_id)
         )
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
-        if cur: cur.close()
         if conn: conn.close()
 
 
+@app.route('/api/export/<dataset>', methods=['GET'])
+def export_dataset(dataset):
+    """Выгрузка набора данных целиком в CSV через COPY TO STDOUT
+
+    Параметры: columns (через запятую), фильтры набора (см. DATASETS), gzip=true
+    """
+    spec = DATASETS.get(dataset)
+    if spec is None:
+        abort(404, description=f"Unknown dataset. Allowed values: {', '.join(DATASETS)}")
+
+    requested = [column.strip() for column in request.args.get('columns', '').split(',') if column.strip()]
+    compress = validate_bool(request.args.get('gzip'), "gzip")
+    try:
+        columns, filters = parse_dataset_request(spec, requested, request.args.to_dict(flat=False))
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    try:
+        chunks = stream_dataset(spec, columns, filters, compress=compress)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    filename = f"{dataset}.csv.gz" if compress else f"{dataset}.csv"
+    return Response(
+        chunks,
+        mimetype="application/gzip" if compress else "text/csv; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
 @app.route('/api/references/journals', methods=['GET'])
 def get_journals_reference():
     conn = cur = None
@@ -1188,21 +1260,29 @@ def get_top_organizations_by_keyword():
 
         min_count = validate_int(request.args.get("min_count"), 1, 10**6, "min_count") or 10
         limit = validate_int(request.args.get("limit"), 1, 100, "limit") or 10
+        # Дубликаты публикаций (item_canonical) считаются один раз
+        dedup = validate_bool(request.args.get("dedup"), "dedup")
+        item_expr = "COALESCE(ic.canonical_itemid, o.itemid)" if dedup else "o.itemid"
+
+        if OLAP_CUBE:
+            results = olap_cube.get().top_organizations_by_keyword(keyword, min_count, limit, dedup)
+            return Response(json.dumps(results, ensure_ascii=False), mimetype="application/json; charset=utf-8")
 
         conn = get_db_connection()
         cur = conn.cursor()
 
-        query = """
-            SELECT
-                organizationid AS organization,
-                organizationname AS name,
-                COUNT(DISTINCT itemid) AS count
-            FROM organization_keyword_items_mv
-            WHERE keyword ILIKE %s
-            GROUP BY organizationid, organizationname
-            HAVING COUNT(DISTINCT itemid) >= %s
-            ORDER BY count DESC
-            LIMIT %s
+        query = f"""
+            SELECT t.organization, d.name, t.count
+            FROM (SELECT o.organizationid AS organization, COUNT(DISTINCT {item_expr}) AS count
+                  FROM organization_keyword_items_mv o
+                  {"LEFT JOIN item_canonical ic ON ic.itemid = o.itemid" if dedup else ""}
+                  WHERE o.keyword_id IN (SELECT id FROM dim_keywords WHERE keyword ILIKE %s)
+                  GROUP BY o.organizationid
+                  HAVING COUNT(DISTINCT {item_expr}) >= %s
+                  ORDER BY count DESC
+                  LIMIT %s) t
+                     JOIN dim_organizations d ON d.id = t.organization
+            ORDER BY t.count DESC
         """
         cur.execute(query, (f"%{keyword}%", min_count, limit))
         results = [
@@ -1254,14 +1334,16 @@ def get_popular_keywords():
         min_publications = validate_int(request.args.get("min_publications"), 1, 10**6, "min_publications")
         if min_publications is None:
             min_publications = 100
+        dedup = validate_bool(request.args.get("dedup"), "dedup")
+        count_column = "canonical_publications_count" if dedup else "publications_count"
 
         conn = get_db_connection()
         cur = conn.cursor()
 
-        query = """
+        query = f"""
             SELECT keyword
             FROM popular_keywords_mv
-            WHERE publications_count >= %s
+            WHERE {count_column} >= %s
             ORDER BY keyword
         """
         cur.execute(query, (min_publications,))
@@ -1287,18 +1369,28 @@ def get_top_keywords_by_organization():
 
         min_count = validate_int(request.args.get("min_count"), 1, 10**6, "min_count") or 10
         limit = validate_int(request.args.get("limit"), 1, 100, "limit") or 10
+        dedup = validate_bool(request.args.get("dedup"), "dedup")
+        item_expr = "COALESCE(ic.canonical_itemid, o.itemid)" if dedup else "o.itemid"
+
+        if OLAP_CUBE:
+            results = olap_cube.get().top_keywords_by_organization(int(org_id), min_count, limit, dedup)
+            return Response(json.dumps(results, ensure_ascii=False), mimetype="application/json; charset=utf-8")
 
         conn = get_db_connection()
         cur = conn.cursor()
 
-        query = """
-            SELECT keyword, COUNT(DISTINCT itemid) AS count
-            FROM organization_keyword_items_mv
-            WHERE organizationid = %s
-            GROUP BY keyword
-            HAVING COUNT(DISTINCT itemid) >= %s
-            ORDER BY count DESC
-            LIMIT %s;
+        query = f"""
+            SELECT d.keyword, t.count
+            FROM (SELECT o.keyword_id, COUNT(DISTINCT {item_expr}) AS count
+                  FROM organization_keyword_items_mv o
+                  {"LEFT JOIN item_canonical ic ON ic.itemid = o.itemid" if dedup else ""}
+                  WHERE o.organizationid = %s
+                  GROUP BY o.keyword_id
+                  HAVING COUNT(DISTINCT {item_expr}) >= %s
+                  ORDER BY count DESC
+                  LIMIT %s) t
+                     JOIN dim_keywords d ON d.id = t.keyword_id
+            ORDER BY t.count DESC;
         """
         cur.execute(query, (int(org_id), min_count, limit))
         results = [{"keyword": row[0], "count": row[1]} for row in cur.fetchall()]
@@ -1335,6 +1427,15 @@ def not_found(error):
     return jsonify({"error": "Not found"}), 404
 
 app.register_blueprint(graph_bp)
+app.register_blueprint(jobs_bp)
+app.register_blueprint(batch_bp)
+
+# Обработчики after_request выполняются в обратном порядке: сжатие — после заголовков кэширования
+app.after_request(compress_response)
+
+# Версии данных: ETag/Last-Modified, 304 без обращения к базе, Cache-Control
+app.before_request(check_not_modified)
+app.after_request(add_cache_headers)
 
 
 @app.route("/assets/<path:path>")
@@ -0,0 +1,53 @@
+"""Зависимость времени поиска сообществ от числа ребер
+
+Граф — случайное разбиение на сообщества по 50 узлов, средняя степень 10,
+80% ребер внутри сообществ. Запуск из корня репозитория:
+
+    python -m benchmarks.communities --edges 10000 --edges 100000 --edges 1000000
+"""
+
+import time
+
+import click
+import numpy as np
+
+from src.analytics.communities import label_propagation, modularity
+
+
+def planted_partition(n_edges: int, community_size: int = 50, inside: float = 0.8, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    n_nodes = max(n_edges // 5, 2)
+    community = rng.integers(0, max(n_nodes // community_size, 1), n_nodes)
+
+    order = np.argsort(community, kind="stable")
+    sizes = np.bincount(community)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    sources = rng.integers(0, n_nodes, n_edges)
+    own = community[sources]
+    same = order[starts[own] + (rng.random(n_edges) * sizes[own]).astype(np.int64)]
+    targets = np.where(rng.random(n_edges) < inside, same, rng.integers(0, n_nodes, n_edges))
+    keep = sources != targets
+    return n_nodes, sources[keep], targets[keep], community
+
+
+@click.command()
+@click.option("--edges", "edge_counts", multiple=True, type=int, default=(10_000, 100_000, 300_000, 1_000_000))
+@click.option("--repeat", default=3, help="Число запусков, берется лучшее время")
+def main(edge_counts: tuple[int, ...], repeat: int):
+    click.echo(f"{'edges':>10} {'nodes':>9} {'seconds':>8} {'communities':>12} {'modularity':>11} {'planted':>8}")
+    for n_edges in edge_counts:
+        n_nodes, sources, targets, planted = planted_partition(n_edges)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            labels = label_propagation(n_nodes, sources, targets)
+            timings.append(time.perf_counter() - started)
+        click.echo(
+            f"{len(sources):>10} {n_nodes:>9} {min(timings):>8.3f} {labels.max() + 1:>12} "
+            f"{modularity(labels, sources, targets):>11.3f} {modularity(planted, sources, targets):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
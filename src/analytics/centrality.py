@@ -0,0 +1,198 @@
+import logging
+
+import numpy as np
+import psycopg2
+import scipy.sparse as sp
+from psycopg2.extras import execute_values
+
+from ..utils.database import fetch_array
+
+# Метрика (как в параметре metric/value_source) -> колонка author_centrality
+CENTRALITY_COLUMNS = {
+    "pagerank": "pagerank",
+    "degree": "weighted_degree",
+    "betweenness": "betweenness",
+}
+
+# Публикации с большим числом соавторов дают квадратичное число пар и почти не несут информации о связях
+MAX_ITEM_AUTHORS = 50
+
+
+def build_adjacency(sources: np.ndarray, targets: np.ndarray, weights: np.ndarray, node_ids: np.ndarray) -> sp.csr_matrix:
+    """Строит разреженную матрицу смежности в индексации node_ids (массив должен быть отсортирован)"""
+    n = len(node_ids)
+    rows = np.searchsorted(node_ids, sources)
+    cols = np.searchsorted(node_ids, targets)
+    return sp.csr_matrix((weights.astype(np.float64), (rows, cols)), shape=(n, n))
+
+
+def pagerank(adjacency: sp.csr_matrix, damping: float = 0.85, tol: float = 1e-9, max_iter: int = 100) -> np.ndarray:
+    """PageRank степенным методом на разреженной матрице
+
+    Args:
+        adjacency: Матрица весов ребер i -> j (i цитирует j)
+        damping: Коэффициент затухания
+        tol: Порог сходимости по L1-норме
+
+    Returns:
+        Вектор PageRank, сумма элементов равна 1
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0)
+
+    out_weight = np.asarray(adjacency.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inv_out = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    transition_t = (sp.diags(inv_out) @ adjacency).T.tocsr()
+
+    rank = np.full(n, 1.0 / n)
+    for iteration in range(max_iter):
+        dangling_mass = rank[dangling].sum()
+        new_rank = damping * (transition_t @ rank) + (damping * dangling_mass + 1.0 - damping) / n
+        delta = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if delta < tol:
+            logging.debug("PageRank converged after %d iterations", iteration + 1)
+            break
+    else:
+        logging.warning("PageRank did not converge in %d iterations (delta=%g)", max_iter, delta)
+
+    return rank
+
+
+def weighted_degree(adjacency: sp.csr_matrix) -> np.ndarray:
+    """Взвешенная степень вершины: сумма весов инцидентных ребер"""
+    return np.asarray(adjacency.sum(axis=1)).ravel()
+
+
+def sampled_betweenness(
+    adjacency: sp.csr_matrix,
+    samples: int = 256,
+    batch_size: int = 16,
+    seed: int = 0,
+) -> np.ndarray:
+    """Оценка посредничества (betweenness) алгоритмом Брандеса по случайной выборке источников
+
+    Обход в ширину выполняется сразу для пачки источников: фронт хранится
+    матрицей (вершины x источники), а шаг обхода — это одно произведение
+    разреженной матрицы смежности на плотную матрицу фронта.
+
+    Args:
+        adjacency: Симметричная матрица смежности (веса игнорируются, расстояние — число ребер)
+        samples: Количество источников в выборке
+        batch_size: Количество источников, обходимых одновременно
+    """
+    n = adjacency.shape[0]
+    betweenness = np.zeros(n)
+    if n == 0:
+        return betweenness
+
+    graph = adjacency.copy().tocsr()
+    graph.data[:] = 1.0
+    rng = np.random.default_rng(seed)
+    sources = rng.choice(n, size=min(samples, n), replace=False)
+
+    for start in range(0, len(sources), batch_size):
+        batch = sources[start : start + batch_size]
+        columns = np.arange(len(batch))
+
+        sigma = np.zeros((n, len(batch)))
+        sigma[batch, columns] = 1.0
+        depth = np.full((n, len(batch)), -1, dtype=np.int32)
+        depth[batch, columns] = 0
+
+        frontier = sigma.copy()
+        level = 0
+        while frontier.any():
+            level += 1
+            reached = graph @ frontier
+            discovered = (reached > 0) & (depth < 0)
+            depth[discovered] = level
+            frontier = np.where(discovered, reached, 0.0)
+            sigma += frontier
+
+        delta = np.zeros_like(sigma)
+        safe_sigma = np.where(sigma > 0, sigma, 1.0)
+        for d in range(level - 1, 0, -1):
+            coefficient = np.where(depth == d, (1.0 + delta) / safe_sigma, 0.0)
+            delta += np.where(depth == d - 1, sigma * (graph @ coefficient), 0.0)
+
+        delta[batch, columns] = 0.0
+        betweenness += delta.sum(axis=1)
+
+    # Экстраполяция с выборки на все источники; каждый путь неориентированного графа учтен дважды
+    return betweenness * (n / len(sources)) / 2.0
+
+
+def load_citation_edges(cur: psycopg2.extensions.cursor) -> np.ndarray:
+    """Ребра графа цитирований авторов: (кто цитирует, кого цитируют, количество)"""
+    return fetch_array(
+        cur,
+        """
+        SELECT citing_author, author_id, COUNT(*)
+        FROM author_citations_view
+        WHERE citing_author <> author_id
+        GROUP BY citing_author, author_id
+        """,
+    )
+
+
+def load_authorship(cur: psycopg2.extensions.cursor, max_item_authors: int = MAX_ITEM_AUTHORS) -> np.ndarray:
+    """Пары (автор, публикация) без публикаций с чрезмерным числом соавторов"""
+    return fetch_array(
+        cur,
+        """
+        SELECT DISTINCT a.authorid, a.itemid
+        FROM authors a
+        WHERE a.authorid IS NOT NULL
+          AND a.itemid IN (SELECT itemid
+                           FROM authors
+                           WHERE authorid IS NOT NULL
+                           GROUP BY itemid
+                           HAVING COUNT(DISTINCT authorid) <= %s)
+        """,
+        (max_item_authors,),
+    )
+
+
+def coauthorship_matrix(authorship: np.ndarray, author_ids: np.ndarray) -> sp.csr_matrix:
+    """Матрица соавторства: вес ребра — количество совместных публикаций"""
+    item_ids, item_index = np.unique(authorship[:, 1], return_inverse=True)
+    author_index = np.searchsorted(author_ids, authorship[:, 0])
+    incidence = sp.csr_matrix(
+        (np.ones(len(authorship)), (author_index, item_index)),
+        shape=(len(author_ids), len(item_ids)),
+    )
+    coauthorship = (incidence @ incidence.T).tocsr()
+    coauthorship.setdiag(0)
+    coauthorship.eliminate_zeros()
+    return coauthorship
+
+
+def refresh_author_centrality(cur: psycopg2.extensions.cursor) -> None:
+    """Пересчитывает таблицу author_centrality (шаг обновления вместе с материализованными представлениями)"""
+    citations = load_citation_edges(cur)
+    authorship = load_authorship(cur)
+
+    author_ids = np.union1d(np.unique(citations[:, :2]), np.unique(authorship[:, 0]))
+    logging.info("Computing centrality for %d authors", len(author_ids))
+
+    citation_graph = build_adjacency(citations[:, 0], citations[:, 1], citations[:, 2], author_ids)
+    ranks = pagerank(citation_graph)
+
+    coauthorship = coauthorship_matrix(authorship, author_ids)
+    degrees = weighted_degree(coauthorship)
+
+    # Посредничество считаем только по вершинам, у которых есть соавторы
+    connected = np.flatnonzero(degrees > 0)
+    betweenness = np.zeros(len(author_ids))
+    betweenness[connected] = sampled_betweenness(coauthorship[connected][:, connected])
+
+    cur.execute("DELETE FROM author_centrality")
+    execute_values(
+        cur,
+        "INSERT INTO author_centrality (authorid, pagerank, weighted_degree, betweenness) VALUES %s",
+        zip(author_ids.tolist(), ranks.tolist(), degrees.tolist(), betweenness.tolist()),
+        page_size=10_000,
+    )
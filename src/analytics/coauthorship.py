@@ -0,0 +1,161 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+from ..database.database import DatabaseService
+from ..database.refresh import get_data_version
+from ..utils.cache import Snapshot
+from ..utils.database import fetch_array
+from .csr import ranges
+
+
+def _gather(indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Соседи набора строк CSR-структуры
+
+    Returns:
+        (соседи, позиция строки-источника в rows для каждого соседа)
+    """
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    return indices[ranges(starts, lengths)], np.repeat(np.arange(len(rows)), lengths)
+
+
+def _csr(rows: np.ndarray, cols: np.ndarray, n_rows: int) -> tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32)
+
+
+@dataclass
+class PathResult:
+    found: bool
+    authors: list[int]
+    items: list[int]  # публикация, связывающая соседних авторов цепочки
+    visited: int
+    reason: str = ""
+
+
+class CoauthorshipIndex:
+    """Двудольная смежность автор <-> публикация в памяти процесса"""
+
+    def __init__(self, authorship: np.ndarray):
+        self.author_ids, author_index = np.unique(authorship[:, 0], return_inverse=True)
+        self.item_ids, item_index = np.unique(authorship[:, 1], return_inverse=True)
+        self.author_items_ptr, self.author_items = _csr(author_index, item_index, len(self.author_ids))
+        self.item_authors_ptr, self.item_authors = _csr(item_index, author_index, len(self.item_ids))
+
+    def author_position(self, authorid: int) -> int | None:
+        pos = int(np.searchsorted(self.author_ids, authorid))
+        if pos < len(self.author_ids) and self.author_ids[pos] == authorid:
+            return pos
+        return None
+
+    def shared_items(self, first: int, second: int) -> np.ndarray:
+        """itemid общих публикаций двух авторов, заданных позициями в индексе"""
+        a = self.author_items[self.author_items_ptr[first] : self.author_items_ptr[first + 1]]
+        b = self.author_items[self.author_items_ptr[second] : self.author_items_ptr[second + 1]]
+        return self.item_ids[np.intersect1d(a, b)]
+
+    def shortest_path(self, source: int, target: int, max_depth: int = 6, max_visited: int = 200_000) -> PathResult:
+        """Кратчайшая цепочка соавторства двунаправленным обходом в ширину
+
+        Каждый шаг расширяет ту сторону, у которой меньше суммарная степень фронта.
+
+        Args:
+            source, target: authorid концов цепочки
+            max_depth: Максимальная длина цепочки (в рукопожатиях)
+            max_visited: Предельное число посещенных авторов
+        """
+        start, finish = self.author_position(source), self.author_position(target)
+        if start is None or finish is None:
+            return PathResult(False, [], [], 0, "author not found")
+        if start == finish:
+            return PathResult(True, [source], [], 1)
+
+        n = len(self.author_ids)
+        # Для каждой стороны: глубина, предыдущий автор и связывающая публикация
+        depth = [np.full(n, -1, dtype=np.int16), np.full(n, -1, dtype=np.int16)]
+        parent = [np.full(n, -1, dtype=np.int32), np.full(n, -1, dtype=np.int32)]
+        via = [np.full(n, -1, dtype=np.int32), np.full(n, -1, dtype=np.int32)]
+        frontier = [np.array([start]), np.array([finish])]
+        depth[0][start] = 0
+        depth[1][finish] = 0
+        levels = [0, 0]
+        visited = 2
+
+        while len(frontier[0]) and len(frontier[1]) and levels[0] + levels[1] < max_depth:
+            cost = [int((self.author_items_ptr[f + 1] - self.author_items_ptr[f]).sum()) for f in frontier]
+            side = 0 if cost[0] <= cost[1] else 1
+            other = 1 - side
+
+            items, item_rows = _gather(self.author_items_ptr, self.author_items, frontier[side])
+            items, first = np.unique(items, return_index=True)
+            item_sources = frontier[side][item_rows[first]]
+
+            neighbours, neighbour_rows = _gather(self.item_authors_ptr, self.item_authors, items)
+            from_authors = item_sources[neighbour_rows]
+            via_items = items[neighbour_rows]
+
+            fresh = depth[side][neighbours] < 0
+            neighbours, from_authors, via_items = neighbours[fresh], from_authors[fresh], via_items[fresh]
+            neighbours, first = np.unique(neighbours, return_index=True)
+            from_authors, via_items = from_authors[first], via_items[first]
+
+            levels[side] += 1
+            depth[side][neighbours] = levels[side]
+            parent[side][neighbours] = from_authors
+            via[side][neighbours] = via_items
+            visited += len(neighbours)
+
+            met = neighbours[depth[other][neighbours] >= 0]
+            if len(met):
+                meeting = int(met[np.argmin(depth[other][met])])
+                return self._build_path(meeting, parent, via, visited)
+
+            if visited > max_visited:
+                return PathResult(False, [], [], visited, "visited budget exceeded")
+            frontier[side] = neighbours
+
+        reason = "max depth exceeded" if levels[0] + levels[1] >= max_depth else "no path"
+        return PathResult(False, [], [], visited, reason)
+
+    def _build_path(self, meeting: int, parent: list[np.ndarray], via: list[np.ndarray], visited: int) -> PathResult:
+        # Половина от source до точки встречи (в обратном порядке), затем до target
+        left, left_items = [meeting], []
+        while parent[0][left[-1]] >= 0:
+            left_items.append(int(via[0][left[-1]]))
+            left.append(int(parent[0][left[-1]]))
+        right, right_items = [meeting], []
+        while parent[1][right[-1]] >= 0:
+            right_items.append(int(via[1][right[-1]]))
+            right.append(int(parent[1][right[-1]]))
+
+        chain = left[::-1] + right[1:]
+        chain_items = left_items[::-1] + right_items
+        return PathResult(
+            True,
+            [int(self.author_ids[a]) for a in chain],
+            [int(self.item_ids[i]) for i in chain_items],
+            visited,
+        )
+
+
+def _load_index() -> CoauthorshipIndex:
+    with DatabaseService("new_data") as cur:
+        authorship = fetch_array(
+            cur,
+            "SELECT DISTINCT authorid, itemid FROM authors WHERE authorid IS NOT NULL AND itemid IS NOT NULL",
+        )
+    index = CoauthorshipIndex(authorship)
+    logging.info("Coauthorship index loaded: %d authors, %d items", len(index.author_ids), len(index.item_ids))
+    return index
+
+
+def _index_version():
+    with DatabaseService("new_data") as cur:
+        return get_data_version(cur, ["authors"])
+
+
+coauthorship_index: Snapshot[CoauthorshipIndex] = Snapshot(_load_index, ttl=300.0, version=_index_version)
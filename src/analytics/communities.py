@@ -0,0 +1,92 @@
+import numpy as np
+import scipy.sparse as sp
+
+from .csr import ranges
+
+MAX_ITERATIONS = 100
+# Доля узлов, которые пересчитывают метку на каждой итерации: одновременное
+# обновление всех узлов зацикливается на двудольных фрагментах графа
+UPDATE_FRACTION = 0.5
+
+
+def _row_argmax(matrix: sp.csr_matrix) -> np.ndarray:
+    """Столбец максимального элемента каждой строки (в каждой строке есть хотя бы один элемент)"""
+    row_max = np.maximum.reduceat(matrix.data, matrix.indptr[:-1])
+    row_of = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    hits = np.flatnonzero(matrix.data == row_max[row_of])
+    _, first = np.unique(row_of[hits], return_index=True)
+    return matrix.indices[hits[first]]
+
+
+def label_propagation(
+    n_nodes: int,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    weights: np.ndarray | None = None,
+    seed: int = 42,
+) -> np.ndarray:
+    """Сообщества взвешенным распространением меток
+
+    На каждой итерации случайная половина активных узлов принимает метку с
+    наибольшим суммарным весом ребер среди соседей. Суммы по меткам считаются
+    одной разреженной матрицей узел x метка. Активными остаются только соседи
+    узлов, сменивших метку, поэтому поздние итерации почти ничего не стоят.
+
+    Returns:
+        Номер сообщества для каждого узла: 0 — самое большое сообщество
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.arange(n_nodes)
+    if n_nodes == 0 or len(sources) == 0:
+        return labels
+
+    weights = np.ones(len(sources)) if weights is None else np.asarray(weights, dtype=np.float64)
+    adjacency = sp.csr_matrix(
+        (np.concatenate([weights, weights]), (np.concatenate([sources, targets]), np.concatenate([targets, sources]))),
+        shape=(n_nodes, n_nodes),
+    )
+    adjacency.sum_duplicates()
+    indptr, indices, edge_weights = adjacency.indptr, adjacency.indices, adjacency.data
+    # Небольшой вес собственной метки: при равенстве узел не меняет сообщество
+    own_weight = 1e-3 * float(edge_weights.min())
+
+    active = np.diff(indptr) > 0
+    for _ in range(MAX_ITERATIONS):
+        if not active.any():
+            break
+        nodes = np.flatnonzero(active & (rng.random(n_nodes) < UPDATE_FRACTION))
+
+        starts = indptr[nodes]
+        lengths = indptr[nodes + 1] - starts
+        positions = ranges(starts, lengths)
+        local_rows = np.concatenate([np.repeat(np.arange(len(nodes)), lengths), np.arange(len(nodes))])
+        columns = np.concatenate([labels[indices[positions]], labels[nodes]])
+        data = np.concatenate([edge_weights[positions], np.full(len(nodes), own_weight)])
+        # Случайная добавка разбивает прочие равенства без систематического смещения
+        data += rng.uniform(0, own_weight * 1e-3, len(data))
+        best = _row_argmax(sp.csr_matrix((data, (local_rows, columns)), shape=(len(nodes), n_nodes)))
+
+        changed = nodes[best != labels[nodes]]
+        labels[nodes] = best
+        active[nodes] = False
+        if len(changed):
+            starts = indptr[changed]
+            lengths = indptr[changed + 1] - starts
+            active[indices[ranges(starts, lengths)]] = True
+
+    _, labels, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(sizes))
+    return rank[labels]
+
+
+def modularity(labels: np.ndarray, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray | None = None) -> float:
+    """Модулярность разбиения неориентированного графа"""
+    weights = np.ones(len(sources)) if weights is None else np.asarray(weights, dtype=np.float64)
+    total = weights.sum()
+    if total == 0:
+        return 0.0
+    n_communities = int(labels.max()) + 1
+    inside = np.bincount(labels[sources], weights * (labels[sources] == labels[targets]), n_communities)
+    degree = np.bincount(labels[sources], weights, n_communities) + np.bincount(labels[targets], weights, n_communities)
+    return float((inside / total - (degree / (2 * total)) ** 2).sum())
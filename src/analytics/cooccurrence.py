@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+COOCCURRENCE_MEASURES = ("count", "jaccard", "pmi", "npmi")
+
+
+def incidence_matrix(itemids: np.ndarray, keywords: np.ndarray) -> tuple[sp.csc_matrix, np.ndarray]:
+    """Бинарная матрица публикация x ключевое слово
+
+    Returns:
+        (матрица в формате CSC, массив ключевых слов по столбцам)
+    """
+    item_codes, _ = pd.factorize(itemids)
+    keyword_codes, vocabulary = pd.factorize(keywords)
+    matrix = sp.csc_matrix(
+        (np.ones(len(item_codes), dtype=np.float64), (item_codes, keyword_codes)),
+        shape=(item_codes.max() + 1 if len(item_codes) else 0, len(vocabulary)),
+    )
+    # Повторы пары (публикация, слово) схлопываются в единицу
+    matrix.data[:] = 1.0
+    return matrix, np.asarray(vocabulary, dtype=object)
+
+
+def normalize_cooccurrence(
+    counts: np.ndarray,
+    freq_rows: np.ndarray,
+    freq_cols: np.ndarray,
+    n_items: int,
+    measure: str,
+) -> np.ndarray:
+    """Нормализует матрицу совместных встречаемостей
+
+    Args:
+        counts: Число публикаций, где встретились оба слова
+        freq_rows, freq_cols: Частоты слов строк и столбцов
+        n_items: Общее число публикаций
+        measure: count, jaccard, pmi или npmi
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    if measure == "count":
+        return counts
+
+    fa = freq_rows[:, None].astype(np.float64)
+    fb = freq_cols[None, :].astype(np.float64)
+    if measure == "jaccard":
+        union = fa + fb - counts
+        return np.divide(counts, union, out=np.zeros_like(counts), where=union > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pmi = np.log(counts * n_items / (fa * fb))
+        if measure == "npmi":
+            pmi = pmi / -np.log(counts / n_items)
+    return np.where(counts > 0, np.nan_to_num(pmi, nan=0.0, posinf=0.0, neginf=0.0), 0.0)
+
+
+def keyword_cooccurrence_graph(
+    itemids: np.ndarray,
+    keywords: np.ndarray,
+    seeds: list[str],
+    measure: str = "jaccard",
+    max_nodes: int = 100,
+    min_cooccurrence: int = 2,
+    max_links: int = 1000,
+) -> tuple[list[tuple], list[tuple]]:
+    """Граф совместной встречаемости ключевых слов
+
+    Полная матрица слово x слово не строится: сначала выбираются узлы (семена
+    и их ближайшие соседи по мере measure, а без семян — самые частые слова),
+    и произведение X^T X считается только для их столбцов.
+
+    Args:
+        itemids, keywords: Пары (публикация, нормализованное ключевое слово)
+        seeds: Исходные ключевые слова (нормализованные)
+
+    Returns:
+        (узлы (слово, слово, частота, категория), ребра (слово, слово, вес))
+    """
+    if len(itemids) == 0:
+        return [], []
+
+    matrix, vocabulary = incidence_matrix(itemids, keywords)
+    n_items = matrix.shape[0]
+    freq = np.asarray(matrix.sum(axis=0)).ravel()
+
+    positions = {keyword: pos for pos, keyword in enumerate(vocabulary)}
+    seed_columns = np.array([positions[s] for s in dict.fromkeys(seeds) if s in positions], dtype=np.int64)
+
+    if len(seed_columns):
+        # Строки семян: s x K, стоимость пропорциональна числу публикаций с семенами
+        seed_counts = (matrix[:, seed_columns].T @ matrix).toarray()
+        scores = normalize_cooccurrence(seed_counts, freq[seed_columns], freq, n_items, measure)
+        scores[seed_counts < min_cooccurrence] = -np.inf
+        if measure in ("pmi", "npmi"):
+            # PMI <= 0: слова встречаются вместе не чаще, чем случайно
+            scores[scores <= 0] = -np.inf
+        best = scores.max(axis=0)
+        best[seed_columns] = -np.inf
+        budget = max(max_nodes - len(seed_columns), 0)
+        candidates = np.flatnonzero(np.isfinite(best))
+        related = candidates[np.argsort(-best[candidates], kind="stable")[:budget]]
+        nodes = np.concatenate([seed_columns, related])
+    else:
+        nodes = np.argsort(-freq, kind="stable")[:max_nodes]
+
+    sub = matrix[:, nodes]
+    counts = (sub.T @ sub).toarray()
+    weights = normalize_cooccurrence(counts, freq[nodes], freq[nodes], n_items, measure)
+
+    rows, cols = np.triu_indices(len(nodes), k=1)
+    keep = counts[rows, cols] >= min_cooccurrence
+    if measure in ("pmi", "npmi"):
+        keep &= weights[rows, cols] > 0
+    rows, cols = rows[keep], cols[keep]
+    order = np.argsort(-weights[rows, cols], kind="stable")[:max_links]
+    rows, cols = rows[order], cols[order]
+
+    seed_set = set(seed_columns.tolist())
+    node_tuples = [
+        (vocabulary[n], vocabulary[n], int(freq[n]), 1 if n in seed_set else 0)
+        for n in nodes.tolist()
+    ]
+    link_tuples = [
+        (vocabulary[nodes[r]], vocabulary[nodes[c]], round(float(weights[r, c]), 4))
+        for r, c in zip(rows.tolist(), cols.tolist())
+    ]
+    return node_tuples, link_tuples
@@ -0,0 +1,10 @@
+import numpy as np
+
+
+def ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Позиции всех полуинтервалов [start, start + length) одним массивом
+
+    Используется для выборки строк CSR-структуры: starts = indptr[rows],
+    lengths = indptr[rows + 1] - starts.
+    """
+    return np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(int(lengths.sum()))
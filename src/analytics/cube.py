@@ -0,0 +1,265 @@
+import logging
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from ..database.database import DatabaseService, get_db_connection
+from ..database.refresh import get_data_version
+from ..utils.cache import Snapshot
+from .csr import ranges
+
+# Рейтинги и карта считаются по кубу вместо запросов к материализованным представлениям
+OLAP_CUBE = os.getenv("OLAP_CUBE", "").lower() in ("1", "true", "yes")
+FETCH_SIZE = 500_000
+
+# Данные куба меняются вместе с представлениями, которые он заменяет
+CUBE_SOURCES = ["organization_keyword_items_mv", "city_publications_mv", "city_organization_items_mv", "item_canonical"]
+
+
+class _DimensionIndex:
+    """Строки фактов, сгруппированные по коду измерения (-1 — значения нет)"""
+
+    def __init__(self, codes: np.ndarray, size: int):
+        self.order = np.argsort(codes, kind="stable")
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(codes + 1, minlength=size + 1))])
+
+    def rows(self, codes: np.ndarray) -> np.ndarray:
+        codes = np.asarray(codes, dtype=np.int64) + 1
+        starts = self.indptr[codes]
+        return self.order[ranges(starts, self.indptr[codes + 1] - starts)]
+
+
+@dataclass
+class Cube:
+    """Факты «публикация — организация — город — ключевое слово — год» в numpy
+
+    Каждая строка — уникальное сочетание; измерения закодированы целыми
+    (позиция в массиве значений измерения, -1 — нет значения). Срезы берутся
+    по заранее отсортированным индексам измерений, группировки с подсчетом
+    различных публикаций — через np.unique по составному ключу.
+    """
+
+    organization_ids: np.ndarray
+    organization_names: np.ndarray
+    keywords: np.ndarray
+    cities: np.ndarray
+    organization: np.ndarray
+    keyword: np.ndarray
+    city: np.ndarray
+    year: np.ndarray
+    item: np.ndarray
+    canonical: np.ndarray
+    city_aliases: dict[str, int]  # написание города из city_aliases -> код города
+
+    def __post_init__(self):
+        self._keywords_lower = pd.Series(self.keywords, dtype=object).str.lower()
+        self._organization_codes = {int(org): code for code, org in enumerate(self.organization_ids)}
+        name_codes, self._names = pd.factorize(self.organization_names)
+        # Организации с одинаковым названием в city_organization_items_mv считаются одной
+        self._organization_name = np.where(self.organization >= 0, name_codes[self.organization], -1)
+        self._indexes = {
+            "keyword": _DimensionIndex(self.keyword, len(self.keywords)),
+            "organization": _DimensionIndex(self.organization, len(self.organization_ids)),
+            "city": _DimensionIndex(self.city, len(self.cities)),
+        }
+
+    def __len__(self) -> int:
+        return len(self.item)
+
+    def match_keywords(self, pattern: str) -> np.ndarray:
+        """Коды ключевых слов, содержащих подстроку (как ILIKE '%pattern%')"""
+        return np.flatnonzero(self._keywords_lower.str.contains(pattern.lower(), regex=False, na=False).to_numpy(dtype=bool))
+
+    def slice(
+        self,
+        keyword: str | None = None,
+        organization_id: int | None = None,
+        city: str | None = None,
+        year_from: int | None = None,
+        year_to: int | None = None,
+    ) -> np.ndarray | None:
+        """Номера строк фактов, попадающих в срез; None — без ограничений"""
+        rows = None
+        if keyword is not None:
+            rows = self._indexes["keyword"].rows(self.match_keywords(keyword))
+        for dimension, code in (
+            ("organization", None if organization_id is None else self._organization_codes.get(int(organization_id), -2)),
+            ("city", None if city is None else self.city_aliases.get(city, -2)),
+        ):
+            if code is None:
+                continue
+            if code == -2:
+                return np.empty(0, dtype=np.int64)
+            if rows is None:
+                rows = self._indexes[dimension].rows([code])
+            else:
+                values = self.organization if dimension == "organization" else self.city
+                rows = rows[values[rows] == code]
+        if year_from is not None or year_to is not None:
+            if rows is None:
+                rows = np.arange(len(self))
+            years = self.year[rows]
+            rows = rows[(years >= (year_from or 0)) & (years <= (year_to or np.iinfo(np.int16).max))]
+        return rows
+
+    def count_distinct(self, groups: np.ndarray, rows: np.ndarray | None, dedup: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """Число различных публикаций в каждой группе среза (строки с кодом группы -1 не считаются)
+
+        Returns:
+            (коды групп, число публикаций)
+        """
+        items = self.canonical if dedup else self.item
+        if rows is not None:
+            groups, items = groups[rows], items[rows]
+        keep = groups >= 0
+        groups, items = groups[keep].astype(np.int64), items[keep]
+        if len(groups) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        base = int(items.max()) + 1
+        pairs = np.unique(groups * base + items)
+        codes, counts = np.unique(pairs // base, return_counts=True)
+        return codes, counts
+
+    @staticmethod
+    def _top(codes: np.ndarray, counts: np.ndarray, min_count: int, limit: int | None) -> tuple[np.ndarray, np.ndarray]:
+        keep = counts >= min_count
+        codes, counts = codes[keep], counts[keep]
+        order = np.lexsort((codes, -counts))[:limit]
+        return codes[order], counts[order]
+
+    def top_organizations_by_keyword(self, keyword: str, min_count: int, limit: int, dedup: bool = False) -> list[dict]:
+        rows = self.slice(keyword=keyword)
+        codes, counts = self._top(*self.count_distinct(self.organization, rows, dedup), min_count, limit)
+        return [
+            {"organization": int(self.organization_ids[code]), "name": self.organization_names[code], "count": int(count)}
+            for code, count in zip(codes, counts)
+        ]
+
+    def top_keywords_by_organization(self, organization_id: int, min_count: int, limit: int, dedup: bool = False) -> list[dict]:
+        rows = self.slice(organization_id=organization_id)
+        codes, counts = self._top(*self.count_distinct(self.keyword, rows, dedup), min_count, limit)
+        return [{"keyword": self.keywords[code], "count": int(count)} for code, count in zip(codes, counts)]
+
+    def publications_by_city(self, keyword: str | None = None) -> dict[str, int]:
+        """Город (как в city_publications_mv) -> число публикаций с ключевыми словами"""
+        rows = self.slice(keyword=keyword)
+        if rows is None:
+            rows = np.flatnonzero(self.keyword >= 0)
+        else:
+            rows = rows[self.keyword[rows] >= 0]
+        codes, counts = self.count_distinct(self.city, rows)
+        return {self.cities[code]: int(count) for code, count in zip(codes, counts)}
+
+    def item_cities(self, keyword: str | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Различные пары (публикация, город) среза — для связей между городами"""
+        rows = self.slice(keyword=keyword)
+        if rows is None:
+            rows = np.flatnonzero((self.keyword >= 0) & (self.city >= 0))
+        else:
+            rows = rows[(self.keyword[rows] >= 0) & (self.city[rows] >= 0)]
+        pairs = np.unique(np.stack([self.item[rows], self.city[rows].astype(np.int64)], axis=1), axis=0)
+        return pairs[:, 0], self.cities[pairs[:, 1]] if len(pairs) else np.empty(0, dtype=object)
+
+    def organizations_in_city(self, city: str, keyword: str | None, limit: int) -> list[dict]:
+        """Организации города (по названию, как в city_organization_items_mv) по числу публикаций"""
+        rows = self.slice(keyword=keyword, city=city)
+        codes, counts = self._top(*self.count_distinct(self._organization_name, rows), 1, limit)
+        return [{"organization": self._names[code], "publications": int(count)} for code, count in zip(codes, counts)]
+
+
+# id организаций eLibrary разрежены, поэтому для куба они перенумеровываются подряд;
+# id ключевых слов и городов из dim_* и так идут подряд и используются как есть
+_ORGANIZATIONS_QUERY = """
+    CREATE TEMP TABLE cube_organizations ON COMMIT DROP AS
+    SELECT (row_number() OVER (ORDER BY id) - 1)::int AS code, id, name
+    FROM dim_organizations
+"""
+
+_FACTS_QUERY = """
+    SELECT DISTINCT COALESCE(o.code, -1),
+                    COALESCE(dk.id, -1),
+                    COALESCE(dc.id, -1),
+                    COALESCE(i.year, 0),
+                    a.itemid,
+                    COALESCE(ic.canonical_itemid, a.itemid)
+    FROM affiliations af
+             JOIN authors a ON a.id = af.author
+             LEFT JOIN cube_organizations o ON o.id = af.affiliationid
+             LEFT JOIN city_aliases ca ON ca.alias = lower(trim(af.town))
+             LEFT JOIN dim_cities dc ON dc.city = ca.city
+             LEFT JOIN keywords kw ON kw.itemid = a.itemid
+             LEFT JOIN dim_keywords dk ON dk.keyword = lower(trim(kw.keyword))
+             LEFT JOIN items i ON i.itemid = a.itemid
+             LEFT JOIN item_canonical ic ON ic.itemid = a.itemid
+    WHERE a.itemid IS NOT NULL
+"""
+
+
+def _dimension_array(rows: list[tuple[int, str]]) -> np.ndarray:
+    """Значения измерения по id (пропуски в нумерации — None)"""
+    values = np.empty(max((row[0] for row in rows), default=-1) + 1, dtype=object)
+    for dimension_id, value in rows:
+        values[dimension_id] = value
+    return values
+
+
+def load_cube() -> Cube:
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_ORGANIZATIONS_QUERY)
+            cur.execute("SELECT id, name FROM cube_organizations ORDER BY code")
+            organizations = cur.fetchall()
+            cur.execute("SELECT id, keyword FROM dim_keywords")
+            keywords = _dimension_array(cur.fetchall())
+            cur.execute("SELECT id, city FROM dim_cities")
+            cities = _dimension_array(cur.fetchall())
+            cur.execute("SELECT ca.alias, dc.id FROM city_aliases ca JOIN dim_cities dc ON dc.city = ca.city")
+            city_aliases = dict(cur.fetchall())
+
+        chunks = []
+        with conn.cursor(name="olap_cube_facts") as cur:
+            cur.itersize = FETCH_SIZE
+            cur.execute(_FACTS_QUERY)
+            while True:
+                rows = cur.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                chunks.append(np.array(rows, dtype=np.int64))
+        conn.rollback()
+    finally:
+        conn.close()
+
+    facts = np.concatenate(chunks) if chunks else np.empty((0, 6), dtype=np.int64)
+    cube = Cube(
+        organization_ids=np.array([row[0] for row in organizations], dtype=np.int64),
+        organization_names=np.array([row[1] for row in organizations], dtype=object),
+        keywords=keywords,
+        cities=cities,
+        organization=facts[:, 0].astype(np.int32),
+        keyword=facts[:, 1].astype(np.int32),
+        city=facts[:, 2].astype(np.int32),
+        year=facts[:, 3].astype(np.int16),
+        item=facts[:, 4],
+        canonical=facts[:, 5],
+        city_aliases=city_aliases,
+    )
+    logging.info(
+        "OLAP cube loaded: %d facts, %d organizations, %d keywords, %d cities",
+        len(cube),
+        len(organizations),
+        len(keywords),
+        len(cities),
+    )
+    return cube
+
+
+def _cube_version():
+    with DatabaseService("new_data") as cur:
+        return get_data_version(cur, CUBE_SOURCES)
+
+
+olap_cube: Snapshot[Cube] = Snapshot(load_cube, ttl=300.0, version=_cube_version)
@@ -0,0 +1,215 @@
+import io
+import logging
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+NUM_PERM = 64
+BANDS = 8  # 8 полос по 8 строк: кандидатами становятся пары с близостью примерно от 0.77
+SHINGLE_SIZE = 5
+# Порог оценки близости Жаккара по сигнатурам для подтверждения кандидатов
+SIMILARITY_THRESHOLD = 0.8
+# Короткие названия без ключевых слов («Предисловие», «Введение») не сравниваем
+MIN_SHINGLES = 12
+
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_BASE = np.uint64(1_000_003)
+
+_rng = np.random.default_rng(42)
+# Перестановки — хэширование умножением со сдвигом: (a * h + b) mod 2^64 >> 32, a нечетное
+_PERM_A = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_PERM_B = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_title(title: str | None) -> str:
+    return _NON_WORD.sub(" ", (title or "").lower()).strip()
+
+
+def shingle_hashes(titles: list[str], keyword_sets: list[list[str]]) -> tuple[np.ndarray, np.ndarray]:
+    """Хэши шинглов всех документов одним массивом
+
+    Шинглы названия — символьные n-граммы, их полиномиальные хэши считаются
+    векторно по склеенному массиву кодов символов всех названий. Ключевые
+    слова добавляются как отдельные шинглы.
+
+    Returns:
+        (хэши uint64, индекс документа для каждого хэша) — отсортированы по документу
+    """
+    codes_parts, owner_parts = [], []
+    for doc, title in enumerate(titles):
+        codes = np.frombuffer(title.encode("utf-32-le"), dtype=np.uint32)
+        codes_parts.append(codes)
+        owner_parts.append(np.full(len(codes), doc, dtype=np.int64))
+
+    hashes, owners = [], []
+    if codes_parts:
+        codes = np.concatenate(codes_parts).astype(np.uint64)
+        owner = np.concatenate(owner_parts)
+        if len(codes) >= SHINGLE_SIZE:
+            window = np.lib.stride_tricks.sliding_window_view(codes, SHINGLE_SIZE)
+            window_owner = np.lib.stride_tricks.sliding_window_view(owner, SHINGLE_SIZE)
+            # Окна, попавшие на стык двух названий, отбрасываются
+            inside = window_owner[:, 0] == window_owner[:, -1]
+            value = np.zeros(len(window), dtype=np.uint64)
+            for column in range(SHINGLE_SIZE):
+                value = (value * _BASE + window[:, column]) & _MAX_HASH
+            hashes.append(value[inside])
+            owners.append(window_owner[inside, 0])
+
+    keyword_hashes = [
+        (zlib.crc32(f"k:{keyword}".encode()), doc) for doc, keywords in enumerate(keyword_sets) for keyword in keywords
+    ]
+    if keyword_hashes:
+        values, docs = zip(*keyword_hashes)
+        hashes.append(np.array(values, dtype=np.uint64))
+        owners.append(np.array(docs, dtype=np.int64))
+
+    if not hashes:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+
+    # Уникальные пары (документ, хэш), упорядоченные по документу: хэши 32-битные, документ — в старших битах
+    keys = np.unique((np.concatenate(owners).astype(np.uint64) << np.uint64(32)) | np.concatenate(hashes))
+    return keys & _MAX_HASH, (keys >> np.uint64(32)).astype(np.int64)
+
+
+def minhash_signatures(hashes: np.ndarray, owners: np.ndarray, n_docs: int, chunk: int = 4) -> np.ndarray:
+    """MinHash-сигнатуры (n_docs x NUM_PERM) для документов с непустым набором шинглов
+
+    Минимум по каждому документу считается через np.minimum.reduceat по
+    отсортированному массиву хэшей, по chunk перестановок за раз.
+    """
+    signatures = np.full((n_docs, NUM_PERM), _MAX_HASH, dtype=np.uint64)
+    if len(hashes) == 0:
+        return signatures.astype(np.uint32)
+
+    docs, starts = np.unique(owners, return_index=True)
+    for first in range(0, NUM_PERM, chunk):
+        a = _PERM_A[first : first + chunk, None]
+        b = _PERM_B[first : first + chunk, None]
+        permuted = (a * hashes[None, :] + b) >> np.uint64(32)
+        signatures[docs, first : first + chunk] = np.minimum.reduceat(permuted, starts, axis=1).T
+    return signatures.astype(np.uint32)
+
+
+def candidate_pairs(signatures: np.ndarray, active: np.ndarray) -> np.ndarray:
+    """Пары кандидатов LSH: документы, совпавшие хотя бы в одной полосе
+
+    Чтобы большие корзины не давали квадратичного числа пар, каждый документ
+    корзины связывается только с ее первым документом.
+    """
+    rows = NUM_PERM // BANDS
+    docs = np.flatnonzero(active)
+    pairs = []
+    for band in range(BANDS):
+        block = np.ascontiguousarray(signatures[docs, band * rows : (band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        new_bucket = np.ones(len(order), dtype=bool)
+        new_bucket[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        bucket_head = order[np.maximum.accumulate(np.where(new_bucket, np.arange(len(order)), 0))]
+        same = ~new_bucket
+        pairs.append(np.stack([docs[bucket_head[same]], docs[order[same]]], axis=1))
+
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    stacked = np.concatenate(pairs)
+    keys = np.unique(stacked[:, 0] * signatures.shape[0] + stacked[:, 1])
+    return np.stack([keys // signatures.shape[0], keys % signatures.shape[0]], axis=1)
+
+
+def duplicate_clusters(titles: list[str], keyword_sets: list[list[str]]) -> tuple[np.ndarray, np.ndarray]:
+    """Кластеры почти-дубликатов
+
+    Returns:
+        (номер кластера для каждого документа, оценка близости к голове пары; 0 для одиночек)
+    """
+    n_docs = len(titles)
+    hashes, owners = shingle_hashes(titles, keyword_sets)
+    signatures = minhash_signatures(hashes, owners, n_docs)
+    active = np.bincount(owners, minlength=n_docs) >= MIN_SHINGLES
+
+    pairs = candidate_pairs(signatures, active)
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1) if len(pairs) else np.empty(0)
+    confirmed = pairs[similarity >= SIMILARITY_THRESHOLD]
+
+    graph = sp.coo_matrix(
+        (np.ones(len(confirmed)), (confirmed[:, 0], confirmed[:, 1])),
+        shape=(n_docs, n_docs),
+    )
+    _, labels = connected_components(graph, directed=False)
+
+    best = np.zeros(n_docs)
+    if len(confirmed):
+        scores = similarity[similarity >= SIMILARITY_THRESHOLD]
+        np.maximum.at(best, confirmed[:, 0], scores)
+        np.maximum.at(best, confirmed[:, 1], scores)
+    return labels, best
+
+
+def _load_year(cur: psycopg2.extensions.cursor, year: int | None) -> pd.DataFrame:
+    cur.execute(
+        """
+        SELECT i.itemid,
+               i.dateinstall,
+               i.title,
+               (SELECT array_agg(DISTINCT lower(trim(k.keyword)))
+                FROM keywords k
+                WHERE k.itemid = i.itemid AND k.keyword IS NOT NULL) AS keywords
+        FROM items i
+        WHERE i.year IS NOT DISTINCT FROM %s
+        """,
+        (year,),
+    )
+    return pd.DataFrame(cur.fetchall(), columns=["itemid", "dateinstall", "title", "keywords"])
+
+
+def refresh_item_canonical(cur: psycopg2.extensions.cursor) -> None:
+    """Пересчитывает item_canonical: дубликат -> каноническая публикация
+
+    Дубликаты ищутся внутри одного года публикации. Канонической считается
+    самая ранняя загруженная публикация кластера (при равенстве — с меньшим itemid).
+    """
+    cur.execute("SELECT DISTINCT year FROM items")
+    years = [row[0] for row in cur.fetchall()]
+
+    cur.execute("DELETE FROM item_canonical")
+    total = 0
+    for year in years:
+        docs = _load_year(cur, year)
+        if len(docs) < 2:
+            continue
+
+        labels, similarity = duplicate_clusters(
+            [normalize_title(title) for title in docs["title"]],
+            [keywords or [] for keywords in docs["keywords"]],
+        )
+        docs["cluster"] = labels
+        docs["similarity"] = similarity
+        docs["installed"] = docs["dateinstall"].fillna(pd.Timestamp.max)
+        docs = docs[docs.groupby("cluster")["itemid"].transform("size") > 1]
+        if docs.empty:
+            continue
+
+        heads = docs.sort_values(["installed", "itemid"]).groupby("cluster")["itemid"].first()
+        docs = docs.assign(canonical_itemid=docs["cluster"].map(heads))
+        duplicates = docs[docs["itemid"] != docs["canonical_itemid"]]
+
+        buffer = io.StringIO()
+        duplicates[["itemid", "canonical_itemid", "similarity"]].round(4).to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cur.copy_expert(
+            "COPY item_canonical (itemid, canonical_itemid, similarity) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        total += len(duplicates)
+        logging.debug("Year %s: %d items, %d duplicates", year, len(docs), len(duplicates))
+
+    logging.info("Found %d duplicate items", total)
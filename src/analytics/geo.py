@@ -0,0 +1,247 @@
+import logging
+import re
+
+import numpy as np
+import scipy.sparse as sp
+
+from ..database.database import DatabaseService
+from ..utils.cache import Snapshot
+
+# Порог близости по триграммам (как similarity() в pg_trgm) для названий, не найденных точно
+FUZZY_THRESHOLD = 0.5
+# Начиная с этого масштаба карты точки не объединяются в кластеры
+CLUSTER_MAX_ZOOM = 8
+# Ячеек сетки кластеризации на тайл 256px по каждой оси
+GRID_CELLS_PER_TILE = 4
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+_SETTLEMENT_PREFIX = re.compile(r"^(г|гор|город|пос|пгт|с|city of) (?=\S)")
+
+
+def normalize_settlement(name: str | None) -> str:
+    """Ключ названия населенного пункта: без регистра, «ё», пунктуации и префиксов «г.», «пос.»"""
+    key = _NON_WORD.sub(" ", (name or "").lower().replace("ё", "е")).strip()
+    return _SETTLEMENT_PREFIX.sub("", key)
+
+
+def trigrams(key: str) -> set[str]:
+    """Триграммы слов с отступами, как в pg_trgm"""
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_matrix(keys: list[str], vocabulary: dict[str, int], extend: bool = True) -> sp.csr_matrix:
+    """Бинарная матрица ключ x триграмма
+
+    Args:
+        vocabulary: Номера столбцов триграмм; с extend=True дополняется новыми,
+            иначе триграммы не из словаря пропускаются
+    """
+    rows, cols = [], []
+    for position, key in enumerate(keys):
+        for gram in trigrams(key):
+            column = vocabulary.setdefault(gram, len(vocabulary)) if extend else vocabulary.get(gram)
+            if column is not None:
+                rows.append(position)
+                cols.append(column)
+    return sp.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(keys), len(vocabulary))
+    )
+
+
+def parse_bbox(value: str) -> tuple[float, float, float, float]:
+    """bbox=west,south,east,north (как L.LatLngBounds.toBBoxString)
+
+    Raises:
+        ValueError: Неверный формат или координаты вне допустимых значений
+    """
+    parts = [float(part) for part in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox must be west,south,east,north")
+    west, south, east, north = parts
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError("bbox coordinates are out of range")
+    return west, south, east, north
+
+
+def in_bbox(lat: np.ndarray, lon: np.ndarray, bbox: tuple[float, float, float, float]) -> np.ndarray:
+    west, south, east, north = bbox
+    inside_lon = (lon >= west) & (lon <= east) if west <= east else (lon >= west) | (lon <= east)
+    return (lat >= south) & (lat <= north) & inside_lon
+
+
+def grid_clusters(lat: np.ndarray, lon: np.ndarray, zoom: int) -> np.ndarray:
+    """Номер ячейки сетки для каждой точки; размер ячейки — четверть тайла на масштабе zoom"""
+    cell = 360.0 / (2**zoom * GRID_CELLS_PER_TILE)
+    cells = np.stack([np.floor(lat / cell), np.floor(lon / cell)], axis=1).astype(np.int64)
+    _, labels = np.unique(cells, axis=0, return_inverse=True)
+    return labels.ravel()
+
+
+class GeoIndex:
+    """Координаты населенных пунктов из coordinate_data с поиском по названию
+
+    Названия сопоставляются по normalize_settlement; если точного совпадения
+    нет, берется самое похожее по триграммам название (не ниже FUZZY_THRESHOLD).
+    Результаты нечеткого поиска запоминаются.
+    """
+
+    def __init__(self, names: list[str], lat: np.ndarray, lon: np.ndarray):
+        self.names = np.array(names, dtype=object)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+
+        keys = [normalize_settlement(name) for name in names]
+        self._positions: dict[str, int] = {}
+        for position, key in enumerate(keys):
+            if key:
+                self._positions.setdefault(key, position)
+
+        self._vocabulary: dict[str, int] = {}
+        self._trigrams = trigram_matrix(keys, self._vocabulary).tocsc()
+        self._sizes = np.asarray(self._trigrams.sum(axis=1)).ravel()
+        self._fuzzy: dict[str, int | None] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def locate(self, name: str | None) -> int | None:
+        """Позиция населенного пункта по названию или None"""
+        key = normalize_settlement(name)
+        if not key:
+            return None
+        position = self._positions.get(key)
+        if position is not None:
+            return position
+        if key not in self._fuzzy:
+            self._fuzzy[key] = self._most_similar(key)
+        return self._fuzzy[key]
+
+    def _most_similar(self, key: str) -> int | None:
+        grams = trigrams(key)
+        columns = [self._vocabulary[gram] for gram in grams if gram in self._vocabulary]
+        if not columns:
+            return None
+        overlap = np.asarray(self._trigrams[:, columns].sum(axis=1)).ravel()
+        similarity = overlap / (self._sizes + len(grams) - overlap)
+        best = int(np.argmax(similarity))
+        return best if similarity[best] >= FUZZY_THRESHOLD else None
+
+    def city_points(
+        self, publications: dict[int, int], bbox: tuple | None = None, zoom: int | None = None
+    ) -> list[dict]:
+        """Точки карты публикаций: только видимые в bbox, на мелком масштабе — кластеры сетки
+
+        Args:
+            publications: Позиция населенного пункта -> число публикаций
+        """
+        positions = np.fromiter(publications.keys(), dtype=np.int64, count=len(publications))
+        weights = np.fromiter(publications.values(), dtype=np.int64, count=len(publications))
+        if bbox is not None:
+            visible = in_bbox(self.lat[positions], self.lon[positions], bbox)
+            positions, weights = positions[visible], weights[visible]
+        lat, lon = self.lat[positions], self.lon[positions]
+
+        if zoom is None or zoom >= CLUSTER_MAX_ZOOM:
+            return [
+                {"city": self.names[p], "publications": int(w), "lat": float(y), "lon": float(x)}
+                for p, w, y, x in zip(positions, weights, lat, lon)
+            ]
+
+        labels = grid_clusters(lat, lon, zoom)
+        n_clusters = int(labels.max()) + 1 if len(labels) else 0
+        totals = np.bincount(labels, weights=weights, minlength=n_clusters)
+        sizes = np.bincount(labels, minlength=n_clusters)
+        # Центр кластера — среднее координат, взвешенное числом публикаций
+        center_lat = np.bincount(labels, weights=lat * weights, minlength=n_clusters) / np.maximum(totals, 1)
+        center_lon = np.bincount(labels, weights=lon * weights, minlength=n_clusters) / np.maximum(totals, 1)
+        # Кластер называется по городу с наибольшим числом публикаций
+        order = np.lexsort((-weights, labels))
+        leaders = positions[order[np.searchsorted(labels[order], np.arange(n_clusters))]]
+        return [
+            {
+                "city": self.names[leaders[c]],
+                "publications": int(totals[c]),
+                "lat": float(center_lat[c]),
+                "lon": float(center_lon[c]),
+                "cities": int(sizes[c]),
+            }
+            for c in range(n_clusters)
+        ]
+
+    def city_links(
+        self, links: dict[tuple[int, int], int], bbox: tuple | None = None, zoom: int | None = None
+    ) -> list[dict]:
+        """Связи между городами: хотя бы один конец в bbox; на мелком масштабе — между кластерами
+
+        Args:
+            links: (позиция города A, позиция города B) -> число совместных публикаций
+        """
+        pairs = np.array(list(links.keys()), dtype=np.int64).reshape(-1, 2)
+        weights = np.fromiter(links.values(), dtype=np.int64, count=len(links))
+        if bbox is not None:
+            visible = in_bbox(self.lat[pairs], self.lon[pairs], bbox).any(axis=1)
+            pairs, weights = pairs[visible], weights[visible]
+
+        if zoom is not None and zoom < CLUSTER_MAX_ZOOM and len(pairs):
+            endpoints, inverse = np.unique(pairs, return_inverse=True)
+            labels = grid_clusters(self.lat[endpoints], self.lon[endpoints], zoom)
+            n_clusters = int(labels.max()) + 1
+            # Кластер представляет город с наибольшим весом связей, координаты — средние по городам
+            strength = np.bincount(inverse.ravel(), weights=np.repeat(weights, 2), minlength=len(endpoints))
+            order = np.lexsort((-strength, labels))
+            representatives = endpoints[order[np.searchsorted(labels[order], np.arange(n_clusters))]]
+            sizes = np.bincount(labels, minlength=n_clusters)
+            center_lat = np.bincount(labels, weights=self.lat[endpoints], minlength=n_clusters) / sizes
+            center_lon = np.bincount(labels, weights=self.lon[endpoints], minlength=n_clusters) / sizes
+
+            clusters = np.sort(labels[inverse.reshape(-1, 2)], axis=1)
+            keep = clusters[:, 0] != clusters[:, 1]
+            clusters, weights = clusters[keep], weights[keep]
+            unique_pairs, pair_inverse = np.unique(clusters, axis=0, return_inverse=True)
+            weights = np.bincount(pair_inverse.ravel(), weights=weights, minlength=len(unique_pairs)).astype(np.int64)
+            result = [
+                {
+                    "cityA": self.names[representatives[a]],
+                    "cityB": self.names[representatives[b]],
+                    "weight": int(w),
+                    "coordsA": {"lat": float(center_lat[a]), "lon": float(center_lon[a])},
+                    "coordsB": {"lat": float(center_lat[b]), "lon": float(center_lon[b])},
+                }
+                for (a, b), w in zip(unique_pairs, weights)
+            ]
+        else:
+            result = [
+                {
+                    "cityA": self.names[a],
+                    "cityB": self.names[b],
+                    "weight": int(w),
+                    "coordsA": {"lat": float(self.lat[a]), "lon": float(self.lon[a])},
+                    "coordsB": {"lat": float(self.lat[b]), "lon": float(self.lon[b])},
+                }
+                for (a, b), w in zip(pairs, weights)
+            ]
+        result.sort(key=lambda link: -link["weight"])
+        return result
+
+
+def load_geo_index() -> GeoIndex:
+    with DatabaseService("new_data") as cur:
+        cur.execute(
+            """
+            SELECT trim(settlement), "latitude(dd)", "longitude(dd)"
+            FROM coordinate_data
+            WHERE settlement IS NOT NULL AND "latitude(dd)" IS NOT NULL AND "longitude(dd)" IS NOT NULL
+            """
+        )
+        rows = cur.fetchall()
+    index = GeoIndex([row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows])
+    logging.info("Geo index loaded: %d settlements", len(index))
+    return index
+
+
+# coordinate_data — справочник, который меняется вручную и редко
+geo_index: Snapshot[GeoIndex] = Snapshot(load_geo_index, ttl=3600.0)
@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+
+# Размер области координат, которую получает клиент
+LAYOUT_SIZE = 1000.0
+# Отталкивание считается от случайной выборки узлов: не больше REPULSION_SAMPLE
+# и не больше PAIR_BUDGET пар узлов на итерацию
+REPULSION_SAMPLE = 1000
+PAIR_BUDGET = 2_000_000
+MAX_ITERATIONS = 300
+BLOCK_SIZE = 2000
+GRAVITY = 0.05
+
+
+def force_layout(
+    n_nodes: int,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    weights: np.ndarray | None = None,
+    time_budget: float = 1.0,
+    seed: int = 42,
+) -> np.ndarray:
+    """Раскладка графа методом Фрюхтермана — Рейнгольда
+
+    Итерация считается векторно: отталкивание всех узлов от всех (или от
+    случайной выборки из REPULSION_SAMPLE узлов для больших графов, с
+    поправкой на ее долю), притяжение — по списку ребер. Число итераций
+    подбирается под time_budget по длительности первой итерации; слабая
+    гравитация к центру не дает компонентам связности разлетаться.
+
+    Args:
+        n_nodes: Число узлов
+        sources, targets: Позиции концов ребер
+        weights: Веса ребер. Притяжение растет как log(1 + вес), отрицательные веса считаются нулевыми
+        time_budget: Ограничение по времени в секундах
+
+    Returns:
+        Координаты узлов (n_nodes x 2) в квадрате [0, LAYOUT_SIZE]
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-0.5, 0.5, size=(n_nodes, 2))
+    if n_nodes <= 1:
+        return np.full((n_nodes, 2), LAYOUT_SIZE / 2)
+
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    # Отрицательные веса (PMI, NPMI) не притягивают: log1p(вес < -1) — NaN во всех координатах
+    strength = (
+        np.log1p(np.clip(np.asarray(weights, dtype=np.float64), 0, None))
+        if weights is not None
+        else np.ones(len(sources))
+    )
+    strength = strength / max(float(strength.mean()), 1e-9) if len(strength) else strength
+
+    k = 1.0 / np.sqrt(n_nodes)
+    sample_size = min(n_nodes, REPULSION_SAMPLE, max(16, PAIR_BUDGET // n_nodes))
+    scale = n_nodes / sample_size
+
+    started = time.perf_counter()
+    iterations = MAX_ITERATIONS
+    temperature = 0.1
+    for iteration in range(MAX_ITERATIONS):
+        if iteration >= iterations:
+            break
+
+        sample = rng.choice(n_nodes, sample_size, replace=False) if sample_size < n_nodes else np.arange(n_nodes)
+        displacement = np.empty_like(positions)
+        for first in range(0, n_nodes, BLOCK_SIZE):
+            delta = positions[first : first + BLOCK_SIZE, None, :] - positions[None, sample, :]
+            distance_sq = np.maximum((delta**2).sum(axis=2), 1e-6)
+            displacement[first : first + BLOCK_SIZE] = scale * (delta * (k * k / distance_sq)[:, :, None]).sum(axis=1)
+
+        if len(sources):
+            edge_delta = positions[sources] - positions[targets]
+            edge_distance = np.sqrt(np.maximum((edge_delta**2).sum(axis=1), 1e-12))
+            pull = edge_delta * (edge_distance * strength / k)[:, None]
+            for axis in range(2):
+                displacement[:, axis] += np.bincount(targets, pull[:, axis], n_nodes)
+                displacement[:, axis] -= np.bincount(sources, pull[:, axis], n_nodes)
+
+        displacement -= GRAVITY * positions * n_nodes * k
+
+        length = np.sqrt(np.maximum((displacement**2).sum(axis=1), 1e-12))
+        step = temperature * (1 - iteration / iterations)
+        positions += displacement * (np.minimum(length, step) / length)[:, None]
+
+        if iteration == 0:
+            elapsed = time.perf_counter() - started
+            iterations = int(min(MAX_ITERATIONS, max(1, time_budget / max(elapsed, 1e-6))))
+
+    low = positions.min(axis=0)
+    span = np.maximum(positions.max(axis=0) - low, 1e-9)
+    return (positions - low) / span.max() * LAYOUT_SIZE
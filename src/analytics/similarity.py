@@ -0,0 +1,110 @@
+import io
+import logging
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import scipy.sparse as sp
+
+# Сколько ближайших авторов хранится для каждого автора
+TOP_K = 20
+# Ключевые слова, которые встречаются у большей доли авторов, не различают тематики
+MAX_DOCUMENT_FREQUENCY = 0.2
+BLOCK_SIZE = 1000
+
+
+def tfidf_matrix(authors: np.ndarray, keywords: np.ndarray, counts: np.ndarray) -> tuple[sp.csr_matrix, np.ndarray]:
+    """Разреженная TF-IDF матрица автор x ключевое слово с L2-нормализацией строк
+
+    Args:
+        authors, keywords, counts: Сколько публикаций автора содержат ключевое слово
+
+    Returns:
+        (матрица, authorid по строкам)
+    """
+    author_codes, author_ids = pd.factorize(authors, sort=True)
+    keyword_codes, vocabulary = pd.factorize(keywords)
+    n_authors = len(author_ids)
+
+    tf = sp.csr_matrix(
+        (np.log1p(counts.astype(np.float64)), (author_codes, keyword_codes)),
+        shape=(n_authors, len(vocabulary)),
+    )
+    document_frequency = np.bincount(keyword_codes, minlength=len(vocabulary))
+    # Слово, которое есть только у одного автора, не дает ни одной пары
+    informative = (document_frequency >= 2) & (document_frequency <= MAX_DOCUMENT_FREQUENCY * n_authors)
+    idf = np.where(informative, np.log(n_authors / np.maximum(document_frequency, 1)), 0.0)
+
+    matrix = (tf @ sp.diags(idf)).tocsr()
+    matrix.eliminate_zeros()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    matrix = (sp.diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)) @ matrix).tocsr()
+    return matrix, np.asarray(author_ids)
+
+
+def top_k_neighbours(block: sp.csr_matrix, matrix_t: sp.csc_matrix, first_row: int, k: int) -> tuple[np.ndarray, ...]:
+    """Top-k по косинусной близости для блока строк
+
+    Returns:
+        (строка, сосед, близость, ранг) — позиции строк в исходной матрице
+    """
+    scores = (block @ matrix_t).tocsr()
+    rows = np.repeat(np.arange(scores.shape[0]), np.diff(scores.indptr)) + first_row
+    cols = scores.indices
+    values = scores.data
+
+    keep = (cols != rows) & (values > 0)
+    rows, cols, values = rows[keep], cols[keep], values[keep]
+
+    # Внутри каждой строки — по убыванию близости
+    order = np.lexsort((-values, rows))
+    rows, cols, values = rows[order], cols[order], values[order]
+    starts = np.searchsorted(rows, rows, side="left")
+    rank = np.arange(len(rows)) - starts
+    keep = rank < k
+    return rows[keep], cols[keep], values[keep], rank[keep] + 1
+
+
+def refresh_author_similarity(cur: psycopg2.extensions.cursor) -> None:
+    """Пересчитывает таблицу author_similarity (ближайшие авторы по тематике)"""
+    cur.execute(
+        """
+        SELECT a.authorid, lower(trim(k.keyword)), COUNT(DISTINCT a.itemid)
+        FROM authors a
+                JOIN keywords k ON k.itemid = a.itemid
+        WHERE a.authorid IS NOT NULL
+          AND k.keyword IS NOT NULL
+          AND trim(k.keyword) <> ''
+        GROUP BY a.authorid, lower(trim(k.keyword))
+        """
+    )
+    rows = cur.fetchall()
+    if not rows:
+        cur.execute("DELETE FROM author_similarity")
+        return
+
+    authors, keywords, counts = (np.array(column) for column in zip(*rows))
+    del rows
+    matrix, author_ids = tfidf_matrix(authors.astype(np.int64), keywords.astype(object), counts.astype(np.int64))
+    matrix_t = matrix.T.tocsc()
+    logging.info("Author TF-IDF matrix: %d authors x %d keywords, %d nnz", *matrix.shape, matrix.nnz)
+
+    cur.execute("DELETE FROM author_similarity")
+    for start in range(0, matrix.shape[0], BLOCK_SIZE):
+        block_rows, neighbours, scores, ranks = top_k_neighbours(
+            matrix[start : start + BLOCK_SIZE], matrix_t, start, TOP_K
+        )
+        buffer = io.StringIO()
+        pd.DataFrame(
+            {
+                "authorid": author_ids[block_rows],
+                "similar_authorid": author_ids[neighbours],
+                "score": np.round(scores, 6),
+                "rank": ranks,
+            }
+        ).to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cur.copy_expert(
+            "COPY author_similarity (authorid, similar_authorid, score, rank) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
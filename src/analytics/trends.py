@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+from ..utils.database import fetch_array
+
+# Последние годы периода, с которыми сравнивается остальной период в оценке «набирающих» слов
+RECENT_YEARS = 2
+
+
+@dataclass
+class KeywordTrends:
+    keywords: np.ndarray  # id из dim_keywords
+    years: np.ndarray
+    matrix: np.ndarray  # ключевое слово x год: число публикаций
+    total: np.ndarray
+    growth: np.ndarray  # изменение за последний год периода
+    cagr: np.ndarray  # среднегодовой темп роста за период
+    emerging: np.ndarray  # рост доли слова в последние RECENT_YEARS лет
+
+    def order(self, score: np.ndarray, n: int, descending: bool = True) -> np.ndarray:
+        """Позиции n ключевых слов с наибольшим (наименьшим) значением показателя"""
+        return np.argsort(-score if descending else score, kind="stable")[:n]
+
+    def describe(self, positions: np.ndarray, labels: dict[int, str]) -> list[dict]:
+        return [
+            {
+                "keyword": labels.get(int(self.keywords[i])),
+                "total": int(self.total[i]),
+                "growth": round(float(self.growth[i]), 4),
+                "cagr": round(float(self.cagr[i]), 4),
+                "emerging_score": round(float(self.emerging[i]), 4),
+                "series": self.matrix[i].astype(int).tolist(),
+            }
+            for i in positions
+        ]
+
+
+def keyword_trends(
+    keywords: np.ndarray,
+    years: np.ndarray,
+    counts: np.ndarray,
+    year_from: int,
+    year_to: int,
+    min_total: int = 1,
+) -> KeywordTrends:
+    """Показатели динамики ключевых слов по плотной матрице ключевое слово x год
+
+    Темпы роста считаются со сглаживанием +1, чтобы нулевой год не давал
+    бесконечностей. Оценка «набирающих» слов — логарифм отношения доли слова
+    среди всех публикаций последних RECENT_YEARS лет к его доле в предыдущие
+    годы, умноженный на log(1 + число публикаций за последние годы): так рост
+    общего числа публикаций не считается ростом слова, а редкие слова не
+    попадают в начало списка из-за одного упоминания.
+    """
+    all_years = np.arange(year_from, year_to + 1)
+    codes, vocabulary = pd.factorize(keywords)
+    matrix = np.zeros((len(vocabulary), len(all_years)))
+    np.add.at(matrix, (codes, years - year_from), counts)
+
+    total = matrix.sum(axis=1)
+    keep = total >= min_total
+    matrix, total, vocabulary = matrix[keep], total[keep], np.asarray(vocabulary)[keep]
+
+    first, last = matrix[:, 0], matrix[:, -1]
+    previous = matrix[:, -2] if len(all_years) > 1 else first
+    growth = (last - previous) / (previous + 1)
+    cagr = ((last + 1) / (first + 1)) ** (1 / max(len(all_years) - 1, 1)) - 1
+
+    recent = min(RECENT_YEARS, len(all_years) - 1) or 1
+    year_totals = np.maximum(matrix.sum(axis=0), 1)
+    shares = matrix / year_totals
+    recent_share = shares[:, -recent:].mean(axis=1)
+    baseline_share = shares[:, :-recent].mean(axis=1) if len(all_years) > recent else recent_share
+    smoothing = 1 / year_totals.sum()
+    emerging = np.log((recent_share + smoothing) / (baseline_share + smoothing)) * np.log1p(matrix[:, -recent:].sum(axis=1))
+
+    return KeywordTrends(vocabulary, all_years, matrix, total, growth, cagr, emerging)
+
+
+def load_keyword_trends(
+    cur: psycopg2.extensions.cursor,
+    year_from: int,
+    year_to: int,
+    language: str | None = None,
+    min_total: int = 1,
+) -> KeywordTrends:
+    """Срез keyword_year_stats_mv за период одним запросом"""
+    query = """
+        SELECT keyword_id, year, sum(count)
+        FROM keyword_year_stats_mv
+        WHERE year BETWEEN %s AND %s
+    """
+    params: list = [year_from, year_to]
+    if language:
+        query += " AND language = %s"
+        params.append(language.upper())
+    query += " GROUP BY keyword_id, year"
+    rows = fetch_array(cur, query, params)
+    return keyword_trends(rows[:, 0], rows[:, 1], rows[:, 2].astype(np.float64), year_from, year_to, min_total)
@@ -0,0 +1,90 @@
+import psycopg2
+
+from ..database.refresh import get_data_version
+from ..utils.cache import TTLCache
+
+VAK_CATEGORIES = ("К1", "К2", "К3")
+# Авторов в одном пакетном запросе
+MAX_BATCH_AUTHORS = 2000
+
+# Статистика автора (None — по всем авторам) по ключу (версия vak_statistics_mv, автор, date_from, date_to, issn).
+# Версия в ключе: после refresh-mv старые записи больше не находятся и вытесняются
+_stats_cache: TTLCache[dict[str, dict[str, int]]] = TTLCache(maxsize=20000, ttl=3600.0)
+
+_PIVOT = ",\n".join(
+    f"COUNT(DISTINCT itemid) FILTER (WHERE category = '{category}')" for category in VAK_CATEGORIES
+)
+
+
+def _query_statistics(
+    cur: psycopg2.extensions.cursor,
+    author_ids: list[int] | None,
+    date_from: str | None,
+    date_to: str | None,
+    issn: str | None,
+) -> dict[int | None, dict[str, dict[str, int]]]:
+    """Категории ВАК по специальностям: один проход по vak_statistics_mv для всех авторов"""
+    author_column = "authorid" if author_ids is not None else "NULL::int"
+    query = f"""
+        SELECT {author_column}, scientificspecialties,
+               {_PIVOT}
+        FROM vak_statistics_mv
+        WHERE TRUE
+    """
+    params: list = []
+    if author_ids is not None:
+        query += " AND authorid = ANY(%s)"
+        params.append(author_ids)
+    if date_from:
+        query += " AND date_start >= %s"
+        params.append(date_from)
+    if date_to:
+        query += " AND (date_end IS NULL OR date_end <= %s)"
+        params.append(date_to)
+    if issn:
+        query += " AND issn = %s"
+        params.append(issn)
+    query += " GROUP BY 1, 2 ORDER BY 1, 2"
+
+    cur.execute(query, params)
+    result: dict[int | None, dict[str, dict[str, int]]] = {}
+    for author_id, specialty, *counts in cur.fetchall():
+        result.setdefault(author_id, {})[specialty] = dict(zip(VAK_CATEGORIES, counts))
+    return result
+
+
+def vak_statistics(
+    cur: psycopg2.extensions.cursor,
+    author_ids: list[int] | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    issn: str | None = None,
+) -> dict[int | None, dict[str, dict[str, int]]]:
+    """Число публикаций по специальностям и категориям К1–К3 для каждого автора
+
+    Без author_ids — по всем авторам сразу (ключ None). Статистика кэшируется
+    по автору; из базы одним запросом берутся только авторы, которых нет в кэше.
+
+    Returns:
+        authorid -> специальность -> {"К1": n, "К2": n, "К3": n}
+    """
+    version = get_data_version(cur, ["vak_statistics_mv"])
+    authors = [None] if author_ids is None else list(dict.fromkeys(author_ids))
+
+    result = {}
+    missing = []
+    for author_id in authors:
+        cached = _stats_cache.get((version, author_id, date_from, date_to, issn))
+        if cached is None:
+            missing.append(author_id)
+        else:
+            result[author_id] = cached
+
+    if missing:
+        fetched = _query_statistics(cur, None if author_ids is None else missing, date_from, date_to, issn)
+        for author_id in missing:
+            statistics = fetched.get(author_id, {})
+            _stats_cache.set((version, author_id, date_from, date_to, issn), statistics)
+            result[author_id] = statistics
+
+    return {author_id: result[author_id] for author_id in authors}
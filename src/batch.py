@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from psycopg2.extensions import ISOLATION_LEVEL_REPEATABLE_READ
+from psycopg2.pool import PoolError
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+
+from .database.database import get_pool, use_connection
+
+batch_bp = Blueprint("batch", __name__, url_prefix="/api/batch")
+
+# Соединений (и потоков) на один пакет; запросы пакета распределяются между ними
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+MAX_BATCH_REQUESTS = 50
+
+# Маршруты, которые не отдают JSON или меняют состояние
+_EXCLUDED_ENDPOINTS = {
+    "login",
+    "static",
+    "site_map_route",
+    "serve",
+    "serve_all",
+    "serve_static",
+    "export_dataset",
+    "export_author_vak_excel",
+    "get_keywords_wordcloud",
+}
+_EXCLUDED_BLUEPRINTS = ("batch.", "jobs.")
+
+
+@dataclass
+class BatchItem:
+    path: str
+    params: dict
+    body: dict | None
+
+    @property
+    def method(self) -> str:
+        # Запросы графов принимают фильтр в теле POST
+        return "GET" if self.body is None else "POST"
+
+
+def parse_batch(data) -> list[BatchItem]:
+    """Проверяет список {path, params, body} и что каждый путь — разрешенный маршрут на чтение
+
+    Raises:
+        ValueError: Неверный формат или маршрут не поддерживается
+    """
+    if not isinstance(data, list) or not data:
+        raise ValueError("Request body must be a non-empty list of {path, params}")
+    if len(data) > MAX_BATCH_REQUESTS:
+        raise ValueError(f"Too many requests in batch: {len(data)} > {MAX_BATCH_REQUESTS}")
+
+    adapter = current_app.url_map.bind("")
+    items = []
+    for position, entry in enumerate(data):
+        if not isinstance(entry, dict) or not isinstance(entry.get("path"), str):
+            raise ValueError(f"Request {position}: path is required")
+        params = entry.get("params") or {}
+        body = entry.get("body")
+        if not isinstance(params, dict) or (body is not None and not isinstance(body, dict)):
+            raise ValueError(f"Request {position}: params and body must be objects")
+        if "async" in params:
+            raise ValueError(f"Request {position}: async requests are not allowed in batch")
+
+        item = BatchItem(entry["path"], params, body)
+        try:
+            endpoint, _ = adapter.match(item.path, method=item.method)
+        except (NotFound, MethodNotAllowed):
+            raise ValueError(f"Request {position}: unknown route {item.method} {item.path}") from None
+        if (
+            not item.path.startswith("/api/")
+            or endpoint in _EXCLUDED_ENDPOINTS
+            or endpoint.startswith(_EXCLUDED_BLUEPRINTS)
+            or (item.method == "POST" and not endpoint.startswith("graph."))
+        ):
+            raise ValueError(f"Request {position}: route {item.path} is not allowed in batch")
+        items.append(item)
+    return items
+
+
+def _dispatch(app, item: BatchItem, headers: dict) -> dict:
+    """Выполняет обработчик маршрута так же, как при обычном запросе"""
+    try:
+        with app.test_request_context(
+            item.path, method=item.method, query_string=item.params, json=item.body, headers=headers
+        ):
+            response = app.full_dispatch_request()
+    except Exception as e:  # pylint: disable=broad-except
+        logging.exception(e)
+        return {"status": 500, "body": {"error": str(e)}}
+
+    body = json.loads(response.get_data()) if response.is_json else None
+    return {"status": response.status_code, "body": body}
+
+
+def _acquire_connections(pool, count: int) -> list:
+    conns = []
+    while len(conns) < count:
+        try:
+            conns.append(pool.getconn())
+        except PoolError:
+            if not conns:
+                raise
+            break
+    return conns
+
+
+def execute_batch(items: list[BatchItem], headers: dict) -> list[dict]:
+    """Выполняет запросы пакета на соединениях из пула с общим снимком данных
+
+    Первое соединение экспортирует снимок (pg_export_snapshot), остальные
+    его импортируют, поэтому все ответы пакета согласованы между собой, даже
+    если между запросами обновились представления.
+    """
+    app = current_app._get_current_object()
+    pool = get_pool()
+    conns = _acquire_connections(pool, min(BATCH_WORKERS, len(items)))
+    try:
+        for conn in conns:
+            conn.set_session(isolation_level=ISOLATION_LEVEL_REPEATABLE_READ)
+        with conns[0].cursor() as cur:
+            cur.execute("SELECT pg_export_snapshot()")
+            snapshot = cur.fetchone()[0]
+        for conn in conns[1:]:
+            with conn.cursor() as cur:
+                cur.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+
+        results: list[dict] = [{} for _ in items]
+        pending = iter(range(len(items)))
+        pending_lock = threading.Lock()
+
+        def work(conn) -> None:
+            while True:
+                with pending_lock:
+                    position = next(pending, None)
+                if position is None:
+                    return
+                with use_connection(conn):
+                    results[position] = _dispatch(app, items[position], headers)
+
+        with ThreadPoolExecutor(len(conns)) as executor:
+            for future in [executor.submit(work, conn) for conn in conns]:
+                future.result()
+        return results
+    finally:
+        for conn in conns:
+            if not conn.closed:
+                conn.rollback()
+                conn.set_session(isolation_level="DEFAULT")
+            pool.putconn(conn)
+
+
+@batch_bp.route("", methods=["POST"])
+def run_batch():
+    """Несколько запросов на чтение одним HTTP-запросом
+
+    Тело: [{"path": "/api/statistics/years", "params": {...}}, ...]; для
+    маршрутов графов, принимающих POST, фильтр передается в "body".
+    Ответ: {"results": [{"status": 200, "body": ...}, ...]} в том же порядке.
+    """
+    try:
+        items = parse_batch(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    headers = {"Cookie": request.headers["Cookie"]} if "Cookie" in request.headers else {}
+    try:
+        results = execute_batch(items, headers)
+        return Response(json.dumps({"results": results}, ensure_ascii=False), mimetype="application/json; charset=utf-8")
+
+    except PoolError:
+        return jsonify({"error": "No free database connections, retry later"}), 503
+    except Exception as e:  # pylint: disable=broad-except
+        logging.exception(e)
+        return jsonify({"error": str(e)}), 500
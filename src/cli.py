@@ -0,0 +1,102 @@
+import logging
+
+import click
+
+from .database.database import get_db_connection
+from .database.ingest import INGEST_WORKERS, find_ingest_files, ingest
+from .database.refresh import resolve_steps, run_refresh
+from .database.vak_list import VAK_WORKERS, ingest_vak_list
+from .database.watermarks import reset_watermark
+
+
+@click.group()
+@click.option("--verbose", "-v", is_flag=True, help="Подробный лог")
+def cli(verbose: bool):
+    """Консольные команды обслуживания базы: python -m src.cli <команда>"""
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+@cli.command("refresh-mv")
+@click.option("--changed", multiple=True, help="Изменившаяся таблица: обновятся все зависящие от нее шаги")
+@click.option("--only", multiple=True, help="Обновить только указанный шаг (без зависимых)")
+def refresh_mv_command(changed: tuple[str, ...], only: tuple[str, ...]):
+    """Обновляет материализованные представления и производные таблицы"""
+    steps = resolve_steps(changed=changed or None, only=only or None)
+    conn = get_db_connection()
+    try:
+        durations = run_refresh(conn, steps)
+    finally:
+        conn.close()
+
+    for name, seconds in durations.items():
+        click.echo(f"{name}: {seconds:.2f}s")
+
+
+@cli.command("reset-watermark")
+@click.argument("name")
+def reset_watermark_command(name: str):
+    """Сбрасывает отметку инкрементальной загрузки: следующий refresh-mv построит NAME заново"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            reset_watermark(cur, name)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@cli.command("ingest")
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+@click.option("--workers", "-j", default=INGEST_WORKERS, show_default=True, help="Число процессов загрузки")
+@click.option(
+    "--rebuild-indexes/--keep-indexes",
+    default=None,
+    help="Перестроить индексы после загрузки (по умолчанию — если загружается большая часть таблицы)",
+)
+@click.option("--no-refresh", is_flag=True, help="Не обновлять зависящие представления")
+def ingest_command(directory: str, workers: int, rebuild_indexes: bool | None, no_refresh: bool):
+    """Загружает CSV-выгрузку eLibrary из DIRECTORY (файлы <таблица>[.<часть>].csv[.gz])"""
+    files = find_ingest_files(directory)
+    if not files:
+        raise click.ClickException(f"No ingest files found in {directory}")
+
+    conn = get_db_connection()
+    try:
+        stats = ingest(conn, files, workers=workers, rebuild_indexes=rebuild_indexes)
+        for table, table_stats in stats.items():
+            click.echo(
+                f"{table}: {table_stats.rows} rows from {table_stats.files} file(s), "
+                f"copy {table_stats.copy_seconds:.2f}s ({table_stats.rows_per_second:,.0f} rows/s), "
+                f"merge {table_stats.merge_seconds:.2f}s" + (", indexes rebuilt" if table_stats.indexes_rebuilt else "")
+            )
+
+        if not no_refresh:
+            durations = run_refresh(conn, resolve_steps(changed=stats))
+            for name, seconds in durations.items():
+                click.echo(f"{name}: {seconds:.2f}s")
+    finally:
+        conn.close()
+
+
+@cli.command("ingest-vak")
+@click.argument("pdf", type=click.Path(exists=True, dir_okay=False))
+@click.option("--workers", "-j", default=VAK_WORKERS, show_default=True, help="Число процессов разбора PDF")
+@click.option("--force", is_flag=True, help="Разобрать все страницы, даже не изменившиеся")
+@click.option("--no-refresh", is_flag=True, help="Не обновлять author_journal_vak и зависящие представления")
+def ingest_vak_command(pdf: str, workers: int, force: bool, no_refresh: bool):
+    """Загружает перечень ВАК с категориями К1–К3 (PDF) в journal_vak_data"""
+    conn = get_db_connection()
+    try:
+        result = ingest_vak_list(conn, pdf, workers=workers, force=force)
+        click.echo(f"{result['parsed_pages']} of {result['pages']} pages parsed, {result['rows']} rows loaded")
+
+        if (result["parsed_pages"] or result["removed_pages"]) and not no_refresh:
+            durations = run_refresh(conn, resolve_steps(changed=["journal_vak_data"]))
+            for name, seconds in durations.items():
+                click.echo(f"{name}: {seconds:.2f}s")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import os
+import zlib
+from typing import Callable, Iterable, Iterator
+
+from flask import Response, request
+
+from .utils.cache import TTLCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Ответы меньше этого размера (в байтах) отдаются без сжатия
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+# Сжатых тел кэшируемых ответов (Cache-Control: public) в памяти процесса
+COMPRESS_CACHE_SIZE = int(os.getenv("COMPRESS_CACHE_SIZE", "64"))
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "text/csv",
+    "text/css",
+    "text/html",
+    "text/plain",
+    "image/svg+xml",
+}
+
+# (Content-Encoding, хэш тела) -> сжатое тело
+_compressed_cache: TTLCache[bytes] = TTLCache(maxsize=COMPRESS_CACHE_SIZE, ttl=3600.0)
+
+
+def _gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        # Sync flush: клиент получает каждую порцию сразу, а не после заполнения буфера zlib
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def _zstd_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Content-Encoding -> (сжатие тела целиком, сжатие потока) в порядке предпочтения
+ENCODINGS: dict[str, tuple[Callable[[bytes], bytes], Callable[[Iterable[bytes]], Iterator[bytes]]]] = {}
+if zstandard is not None:
+    ENCODINGS["zstd"] = (lambda data: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data), _zstd_stream)
+if brotli is not None:
+    ENCODINGS["br"] = (lambda data: brotli.compress(data, quality=BROTLI_QUALITY), _brotli_stream)
+ENCODINGS["gzip"] = (lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0), _gzip_stream)
+
+
+def choose_encoding() -> str | None:
+    """Лучшее из поддерживаемых сжатий по Accept-Encoding запроса; при равном q — по порядку ENCODINGS"""
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = request.accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _compressed_body(response: Response, encoding: str) -> bytes | None:
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return None
+
+    compress = ENCODINGS[encoding][0]
+    if not response.cache_control.public:
+        return compress(data)
+
+    # Одинаковые тела (тот же ответ разным клиентам) сжимаются один раз
+    key = (encoding, hashlib.blake2b(data, digest_size=16).digest())
+    compressed = _compressed_cache.get(key)
+    if compressed is None:
+        compressed = compress(data)
+        _compressed_cache.set(key, compressed)
+    return compressed
+
+
+def _compressed_stream(source: Iterable, chunks: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+    try:
+        yield from ENCODINGS[encoding][1](chunks)
+    finally:
+        # Закрытие исходного потока (например, отмена COPY в выгрузках) при обрыве соединения
+        if hasattr(source, "close"):
+            source.close()
+
+
+def compress_response(response: Response) -> Response:
+    """after_request: сжатие gzip (brotli, zstd — если установлены) по Accept-Encoding клиента
+
+    Потоковые ответы (генераторы, файлы) сжимаются по мере отдачи порций.
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add("Accept-Encoding")
+    if response.status_code != 200 or "Content-Encoding" in response.headers:
+        return response
+
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed or response.direct_passthrough:
+        if response.content_length is not None and response.content_length < COMPRESS_MIN_SIZE:
+            return response
+        response.response = _compressed_stream(response.response, response.iter_encoded(), encoding)
+        response.direct_passthrough = False
+        response.headers.pop("Content-Length", None)
+        # Диапазоны байтов относились к несжатому файлу
+        response.headers.pop("Accept-Ranges", None)
+    else:
+        compressed = _compressed_body(response, encoding)
+        if compressed is None:
+            return response
+        response.set_data(compressed)
+
+    # Сжатое представление не совпадает побайтно с исходным
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import os
+
+from flask import Response, g, request
+
+from .analytics.cube import CUBE_SOURCES
+from .database.versions import DataVersion, data_version
+
+# Cache-Control для ответов с версией данных: браузер переспрашивает сервер через
+# CACHE_MAX_AGE секунд, общий кэш (CDN, reverse proxy) хранит ответ CACHE_S_MAXAGE секунд
+CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", "60"))
+CACHE_S_MAXAGE = int(os.getenv("CACHE_S_MAXAGE", "300"))
+CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("CACHE_STALE_WHILE_REVALIDATE", "60"))
+
+_MAP_SOURCES = ("city_publications_mv", "city_aliases", "keywords", *CUBE_SOURCES)
+_ORGANIZATION_TABLE_SOURCES = ("elibrary_organizations", "affiliations", "authors", "items", "journals")
+
+# Маршрут -> таблицы и представления, из которых строится ответ. Для исходных
+# таблиц версия — время обновления построенных из них шагов (как в get_data_version).
+# Облако слов проверяет свой ETag само, выгрузки и задачи не кэшируются
+ROUTE_SOURCES: dict[str, tuple[str, ...]] = {
+    "get_references": (
+        "ref_typecode_mv",
+        "ref_genreid_mv",
+        "ref_language_mv",
+        "ref_status_mv",
+        "ref_affiliation_countries_mv",
+        "ref_towns_mv",
+        "ref_org_countries_mv",
+    ),
+    "get_authors": ("authors",),
+    "get_items": ("items", "keywords"),
+    "get_affiliations": ("affiliations",),
+    "get_organizations": ("elibrary_organizations",),
+    "get_authors_by_city": ("authors_by_city_full_mv", "author_names", "city_aliases"),
+    "get_top_authors": ("author_centrality", "author_names"),
+    "get_similar_authors": ("author_similarity", "author_names"),
+    "get_author_distribution_by_city": ("authors_by_city_mv", "city_publications_mv", "dim_cities", "keywords"),
+    "get_city_connections": _MAP_SOURCES,
+    "get_city_publications_map": _MAP_SOURCES,
+    "get_city_organizations": ("city_organization_items_mv", "dim_organizations", *_MAP_SOURCES),
+    "get_publications_by_year": ("publication_year_counts",),
+    "get_keywords_statistics": ("keyword_year_stats_mv", "dim_keywords"),
+    "get_keywords_trends": ("keyword_year_stats_mv", "dim_keywords"),
+    "get_available_years": ("keyword_year_stats_mv",),
+    "get_all_keywords": ("all_keywords_mv",),
+    "get_vak_statistics_by_category": ("vak_statistics_mv",),
+    "get_vak_statistics_batch": ("vak_statistics_mv", "author_journal_vak", "authors", "affiliations"),
+    "get_journals_reference": ("journals_reference_mv",),
+    "get_keywords": ("keywords",),
+    "get_top_organizations_by_keyword": (
+        "organization_keyword_items_mv",
+        "dim_keywords",
+        "dim_organizations",
+        *CUBE_SOURCES,
+    ),
+    "get_popular_organizations": ("popular_organizations_mv",),
+    "get_popular_keywords": ("popular_keywords_mv",),
+    "get_top_keywords_by_organization": ("organization_keyword_items_mv", "dim_keywords", *CUBE_SOURCES),
+    "graph.authors.get_authors_path": ("authors", "items", "journals", "author_names"),
+    "graph.organizations.get_author_table_nodes": _ORGANIZATION_TABLE_SOURCES,
+    "graph.organizations.get_author_table_links": _ORGANIZATION_TABLE_SOURCES,
+    "graph.graph_filters.get_authors_filter": ("author_names",),
+    "graph.graph_filters.get_cited_authors": ("author_citations_view", "author_names"),
+    "graph.graph_filters.get_citing_authors": ("author_citations_view", "author_names"),
+    "graph.graph_filters.get_organizations_filter": ("elibrary_organizations",),
+    "graph.graph_filters.get_keywords_filter": ("keywords",),
+    "graph.graph_filters.get_cities_filter": ("affiliations",),
+}
+
+
+def route_etag(version: DataVersion) -> str:
+    """ETag ответа: маршрут, его параметры и версия данных"""
+    payload = json.dumps(
+        [
+            request.endpoint,
+            request.view_args,
+            sorted(request.args.items(multi=True)),
+            version.refreshed_at.isoformat(),
+        ],
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _set_cache_headers(response: Response, version: DataVersion, etag: str | None) -> None:
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    response.cache_control.s_maxage = CACHE_S_MAXAGE
+    response.cache_control.stale_while_revalidate = CACHE_STALE_WHILE_REVALIDATE
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+        response.last_modified = version.refreshed_at
+
+
+def check_not_modified() -> Response | None:
+    """before_request: 304, если у клиента ответ той же версии данных
+
+    Версия берется из журнала обновлений в памяти процесса, поэтому ответ 304
+    отдается без обращения к базе. Сразу после обновления (пока снимки в памяти
+    могут быть старыми, см. VERSION_SETTLE_SECONDS) ETag не выдается и не проверяется.
+    """
+    sources = ROUTE_SOURCES.get(request.endpoint or "")
+    if sources is None or request.method not in ("GET", "HEAD"):
+        return None
+    try:
+        version = data_version(sources)
+    except Exception as e:  # pylint: disable=broad-except
+        logging.warning("Data version is unavailable: %s", e)
+        return None
+    if version is None:
+        return None
+
+    g.data_version = version
+    g.etag = route_etag(version) if version.settled else None
+    if g.etag is None:
+        return None
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(g.etag)
+    else:
+        # Last-Modified передается с точностью до секунды
+        since = request.if_modified_since
+        not_modified = since is not None and version.refreshed_at.replace(microsecond=0) <= since
+    if not not_modified:
+        return None
+
+    response = Response(status=304)
+    _set_cache_headers(response, version, g.etag)
+    return response
+
+
+def add_cache_headers(response: Response) -> Response:
+    """after_request: ETag, Last-Modified и Cache-Control для успешных ответов с версией данных"""
+    version = g.get("data_version")
+    if version is not None and response.status_code == 200:
+        _set_cache_headers(response, version, g.get("etag"))
+    return response
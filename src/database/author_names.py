@@ -0,0 +1,93 @@
+import logging
+
+import psycopg2
+
+from .watermarks import get_watermark, set_watermark
+
+WATERMARK = "author_names"
+
+# Имена собираются за один проход по строкам authors: полное имя с приоритетом
+# языка (RU, EN, остальные) и самое длинное, краткое «Фамилия И.О.», все краткие
+# варианты и ключ поиска по всем вариантам полного имени
+_BUILD_QUERY = """
+    WITH variants AS (
+        SELECT a.authorid,
+               initcap(COALESCE(a.lastname, '') || ' ' || COALESCE(a.initials, '')) AS full_name,
+               initcap(COALESCE(a.lastname, '') || ' ' || COALESCE(w.letters, ''))  AS short_name,
+               CASE
+                   WHEN a.language = 'RU' THEN 0
+                   WHEN a.language = 'EN' THEN 1
+                   ELSE 2
+                   END                                                             AS lang_priority
+        FROM authors a
+                LEFT JOIN LATERAL (
+                    SELECT string_agg(left(word, 1) || '.', '' ORDER BY ord) AS letters
+                    FROM regexp_split_to_table(COALESCE(a.initials, ''), '[.[:space:]]+') WITH ORDINALITY AS s(word, ord)
+                    WHERE word <> ''
+                ) w ON TRUE
+        WHERE a.authorid IS NOT NULL
+          {scope}
+    ),
+    best AS (
+        SELECT DISTINCT ON (authorid) authorid, full_name, short_name
+        FROM variants
+        ORDER BY authorid, lang_priority, length(full_name) DESC
+    ),
+    short_names AS (
+        SELECT authorid, array_agg(short_name ORDER BY priority, short_name) AS name_variants
+        FROM (SELECT authorid, short_name, min(lang_priority) AS priority
+              FROM variants
+              GROUP BY authorid, short_name) s
+        GROUP BY authorid
+    ),
+    search AS (
+        SELECT authorid, author_search_key(string_agg(DISTINCT full_name, ' ')) AS search_key
+        FROM variants
+        GROUP BY authorid
+    )
+    INSERT INTO author_names (authorid, display_name, short_name, name_variants, search_key)
+    SELECT b.authorid, b.full_name, b.short_name, sn.name_variants, s.search_key
+    FROM best b
+            JOIN short_names sn ON sn.authorid = b.authorid
+            JOIN search s ON s.authorid = b.authorid
+    {conflict}
+"""
+
+
+def refresh_author_names(cur: psycopg2.extensions.cursor) -> None:
+    """Обновляет таблицу author_names
+
+    Пересчитываются только авторы публикаций, загруженных после отметки
+    etl_watermarks. Без отметки (первый запуск или reset_watermark) таблица
+    строится заново.
+    """
+    watermark = get_watermark(cur, WATERMARK)
+    cur.execute("SELECT max(dateinstall) FROM items")
+    latest = cur.fetchone()[0]
+
+    if watermark is None:
+        cur.execute("TRUNCATE author_names")
+        cur.execute(_BUILD_QUERY.format(scope="", conflict=""))
+        logging.info("author_names rebuilt: %d authors", cur.rowcount)
+    else:
+        cur.execute(
+            _BUILD_QUERY.format(
+                scope="""
+                    AND a.authorid IN (SELECT au.authorid
+                                       FROM authors au
+                                               JOIN items i ON i.itemid = au.itemid
+                                       WHERE i.dateinstall > %s)
+                """,
+                conflict="""
+                    ON CONFLICT (authorid) DO UPDATE
+                        SET display_name  = excluded.display_name,
+                            short_name    = excluded.short_name,
+                            name_variants = excluded.name_variants,
+                            search_key    = excluded.search_key
+                """,
+            ),
+            (watermark,),
+        )
+        logging.info("author_names updated since %s: %d authors", watermark, cur.rowcount)
+
+    set_watermark(cur, WATERMARK, latest or watermark)
@@ -0,0 +1,191 @@
+import io
+import logging
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+from ..analytics.geo import normalize_settlement, trigram_matrix, trigrams
+
+# Порог близости по триграммам, с которого название считается написанием населенного пункта
+SIMILARITY_THRESHOLD = 0.5
+# Насколько лучший по близости населенный пункт должен опережать второй, чтобы выбор был однозначным
+MATCH_MARGIN = 0.1
+BLOCK_SIZE = 2000
+
+# Латинские написания, которые не находятся ни транслитерацией, ни по триграммам
+SEED_ALIASES = {
+    "moscow": "Москва",
+    "moskva": "Москва",
+    "saint petersburg": "Санкт-Петербург",
+    "st petersburg": "Санкт-Петербург",
+    "spb": "Санкт-Петербург",
+    "nizhny novgorod": "Нижний Новгород",
+    "nizhniy novgorod": "Нижний Новгород",
+    "rostov on don": "Ростов-на-Дону",
+    "mytishi": "Мытищи",
+    "orel": "Орёл",
+}
+
+# Части после запятой вроде «Moscow, Russia» или «Томск, РФ»
+_COUNTRIES = {"russia", "russian federation", "россия", "рф", "российская федерация"}
+
+# Транслитерация латиницы: сначала буквосочетания, затем отдельные буквы
+_TRANSLIT = [
+    ("shch", "щ"), ("sch", "щ"), ("zh", "ж"), ("kh", "х"), ("ts", "ц"), ("ch", "ч"), ("sh", "ш"),
+    ("yu", "ю"), ("ya", "я"), ("yo", "е"), ("ye", "е"), ("iy", "ий"), ("yy", "ый"),
+    ("a", "а"), ("b", "б"), ("v", "в"), ("g", "г"), ("d", "д"), ("e", "е"), ("z", "з"), ("i", "и"),
+    ("y", "ы"), ("k", "к"), ("l", "л"), ("m", "м"), ("n", "н"), ("o", "о"), ("p", "п"), ("r", "р"),
+    ("s", "с"), ("t", "т"), ("u", "у"), ("f", "ф"), ("h", "х"), ("c", "к"), ("w", "в"), ("x", "кс"),
+    ("j", "й"), ("q", "к"),
+]
+
+
+def transliterate(key: str) -> str:
+    for latin, cyrillic in _TRANSLIT:
+        key = key.replace(latin, cyrillic)
+    return key
+
+
+def candidate_keys(town: str) -> list[str]:
+    """Варианты ключа названия: части до и после запятых без названий страны, для латиницы — и транслитерация"""
+    keys = []
+    for part in town.split(","):
+        key = normalize_settlement(part)
+        if not key or key in _COUNTRIES:
+            continue
+        keys.append(key)
+        if key.isascii():
+            keys.append(transliterate(key))
+    return list(dict.fromkeys(keys))
+
+
+def best_matches(keys: list[str], settlement_keys: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Самый похожий по триграммам (коэффициент Жаккара) населенный пункт для каждого ключа
+
+    Если второй по близости населенный пункт отстает от лучшего меньше чем на
+    MATCH_MARGIN («новгород» — Нижний 0.6 и Великий 0.53), ключ считается
+    ненайденным: выбор между ними был бы случайным и объединил бы разные города.
+
+    Args:
+        settlement_keys: Ключи населенных пунктов без повторов
+
+    Returns:
+        (позиция населенного пункта или -1, близость)
+    """
+    vocabulary: dict[str, int] = {}
+    settlements = trigram_matrix(settlement_keys, vocabulary)
+    settlements_t = settlements.T.tocsc()
+    settlement_sizes = np.asarray(settlements.sum(axis=1)).ravel()
+    queries = trigram_matrix(keys, vocabulary, extend=False)
+    query_sizes = np.array([len(trigrams(key)) for key in keys], dtype=np.float64)
+
+    positions = np.full(len(keys), -1, dtype=np.int64)
+    scores = np.zeros(len(keys))
+    for start in range(0, len(keys), BLOCK_SIZE):
+        overlap = (queries[start : start + BLOCK_SIZE] @ settlements_t).tocoo()
+        rows, cols = overlap.row, overlap.col
+        similarity = overlap.data / (query_sizes[start + rows] + settlement_sizes[cols] - overlap.data)
+        # Внутри строки — по убыванию близости
+        order = np.lexsort((cols, -similarity, rows))
+        rows, cols, similarity = rows[order], cols[order], similarity[order]
+        first = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.empty(0, dtype=np.int64)
+        second = np.minimum(first + 1, len(rows) - 1)
+        ambiguous = (
+            (second != first)
+            & (rows[second] == rows[first])
+            & (similarity[first] - similarity[second] < MATCH_MARGIN)
+        )
+        positions[start + rows[first]] = np.where(ambiguous, -1, cols[first])
+        scores[start + rows[first]] = similarity[first]
+    return positions, scores
+
+
+def canonical_cities(towns: list[str], settlements: list[str]) -> pd.DataFrame:
+    """Каноническое название для каждого написания города
+
+    Порядок: SEED_ALIASES, точное совпадение ключа с населенным пунктом
+    coordinate_data (в том числе после транслитерации), самый похожий по
+    триграммам населенный пункт. Ненайденные названия становятся
+    каноническими сами (с заглавных букв), так что одинаковые после
+    нормализации написания все равно объединяются.
+
+    Returns:
+        DataFrame (alias, city, score, method)
+    """
+    by_key: dict[str, str] = {}
+    for name in settlements:
+        key = normalize_settlement(name)
+        if key:
+            by_key.setdefault(key, name)
+    settlement_keys = list(by_key)
+
+    rows = []
+    fuzzy = []
+    for town in towns:
+        keys = candidate_keys(town)
+        if not keys:
+            continue
+        match = next(
+            (
+                (by_key.get(normalize_settlement(SEED_ALIASES[key]), SEED_ALIASES[key]), "seed")
+                for key in keys
+                if key in SEED_ALIASES
+            ),
+            None,
+        ) or next(((by_key[key], "exact") for key in keys if key in by_key), None)
+        if match is None:
+            fuzzy.append(len(rows))
+            rows.append([town, keys[0].title(), 0.0, "unmatched"])
+        else:
+            rows.append([town, match[0], 1.0, match[1]])
+
+    # Нечеткий поиск — сразу для всех вариантов ключей всех ненайденных названий
+    owners, keys = [], []
+    for row in fuzzy:
+        for key in candidate_keys(rows[row][0]):
+            owners.append(row)
+            keys.append(key)
+    if keys:
+        positions, scores = best_matches(keys, settlement_keys)
+        for row, position, score in zip(owners, positions, scores):
+            if position >= 0 and score >= SIMILARITY_THRESHOLD and score > rows[row][2]:
+                rows[row][1:] = [by_key[settlement_keys[position]], float(score), "trigram"]
+
+    aliases = pd.DataFrame(rows, columns=["alias", "city", "score", "method"])
+    # Каноническое название — тоже написание самого себя: по нему ищут в API
+    own = pd.DataFrame({"alias": aliases["city"].str.strip().str.lower(), "city": aliases["city"]})
+    own = own.drop_duplicates("alias").assign(score=1.0, method="canonical")
+    return pd.concat([aliases, own[~own["alias"].isin(aliases["alias"])]], ignore_index=True)
+
+
+def refresh_city_aliases(cur: psycopg2.extensions.cursor) -> None:
+    """Пересчитывает city_aliases: написание города (lower(trim(town))) -> каноническое название
+
+    Строки с method = 'manual' (ручные исправления) сохраняются.
+    """
+    cur.execute("SELECT DISTINCT lower(trim(town)) FROM affiliations WHERE town IS NOT NULL AND trim(town) <> ''")
+    towns = [row[0] for row in cur.fetchall()]
+    cur.execute("SELECT DISTINCT trim(settlement) FROM coordinate_data WHERE settlement IS NOT NULL ORDER BY 1")
+    settlements = [row[0] for row in cur.fetchall() if row[0]]
+
+    aliases = canonical_cities(towns, settlements)
+    logging.info("City aliases: %s", aliases["method"].value_counts().to_dict())
+
+    cur.execute("CREATE TEMP TABLE city_aliases_staging (LIKE city_aliases) ON COMMIT DROP")
+    buffer = io.StringIO()
+    aliases.assign(score=aliases["score"].round(4)).to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert(
+        "COPY city_aliases_staging (alias, city, score, method) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+    cur.execute("DELETE FROM city_aliases WHERE method <> 'manual'")
+    cur.execute(
+        """
+        INSERT INTO city_aliases (alias, city, score, method)
+        SELECT alias, city, score, method
+        FROM city_aliases_staging
+        ON CONFLICT (alias) DO NOTHING
+        """
+    )
@@ -1,9 +1,13 @@
 import logging
 import os
-from typing import Literal
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Literal
 
 import psycopg2
 from dotenv import load_dotenv
+from psycopg2.pool import ThreadedConnectionPool
 
 load_dotenv()
 
@@ -19,13 +23,83 @@ DB_CONFIG = {
 
 SchemaType = Literal["new_data"]
 
+# Соединений в пуле на процесс (пакетные запросы, параллельные запросы обработчиков)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+
+_pool: ThreadedConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+class SharedConnection:
+    """Соединение, которое обработчики получают из get_db_connection внутри use_connection
+
+    close и commit ничего не делают, rollback откатывает к точке сохранения
+    use_connection: соединением и транзакцией владеет тот, кто его выдал.
+    """
+
+    def __init__(self, conn: psycopg2.extensions.connection):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self) -> None:
+        pass
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        with self._conn.cursor() as cur:
+            cur.execute("ROLLBACK TO SAVEPOINT shared_connection")
+
+
+_shared_connection: ContextVar[SharedConnection | None] = ContextVar("shared_connection", default=None)
+
+
+def get_shared_connection() -> SharedConnection | None:
+    """Соединение, выданное use_connection в текущем контексте"""
+    return _shared_connection.get()
+
 
 def get_db_connection(schema: SchemaType = "new_data") -> psycopg2.extensions.connection:
+    shared = _shared_connection.get()
+    if shared is not None:
+        return shared  # type: ignore[return-value]
     conn = psycopg2.connect(**DB_CONFIG, options=f"-c search_path={schema}")
     conn.set_client_encoding("UTF8")
     return conn
 
 
+def get_pool() -> ThreadedConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(
+                0, DB_POOL_SIZE, **DB_CONFIG, options="-c search_path=new_data", client_encoding="UTF8"
+            )
+        return _pool
+
+
+@contextmanager
+def use_connection(conn: psycopg2.extensions.connection) -> Iterator[None]:
+    """get_db_connection в этом контексте (и в потоке) возвращает conn
+
+    Все, что выполнено внутри, по выходе откатывается к точке сохранения:
+    ошибка в одном обработчике не прерывает транзакцию conn для следующих.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SAVEPOINT shared_connection")
+    token = _shared_connection.set(SharedConnection(conn))
+    try:
+        yield
+    finally:
+        _shared_connection.reset(token)
+        with conn.cursor() as cur:
+            cur.execute("ROLLBACK TO SAVEPOINT shared_connection")
+            cur.execute("RELEASE SAVEPOINT shared_connection")
+
+
 class DatabaseService:
     def __init__(self, schema: SchemaType = "new_data") -> None:
         self.schema: SchemaType = schema
@@ -0,0 +1,46 @@
+import psycopg2
+
+# Измерения только пополняются: id уже попавшего в них значения не меняется,
+# поэтому представления фактов и кэши клиентов остаются согласованными между обновлениями
+
+
+def refresh_dim_keywords(cur: psycopg2.extensions.cursor) -> None:
+    cur.execute(
+        """
+        INSERT INTO dim_keywords (keyword)
+        SELECT DISTINCT lower(trim(keyword))
+        FROM keywords
+        WHERE keyword IS NOT NULL AND trim(keyword) <> ''
+        ON CONFLICT (keyword) DO NOTHING
+        """
+    )
+
+
+def refresh_dim_cities(cur: psycopg2.extensions.cursor) -> None:
+    cur.execute(
+        """
+        INSERT INTO dim_cities (city)
+        SELECT DISTINCT city
+        FROM city_aliases
+        ON CONFLICT (city) DO NOTHING
+        """
+    )
+
+
+def refresh_dim_organizations(cur: psycopg2.extensions.cursor) -> None:
+    cur.execute(
+        """
+        INSERT INTO dim_organizations (id, name)
+        SELECT organizationid, min(organizationname)
+        FROM elibrary_organizations
+        WHERE organizationid IS NOT NULL AND organizationname IS NOT NULL
+        GROUP BY organizationid
+        ON CONFLICT (id) DO UPDATE SET name = excluded.name
+        """
+    )
+
+
+def keyword_labels(cur: psycopg2.extensions.cursor, ids) -> dict[int, str]:
+    """Ключевые слова по id из dim_keywords"""
+    cur.execute("SELECT id, keyword FROM dim_keywords WHERE id = ANY(%s)", ([int(i) for i in ids],))
+    return dict(cur.fetchall())
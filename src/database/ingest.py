@@ -0,0 +1,257 @@
+import csv
+import gzip
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import psycopg2
+from psycopg2 import sql
+
+from .database import get_db_connection
+
+
+@dataclass(frozen=True)
+class IngestTable:
+    """Таблица выгрузки eLibrary
+
+    Args:
+        name: Имя целевой таблицы
+        key: Колонки, по которым строки выгрузки заменяют существующие: все
+            строки целевой таблицы с тем же ключом удаляются и вставляются заново
+    """
+
+    name: str
+    key: tuple[str, ...]
+
+
+INGEST_TABLES: dict[str, IngestTable] = {
+    table.name: table
+    for table in [
+        IngestTable("items", ("itemid",)),
+        IngestTable("authors", ("itemid",)),
+        IngestTable("affiliations", ("author",)),
+        IngestTable("keywords", ("itemid",)),
+        IngestTable("journals", ("itemid",)),
+        IngestTable("abstracts", ("itemid",)),
+        IngestTable("item_codes", ("itemid",)),
+        IngestTable("reference_data", ("itemid",)),
+        IngestTable("citing_data", ("authorid",)),
+        IngestTable("elibrary_organizations", ("organizationid",)),
+    ]
+}
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+# Если выгрузка больше этой доли таблицы, индексы удаляются перед вставкой и строятся заново
+REBUILD_INDEX_FRACTION = 0.2
+
+
+@dataclass
+class IngestStats:
+    rows: int = 0
+    files: int = 0
+    copy_seconds: float = 0.0
+    merge_seconds: float = 0.0
+    indexes_rebuilt: bool = False
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.copy_seconds if self.copy_seconds else 0.0
+
+
+def _staging_name(table: str) -> str:
+    return f"ingest_{table}"
+
+
+def find_ingest_files(directory: str | Path) -> dict[str, list[Path]]:
+    """Файлы выгрузки по таблицам: <таблица>.csv, <таблица>.<часть>.csv (и то же с .gz)"""
+    files: dict[str, list[Path]] = {}
+    for path in sorted(Path(directory).iterdir()):
+        name = path.name.removesuffix(".gz")
+        if not name.endswith(".csv"):
+            continue
+        table = name.removesuffix(".csv").split(".")[0]
+        if table in INGEST_TABLES:
+            files.setdefault(table, []).append(path)
+        else:
+            logging.warning("Skipping %s: unknown table %s", path, table)
+    return files
+
+
+def _open(path: Path):
+    return gzip.open(path, "rt", encoding="utf-8", newline="") if path.suffix == ".gz" else open(path, encoding="utf-8", newline="")
+
+
+def read_header(path: Path) -> list[str]:
+    with _open(path) as file:
+        return [column.strip().lower() for column in next(csv.reader(file), [])]
+
+
+def _table_columns(cur: psycopg2.extensions.cursor, table: str) -> list[str]:
+    cur.execute(
+        """
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s
+        ORDER BY ordinal_position
+        """,
+        (table,),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def copy_file(table: str, path: str, columns: list[str]) -> tuple[str, int, float]:
+    """Загружает один файл в промежуточную таблицу через COPY FROM STDIN (выполняется в процессе пула)
+
+    Returns:
+        Таблица, число строк и длительность в секундах
+    """
+    started = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur, _open(Path(path)) as file:
+            query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, HEADER true)").format(
+                sql.Identifier(_staging_name(table)),
+                sql.SQL(", ").join(map(sql.Identifier, columns)),
+            )
+            cur.copy_expert(query, file)
+            rows = cur.rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return table, rows, time.perf_counter() - started
+
+
+def _prepare_staging(conn: psycopg2.extensions.connection, files: dict[str, list[Path]]) -> dict[str, list[str]]:
+    """Создает промежуточные UNLOGGED-таблицы и проверяет заголовки файлов
+
+    Returns:
+        Колонки каждой таблицы (из заголовка первого файла)
+    """
+    columns = {}
+    with conn.cursor() as cur:
+        for table, paths in files.items():
+            allowed = _table_columns(cur, table)
+            header = read_header(paths[0])
+            unknown = [column for column in header if column not in allowed]
+            if unknown:
+                raise ValueError(f"{paths[0]}: unknown columns of {table}: {', '.join(unknown)}")
+            missing_key = [column for column in INGEST_TABLES[table].key if column not in header]
+            if missing_key:
+                raise ValueError(f"{paths[0]}: key columns missing: {', '.join(missing_key)}")
+            for path in paths[1:]:
+                if read_header(path) != header:
+                    raise ValueError(f"{path}: header differs from {paths[0]}")
+            columns[table] = header
+
+            staging = sql.Identifier(_staging_name(table))
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(staging))
+            cur.execute(sql.SQL("CREATE UNLOGGED TABLE {} (LIKE {} INCLUDING DEFAULTS)").format(staging, sql.Identifier(table)))
+    conn.commit()
+    return columns
+
+
+def _merge_table(cur: psycopg2.extensions.cursor, table: str, columns: list[str], rebuild_indexes: bool | None) -> bool:
+    """Заменяет строки целевой таблицы строками промежуточной по ключу
+
+    Returns:
+        Перестраивались ли индексы
+    """
+    spec = INGEST_TABLES[table]
+    target, staging = sql.Identifier(table), sql.Identifier(_staging_name(table))
+    key = sql.SQL(", ").join(map(sql.Identifier, spec.key))
+
+    cur.execute(sql.SQL("ANALYZE {}").format(staging))
+    cur.execute(
+        sql.SQL("DELETE FROM {target} t USING (SELECT DISTINCT {key} FROM {staging}) s WHERE {match}").format(
+            target=target,
+            key=key,
+            staging=staging,
+            match=sql.SQL(" AND ").join(
+                sql.SQL("t.{column} = s.{column}").format(column=sql.Identifier(column)) for column in spec.key
+            ),
+        )
+    )
+
+    if rebuild_indexes is None:
+        cur.execute(sql.SQL("SELECT (SELECT count(*) FROM {}), (SELECT count(*) FROM {})").format(staging, target))
+        staged, existing = cur.fetchone()
+        rebuild_indexes = staged > REBUILD_INDEX_FRACTION * max(existing, 1)
+
+    indexes = []
+    if rebuild_indexes:
+        cur.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+            (table,),
+        )
+        indexes = cur.fetchall()
+        for name, _ in indexes:
+            cur.execute(sql.SQL("DROP INDEX {}").format(sql.Identifier(name)))
+
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+    cur.execute(
+        sql.SQL("INSERT INTO {target} ({columns}) SELECT {columns} FROM {staging}").format(
+            target=target, columns=column_list, staging=staging
+        )
+    )
+
+    for _, definition in indexes:
+        cur.execute(definition)
+    cur.execute(sql.SQL("ANALYZE {}").format(target))
+    cur.execute(sql.SQL("DROP TABLE {}").format(staging))
+    return bool(indexes)
+
+
+def ingest(
+    conn: psycopg2.extensions.connection,
+    files: dict[str, list[Path]],
+    workers: int = INGEST_WORKERS,
+    rebuild_indexes: bool | None = None,
+) -> dict[str, IngestStats]:
+    """Загружает файлы выгрузки eLibrary в таблицы new_data
+
+    Файлы параллельно копируются в промежуточные таблицы процессами пула
+    (у каждого свое соединение и свой COPY FROM STDIN), затем в одной
+    транзакции строки целевых таблиц заменяются по ключу. Промежуточные
+    таблицы остаются в базе, если загрузка прервалась, и пересоздаются при
+    следующем запуске.
+
+    Args:
+        rebuild_indexes: Удалять индексы перед вставкой и строить их после.
+            None — если выгрузка больше REBUILD_INDEX_FRACTION таблицы
+
+    Returns:
+        Статистика по каждой таблице
+    """
+    columns = _prepare_staging(conn, files)
+    stats = {table: IngestStats(files=len(paths)) for table, paths in files.items()}
+
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [
+            executor.submit(copy_file, table, str(path), columns[table]) for table, paths in files.items() for path in paths
+        ]
+        for future in as_completed(futures):
+            table, rows, seconds = future.result()
+            stats[table].rows += rows
+            # Файлы одной таблицы копируются параллельно, поэтому берется время самого долгого
+            stats[table].copy_seconds = max(stats[table].copy_seconds, seconds)
+            logging.info("Copied %d rows into %s in %.2fs", rows, _staging_name(table), seconds)
+
+    with conn.cursor() as cur:
+        try:
+            for table in INGEST_TABLES:
+                if table not in files:
+                    continue
+                started = time.perf_counter()
+                stats[table].indexes_rebuilt = _merge_table(cur, table, columns[table], rebuild_indexes)
+                stats[table].merge_seconds = time.perf_counter() - started
+                logging.info("Merged %s in %.2fs", table, stats[table].merge_seconds)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return stats
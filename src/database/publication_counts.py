@@ -0,0 +1,64 @@
+import logging
+
+import numpy as np
+import psycopg2
+
+from ..utils.cache import Snapshot
+from .database import DatabaseService
+from .refresh import get_data_version
+
+_COUNT_QUERY = """
+    INSERT INTO publication_year_counts (year, typecode, language, publications)
+    SELECT year, COALESCE(typecode, ''), COALESCE(upper(language), ''), count(*)
+    FROM items
+    WHERE year IS NOT NULL
+    GROUP BY year, COALESCE(typecode, ''), COALESCE(upper(language), '')
+"""
+
+
+def refresh_publication_year_counts(cur: psycopg2.extensions.cursor) -> None:
+    """Пересчитывает счетчики публикаций по годам, типам и языкам
+
+    Таблица перестраивается по items целиком одним GROUP BY: так счетчики
+    остаются верными, когда повторно загруженная публикация сменила год или
+    тип, и когда публикация удалена.
+    """
+    cur.execute("TRUNCATE publication_year_counts")
+    cur.execute(_COUNT_QUERY)
+    logging.info("publication_year_counts rebuilt: %d rows", cur.rowcount)
+
+
+class PublicationCounts:
+    """Счетчики publication_year_counts в памяти процесса"""
+
+    def __init__(self, rows: list[tuple[int, str, str, int]]):
+        self.years = np.array([row[0] for row in rows], dtype=np.int64)
+        self.typecodes = np.array([row[1] for row in rows], dtype=object)
+        self.languages = np.array([row[2] for row in rows], dtype=object)
+        self.publications = np.array([row[3] for row in rows], dtype=np.int64)
+
+    def by_year(
+        self, year_from: int, year_to: int, typecode: str | None = None, language: str | None = None
+    ) -> dict[int, int]:
+        mask = (self.years >= year_from) & (self.years <= year_to)
+        if typecode:
+            mask &= self.typecodes == typecode
+        if language:
+            mask &= self.languages == language.upper()
+        years, inverse = np.unique(self.years[mask], return_inverse=True)
+        totals = np.bincount(inverse, weights=self.publications[mask], minlength=len(years))
+        return {int(year): int(total) for year, total in zip(years, totals)}
+
+
+def _load_counts() -> PublicationCounts:
+    with DatabaseService("new_data") as cur:
+        cur.execute("SELECT year, typecode, language, publications FROM publication_year_counts")
+        return PublicationCounts(cur.fetchall())
+
+
+def _counts_version():
+    with DatabaseService("new_data") as cur:
+        return get_data_version(cur, ["publication_year_counts"])
+
+
+publication_counts: Snapshot[PublicationCounts] = Snapshot(_load_counts, ttl=60.0, version=_counts_version)
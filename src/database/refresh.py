@@ -0,0 +1,173 @@
+import importlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+import psycopg2
+from psycopg2 import sql
+
+
+@dataclass(frozen=True)
+class RefreshStep:
+    """Шаг обновления: материализованное представление или производная таблица
+
+    Args:
+        name: Имя представления/таблицы
+        depends_on: Таблицы и представления, из которых строится шаг
+        job: Путь к функции вида "module:function", которая пересчитывает таблицу.
+            Если не задан, выполняется REFRESH MATERIALIZED VIEW name
+    """
+
+    name: str
+    depends_on: tuple[str, ...] = ()
+    job: str | None = None
+
+
+# Шаги перечислены в топологическом порядке: зависимости всегда идут раньше
+REFRESH_STEPS: list[RefreshStep] = [
+    RefreshStep("dim_keywords", ("keywords",), job="src.database.dimensions:refresh_dim_keywords"),
+    RefreshStep(
+        "city_aliases",
+        ("affiliations", "coordinate_data"),
+        job="src.database.city_aliases:refresh_city_aliases",
+    ),
+    RefreshStep("dim_cities", ("city_aliases",), job="src.database.dimensions:refresh_dim_cities"),
+    RefreshStep(
+        "dim_organizations",
+        ("elibrary_organizations",),
+        job="src.database.dimensions:refresh_dim_organizations",
+    ),
+    RefreshStep("item_canonical", ("items", "keywords"), job="src.analytics.dedup:refresh_item_canonical"),
+    RefreshStep("author_names", ("authors", "items"), job="src.database.author_names:refresh_author_names"),
+    RefreshStep("author_citations_view", ("citing_data", "authors", "items")),
+    RefreshStep("author_journal_vak", ("authors", "items", "journals", "journal_vak_data")),
+    RefreshStep("popular_keywords_mv", ("keywords", "item_canonical")),
+    RefreshStep("journals_reference_mv", ("author_journal_vak",)),
+    RefreshStep("vak_statistics_mv", ("author_journal_vak",)),
+    RefreshStep("all_keywords_mv", ("keywords",)),
+    RefreshStep("keyword_year_stats_mv", ("keywords", "items", "dim_keywords")),
+    RefreshStep("ref_typecode_mv", ("items",)),
+    RefreshStep("ref_genreid_mv", ("items",)),
+    RefreshStep("ref_language_mv", ("authors", "items")),
+    RefreshStep("ref_status_mv", ("authors",)),
+    RefreshStep("ref_affiliation_countries_mv", ("affiliations",)),
+    RefreshStep("ref_towns_mv", ("affiliations",)),
+    RefreshStep("ref_org_countries_mv", ("elibrary_organizations",)),
+    RefreshStep("authors_by_city_full_mv", ("authors", "affiliations", "city_aliases")),
+    RefreshStep("authors_by_city_mv", ("authors", "affiliations", "city_aliases")),
+    RefreshStep("city_publications_mv", ("authors", "affiliations", "keywords", "dim_cities")),
+    RefreshStep("city_organization_items_mv", ("dim_organizations", "dim_cities", "authors", "affiliations")),
+    RefreshStep(
+        "organization_keyword_items_mv",
+        ("dim_organizations", "dim_keywords", "authors", "affiliations", "keywords"),
+    ),
+    RefreshStep(
+        "authors_items_view",
+        ("authors", "items", "journals", "affiliations", "keywords", "dim_cities", "dim_keywords"),
+    ),
+    RefreshStep("popular_organizations_mv", ("elibrary_organizations", "authors", "affiliations")),
+    RefreshStep(
+        "publication_year_counts",
+        ("items",),
+        job="src.database.publication_counts:refresh_publication_year_counts",
+    ),
+    RefreshStep(
+        "author_centrality",
+        ("author_citations_view", "authors"),
+        job="src.analytics.centrality:refresh_author_centrality",
+    ),
+    RefreshStep(
+        "author_similarity",
+        ("authors", "keywords"),
+        job="src.analytics.similarity:refresh_author_similarity",
+    ),
+]
+
+
+def resolve_steps(changed: Iterable[str] | None = None, only: Iterable[str] | None = None) -> list[RefreshStep]:
+    """Возвращает шаги обновления в порядке выполнения
+
+    Args:
+        changed: Изменившиеся таблицы/представления. Выбираются шаги, которые
+            от них зависят (в том числе транзитивно). None — все шаги
+        only: Обновить только перечисленные шаги, без зависимых
+    """
+    if only is not None:
+        names = set(only)
+        unknown = names - {step.name for step in REFRESH_STEPS}
+        if unknown:
+            raise ValueError(f"Unknown refresh steps: {', '.join(sorted(unknown))}")
+        return [step for step in REFRESH_STEPS if step.name in names]
+
+    if changed is None:
+        return list(REFRESH_STEPS)
+
+    affected = set(changed)
+    steps = []
+    for step in REFRESH_STEPS:
+        if step.name in affected or affected.intersection(step.depends_on):
+            steps.append(step)
+            affected.add(step.name)
+    return steps
+
+
+def _load_job(path: str):
+    module_name, func_name = path.split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def run_refresh(conn: psycopg2.extensions.connection, steps: list[RefreshStep]) -> dict[str, float]:
+    """Последовательно выполняет шаги, каждый в своей транзакции, и отмечает время обновления
+    в mv_refresh_log
+
+    Returns:
+        Длительность каждого шага в секундах
+    """
+    durations = {}
+    for step in steps:
+        started = time.perf_counter()
+        with conn.cursor() as cur:
+            try:
+                if step.job:
+                    _load_job(step.job)(cur)
+                else:
+                    cur.execute(sql.SQL("REFRESH MATERIALIZED VIEW {}").format(sql.Identifier(step.name)))
+
+                elapsed = time.perf_counter() - started
+                cur.execute(
+                    """
+                    INSERT INTO mv_refresh_log (name, refreshed_at, duration_ms)
+                    VALUES (%s, now(), %s)
+                    ON CONFLICT (name) DO UPDATE
+                        SET refreshed_at = excluded.refreshed_at,
+                            duration_ms  = excluded.duration_ms
+                    """,
+                    (step.name, int(elapsed * 1000)),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                logging.exception("Refresh step %s failed", step.name)
+                raise
+
+        durations[step.name] = elapsed
+        logging.info("Refreshed %s in %.2fs", step.name, elapsed)
+
+    return durations
+
+
+def get_data_version(cur: psycopg2.extensions.cursor, sources: Iterable[str]) -> str | None:
+    """Версия данных, построенных из указанных таблиц/представлений
+
+    Версия — время последнего обновления среди всех шагов, которые зависят
+    от sources (включая сами sources, если это шаги обновления). Меняется
+    после каждого refresh-mv, затронувшего эти данные.
+    """
+    names = [step.name for step in resolve_steps(changed=sources)]
+    if not names:
+        return None
+
+    cur.execute("SELECT max(refreshed_at) FROM mv_refresh_log WHERE name = ANY(%s)", (names,))
+    row = cur.fetchone()
+    return row[0].isoformat() if row and row[0] else None
@@ -0,0 +1,229 @@
+import csv
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import psycopg2
+
+VAK_WORKERS = int(os.getenv("VAK_WORKERS", "4"))
+# Страниц PDF в одной задаче пула. tabula.read_pdf вызывается для каждой страницы
+# (без jpype каждый вызов запускает JVM), пачка лишь уменьшает число задач пула
+PAGES_PER_TASK = 8
+
+VAK_COLUMNS = [
+    "number",
+    "issn",
+    "title",
+    "scientificspecialties",
+    "inclusiondate",
+    "category",
+    "date_start",
+    "date_end",
+    "source_page",
+]
+
+# Строка перечня: № п/п, название, ID, специальности, итоговая категория, дата категорирования
+_ROW_RE = re.compile(
+    r"^(?:(?P<number>\d+)\s+)?(?P<title>.*)\s+(?P<id>\d+)\s+(?P<specialties>[\d.,;\s]+?)\s+"
+    r"(?P<category>[КK]\s*[123])\s+(?P<date>\d{2}\.\d{2}\.\d{4})$",
+    re.IGNORECASE,
+)
+_HEADER_RE = re.compile(r"^(№|Название|Итоговая|категория|Дата|категорирования|Количество)", re.IGNORECASE)
+_ISSN_RE = re.compile(r"\b(\d{4})\s*-?\s*(\d{3}[\dXxХх])\b")
+_SPECIALTY_RE = re.compile(r"\d+\.\d+\.\d+")
+
+
+def normalize_issn(value: str | None) -> str | None:
+    """ISSN в виде NNNN-NNNX"""
+    match = _ISSN_RE.search(value or "")
+    if not match:
+        return None
+    return f"{match.group(1)}-{match.group(2).upper().replace('Х', 'X')}"
+
+
+def normalize_category(value: str) -> str:
+    """К1–К3 кириллицей: в PDF встречается латинская K"""
+    return "К" + re.sub(r"\D", "", value)
+
+
+def normalize_specialties(value: str) -> str:
+    """Коды специальностей через запятую; если кодов нет (в перечне 2024 года только их число) — значение как есть"""
+    codes = _SPECIALTY_RE.findall(value)
+    return ", ".join(sorted(set(codes))) if codes else re.sub(r"\s+", " ", value).strip()
+
+
+def parse_rows(lines: list[str], page: int) -> list[tuple]:
+    """Строки journal_vak_data из строк таблицы одной страницы
+
+    Длинные названия переносятся на несколько строк таблицы: строки без
+    категории и даты накапливаются и приклеиваются к следующей полной строке.
+    """
+    rows, pending = [], []
+    for line in lines:
+        line = re.sub(r"\s+", " ", line).strip()
+        if not line or _HEADER_RE.match(line):
+            continue
+        match = _ROW_RE.match(line)
+        if not match:
+            pending.append(line)
+            continue
+
+        number = match.group("number")
+        if number is None and pending and pending[0].isdigit():
+            number = pending.pop(0)
+        title = " ".join(pending + [match.group("title")]).strip()
+        pending = []
+
+        inclusion_date = match.group("date")
+        rows.append(
+            (
+                int(number) if number else None,
+                normalize_issn(title),
+                _ISSN_RE.sub("", title).strip(" ,;"),
+                normalize_specialties(match.group("specialties")),
+                inclusion_date,
+                normalize_category(match.group("category")),
+                datetime.strptime(inclusion_date, "%d.%m.%Y").date(),
+                None,
+                page,
+            )
+        )
+    if pending:
+        logging.warning("Page %d: unparsed lines %s", page, pending)
+    return rows
+
+
+def page_content(page) -> bytes:
+    """Потоки /Contents страницы PDF
+
+    page.get_contents() в pypdf 6 возвращает для страниц перечня пустой
+    объект, поэтому потоки читаются напрямую; массив потоков склеивается.
+    """
+    if "/Contents" not in page:
+        return b""
+    contents = page["/Contents"].get_object()
+    if isinstance(contents, list):
+        return b"".join(stream.get_object().get_data() for stream in contents)
+    return contents.get_data()
+
+
+def page_hashes(path: str) -> list[str]:
+    """Хэш содержимого каждой страницы PDF"""
+    from pypdf import PdfReader
+
+    return [hashlib.sha1(page_content(page)).hexdigest() for page in PdfReader(path).pages]
+
+
+def parse_pages(path: str, pages: list[int]) -> dict[int, list[tuple]]:
+    """Разбирает таблицы на страницах PDF (номера с 1); выполняется в процессе пула"""
+    import tabula
+
+    parsed = {}
+    for page in pages:
+        frames = tabula.read_pdf(path, pages=page, multiple_tables=True, lattice=True, pandas_options={"header": None})
+        lines = [
+            " ".join(str(cell) for cell in row if str(cell) not in ("", "nan"))
+            for frame in frames
+            for row in frame.itertuples(index=False)
+        ]
+        parsed[page] = parse_rows(lines, page)
+    return parsed
+
+
+def _stored_hashes(cur: psycopg2.extensions.cursor) -> dict[int, str]:
+    cur.execute("SELECT page, hash FROM journal_vak_pages")
+    return dict(cur.fetchall())
+
+
+def _copy_rows(cur: psycopg2.extensions.cursor, rows: list[tuple]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if value is None else value.isoformat() if isinstance(value, date) else value for value in row])
+    buffer.seek(0)
+    cur.copy_expert(f"COPY journal_vak_staging ({', '.join(VAK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def ingest_vak_list(
+    conn: psycopg2.extensions.connection,
+    path: str,
+    workers: int = VAK_WORKERS,
+    force: bool = False,
+) -> dict[str, int]:
+    """Загружает «Категорирование Перечня» ВАК в journal_vak_data
+
+    Страницы, хэш которых совпадает с сохраненным в journal_vak_pages,
+    пропускаются. Остальные разбираются пулом процессов пачками по
+    PAGES_PER_TASK страниц, их строки в journal_vak_data заменяются через
+    COPY. ISSN, которого нет в перечне, берется из journals по совпадению
+    нормализованного названия.
+
+    Args:
+        force: Разобрать все страницы заново
+
+    Returns:
+        Число страниц всего, разобранных и исчезнувших страниц, загруженных строк
+    """
+    hashes = page_hashes(path)
+    with conn.cursor() as cur:
+        stored = {} if force else _stored_hashes(cur)
+    changed = [page for page, digest in enumerate(hashes, start=1) if stored.get(page) != digest]
+    removed = [page for page in stored if page > len(hashes)]
+    result = {"pages": len(hashes), "parsed_pages": len(changed), "removed_pages": len(removed), "rows": 0}
+    if not changed and not removed:
+        return result
+
+    parsed: dict[int, list[tuple]] = {}
+    if changed:
+        batches = [changed[i : i + PAGES_PER_TASK] for i in range(0, len(changed), PAGES_PER_TASK)]
+        with ProcessPoolExecutor(min(workers, len(batches)), mp_context=multiprocessing.get_context("spawn")) as executor:
+            for batch in executor.map(parse_pages, [path] * len(batches), batches):
+                parsed.update(batch)
+    rows = [row for page in changed for row in parsed[page]]
+    result["rows"] = len(rows)
+
+    with conn.cursor() as cur:
+        try:
+            if not stored:
+                # Первая загрузка (или --force): строки, загруженные раньше без номера страницы, тоже заменяются
+                cur.execute("TRUNCATE journal_vak_data, journal_vak_pages")
+            else:
+                cur.execute("DELETE FROM journal_vak_data WHERE source_page = ANY(%s)", (changed + removed,))
+                cur.execute("DELETE FROM journal_vak_pages WHERE page = ANY(%s)", (changed + removed,))
+
+            cur.execute("CREATE TEMP TABLE journal_vak_staging (LIKE journal_vak_data) ON COMMIT DROP")
+            _copy_rows(cur, rows)
+            cur.execute(
+                """
+                WITH titles AS (
+                    SELECT DISTINCT ON (title_key) title_key, issn
+                    FROM (SELECT trim(lower(regexp_replace(translate(name, 'Ёё', 'Ее'), '[^[:alnum:]]+', ' ', 'g'))) AS title_key,
+                                 issn
+                          FROM journals
+                          WHERE issn IS NOT NULL AND name IS NOT NULL) j
+                    ORDER BY title_key, issn
+                )
+                UPDATE journal_vak_staging s
+                SET issn = t.issn
+                FROM titles t
+                WHERE s.issn IS NULL
+                  AND t.title_key = trim(lower(regexp_replace(translate(s.title, 'Ёё', 'Ее'), '[^[:alnum:]]+', ' ', 'g')))
+                """
+            )
+            cur.execute(f"INSERT INTO journal_vak_data ({', '.join(VAK_COLUMNS)}) SELECT {', '.join(VAK_COLUMNS)} FROM journal_vak_staging")
+            cur.executemany(
+                "INSERT INTO journal_vak_pages (page, hash, rows, loaded_at) VALUES (%s, %s, %s, now())",
+                [(page, hashes[page - 1], len(parsed[page])) for page in changed],
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    logging.info("VAK list: %d of %d pages parsed, %d rows loaded", len(changed), len(hashes), len(rows))
+    return result
@@ -0,0 +1,86 @@
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable
+
+from ..utils.cache import Snapshot
+from .database import DatabaseService
+from .refresh import resolve_steps
+
+# Журнал обновлений перечитывается не чаще раза в DATA_VERSION_TTL секунд
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "5"))
+# Столько секунд после обновления снимки в памяти (olap_cube, publication_counts)
+# еще могут отдавать старые данные: это наибольший ttl среди них
+VERSION_SETTLE_SECONDS = 300.0
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    """Версия данных маршрута
+
+    Args:
+        refreshed_at: Время последнего обновления (с часовым поясом)
+        settled: Прошло VERSION_SETTLE_SECONDS после обновления — все копии
+            данных в памяти процесса уже соответствуют этой версии
+    """
+
+    refreshed_at: datetime
+    settled: bool
+
+
+class RefreshLog:
+    """Время последнего обновления каждого шага из mv_refresh_log"""
+
+    def __init__(self, rows: list[tuple[str, datetime, float]]):
+        """
+        Args:
+            rows: (шаг, время обновления, сколько секунд прошло с обновления)
+        """
+        loaded_at = time.monotonic()
+        self._refreshed_at = {name: refreshed_at for name, refreshed_at, _ in rows}
+        self._settled_at = {
+            name: loaded_at + VERSION_SETTLE_SECONDS - float(age) for name, _, age in rows
+        }
+
+    def version(self, steps: Iterable[str]) -> DataVersion | None:
+        names = [name for name in steps if name in self._refreshed_at]
+        if not names:
+            return None
+        now = time.monotonic()
+        return DataVersion(
+            refreshed_at=max(self._refreshed_at[name] for name in names),
+            settled=all(self._settled_at[name] <= now for name in names),
+        )
+
+
+def load_refresh_log() -> RefreshLog:
+    with DatabaseService("new_data") as cur:
+        # refreshed_at записан через now() без часового пояса — в поясе сессии
+        cur.execute(
+            """
+            SELECT name,
+                   refreshed_at AT TIME ZONE current_setting('TimeZone'),
+                   extract(EPOCH FROM localtimestamp - refreshed_at)
+            FROM mv_refresh_log
+            """
+        )
+        return RefreshLog(cur.fetchall())
+
+
+refresh_log: Snapshot[RefreshLog] = Snapshot(load_refresh_log, ttl=DATA_VERSION_TTL)
+
+
+@lru_cache(maxsize=None)
+def _dependent_steps(sources: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(step.name for step in resolve_steps(changed=sources))
+
+
+def data_version(sources: Iterable[str]) -> DataVersion | None:
+    """Версия данных, построенных из sources, без запроса к базе
+
+    Как в get_data_version — последнее обновление среди шагов, которые
+    зависят от sources; журнал берется из памяти процесса (refresh_log).
+    """
+    return refresh_log.get().version(_dependent_steps(tuple(sorted(sources))))
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import psycopg2
+
+
+def get_watermark(cur: psycopg2.extensions.cursor, name: str) -> datetime | None:
+    """Отметка, до которой данные уже обработаны инкрементальной загрузкой name"""
+    cur.execute("SELECT watermark FROM etl_watermarks WHERE name = %s", (name,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def set_watermark(cur: psycopg2.extensions.cursor, name: str, watermark: datetime | None) -> None:
+    cur.execute(
+        """
+        INSERT INTO etl_watermarks (name, watermark, updated_at)
+        VALUES (%s, %s, now())
+        ON CONFLICT (name) DO UPDATE
+            SET watermark  = excluded.watermark,
+                updated_at = excluded.updated_at
+        """,
+        (name, watermark),
+    )
+
+
+def reset_watermark(cur: psycopg2.extensions.cursor, name: str) -> None:
+    """Сбрасывает отметку: следующая загрузка name будет полной"""
+    cur.execute("DELETE FROM etl_watermarks WHERE name = %s", (name,))
@@ -1,8 +1,24 @@
+import hashlib
+import json
 from dataclasses import dataclass, fields
+from typing import ClassVar
 
 
 @dataclass
 class GraphFilter:
+    # Параметры отображения: не фильтруют данные и не входят в ключ кэша графа
+    VIEW_OPTIONS: ClassVar[tuple[str, ...]] = ("layout",)
+
+    layout: bool = False  # вернуть координаты x/y узлов, рассчитанные на сервере
+
     def has_at_least_one_filter(self) -> bool:
         """Проверяет, что хотя бы одно поле не пустое"""
-        return any(bool(getattr(self, field.name)) for field in fields(self))
+        return any(
+            bool(getattr(self, field.name)) for field in fields(self) if field.name not in self.VIEW_OPTIONS
+        )
+
+    def cache_key(self) -> str:
+        """Ключ кэша графа: тип фильтра и значения всех полей, кроме параметров отображения"""
+        values = {field.name: getattr(self, field.name) for field in fields(self) if field.name not in self.VIEW_OPTIONS}
+        payload = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+        return f"{type(self).__name__}:{hashlib.sha1(payload.encode()).hexdigest()}"
@@ -0,0 +1,225 @@
+import queue
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from psycopg2 import sql
+
+from ..database.database import get_db_connection
+
+# Размер порции, которой строки COPY передаются клиенту
+CHUNK_SIZE = 256 * 1024
+# Сколько порций может ждать отправки: дальше COPY ждет медленного клиента
+QUEUE_SIZE = 16
+
+
+@dataclass(frozen=True)
+class DatasetFilter:
+    column: str
+    operator: str = "="  # "=" принимает несколько значений параметра (ANY), ">=" и "<=" — одно
+    cast: type = str
+
+
+@dataclass(frozen=True)
+class Dataset:
+    source: str
+    columns: tuple[str, ...]
+    filters: dict[str, DatasetFilter] = field(default_factory=dict)
+
+
+_YEAR_RANGE = {
+    "year_from": DatasetFilter("year", ">=", int),
+    "year_to": DatasetFilter("year", "<=", int),
+}
+
+# Только эти представления, колонки и фильтры доступны через /api/export/<dataset>.
+# Ключевые слова, города и организации в наборах фактов — id из dim_* (выгружаются отдельно)
+DATASETS: dict[str, Dataset] = {
+    "authors_items_view": Dataset(
+        "authors_items_view",
+        ("authorid", "itemid", "title", "year", "journal", "link", "affiliationid", "city_id", "keyword_id"),
+        {
+            "authorid": DatasetFilter("authorid", cast=int),
+            "itemid": DatasetFilter("itemid", cast=int),
+            "affiliationid": DatasetFilter("affiliationid", cast=int),
+            "city_id": DatasetFilter("city_id", cast=int),
+            "keyword_id": DatasetFilter("keyword_id", cast=int),
+            **_YEAR_RANGE,
+        },
+    ),
+    "keyword_year_stats_mv": Dataset(
+        "keyword_year_stats_mv",
+        ("keyword_id", "language", "year", "count"),
+        {"keyword_id": DatasetFilter("keyword_id", cast=int), "language": DatasetFilter("language"), **_YEAR_RANGE},
+    ),
+    "organization_keyword_items_mv": Dataset(
+        "organization_keyword_items_mv",
+        ("organizationid", "keyword_id", "itemid"),
+        {
+            "organizationid": DatasetFilter("organizationid", cast=int),
+            "keyword_id": DatasetFilter("keyword_id", cast=int),
+        },
+    ),
+    "dim_keywords": Dataset("dim_keywords", ("id", "keyword"), {"id": DatasetFilter("id", cast=int)}),
+    "dim_cities": Dataset("dim_cities", ("id", "city"), {"id": DatasetFilter("id", cast=int)}),
+    "city_aliases": Dataset(
+        "city_aliases",
+        ("alias", "city", "score", "method"),
+        {"city": DatasetFilter("city"), "method": DatasetFilter("method")},
+    ),
+    "dim_organizations": Dataset("dim_organizations", ("id", "name"), {"id": DatasetFilter("id", cast=int)}),
+    "popular_keywords_mv": Dataset(
+        "popular_keywords_mv",
+        ("keyword", "publications_count", "canonical_publications_count"),
+        {"keyword": DatasetFilter("keyword")},
+    ),
+    "popular_organizations_mv": Dataset(
+        "popular_organizations_mv",
+        ("id", "organization", "publications_count"),
+        {"id": DatasetFilter("id", cast=int)},
+    ),
+}
+
+
+def parse_dataset_request(dataset: Dataset, columns: list[str], args: dict[str, list[str]]) -> tuple[list[str], dict]:
+    """Проверяет выбранные колонки и фильтры по белому списку набора
+
+    Args:
+        columns: Запрошенные колонки, пусто — все
+        args: Параметры запроса (имя -> все значения); неизвестные игнорируются
+
+    Raises:
+        ValueError: Неизвестная колонка или значение фильтра неверного типа
+    """
+    unknown = [column for column in columns if column not in dataset.columns]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}. Allowed: {', '.join(dataset.columns)}")
+
+    filters = {}
+    for name, spec in dataset.filters.items():
+        values = [value for value in args.get(name, []) if value != ""]
+        if not values:
+            continue
+        try:
+            parsed = [spec.cast(value) for value in values]
+        except ValueError:
+            raise ValueError(f"Invalid {name} value")
+        filters[name] = parsed if spec.operator == "=" else parsed[0]
+    return columns or list(dataset.columns), filters
+
+
+def build_copy_query(dataset: Dataset, columns: list[str], filters: dict) -> tuple[sql.Composed, list]:
+    conditions, params = [], []
+    for name, value in filters.items():
+        spec = dataset.filters[name]
+        if spec.operator == "=":
+            conditions.append(sql.SQL("{} = ANY(%s)").format(sql.Identifier(spec.column)))
+        else:
+            conditions.append(sql.SQL("{} " + spec.operator + " %s").format(sql.Identifier(spec.column)))
+        params.append(value)
+
+    query = sql.SQL("COPY (SELECT {columns} FROM {source}{where}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(
+        columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+        source=sql.Identifier(dataset.source),
+        where=sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions) if conditions else sql.SQL(""),
+    )
+    return query, params
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _QueueWriter:
+    """Файлоподобный приемник для copy_expert: копит строки COPY в порции
+    (при необходимости сжимая gzip) и кладет их в очередь"""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event, compress: bool):
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._buffer = bytearray()
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def write(self, data) -> int:
+        self._buffer += data.encode("utf-8") if isinstance(data, str) else data
+        if len(self._buffer) >= CHUNK_SIZE:
+            self._flush()
+        return len(data)
+
+    def close(self) -> None:
+        self._flush(final=True)
+
+    def _flush(self, final: bool = False) -> None:
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        if self._compressor:
+            chunk = self._compressor.compress(chunk) + (self._compressor.flush() if final else b"")
+        if chunk:
+            self.put(chunk)
+
+    def put(self, item) -> None:
+        while True:
+            if self._cancelled.is_set():
+                raise _Cancelled()
+            try:
+                self._chunks.put(item, timeout=1.0)
+                return
+            except queue.Full:
+                continue
+
+
+_DONE = object()
+
+
+def _copy_worker(query: sql.Composed, params: list, writer: _QueueWriter, chunks: queue.Queue) -> None:
+    conn = None
+    try:
+        conn = get_db_connection()
+        with conn.cursor() as cur:
+            cur.copy_expert(cur.mogrify(query, params), writer)
+        writer.close()
+        writer.put(_DONE)
+    except _Cancelled:
+        pass
+    except Exception as e:  # pylint: disable=broad-except
+        try:
+            writer.put(e)
+        except _Cancelled:
+            pass
+    finally:
+        if conn:
+            conn.close()
+
+
+def stream_dataset(dataset: Dataset, columns: list[str], filters: dict, compress: bool = False) -> Iterator[bytes]:
+    """Поток CSV (или CSV.gz) из COPY ... TO STDOUT
+
+    COPY выполняется в отдельном потоке со своим соединением, данные идут
+    клиенту порциями через ограниченную очередь, минуя построчную
+    материализацию в Python. Ошибка до первой порции (например, нет
+    соединения с базой) поднимается сразу, а не посреди ответа.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+    cancelled = threading.Event()
+    query, params = build_copy_query(dataset, columns, filters)
+    writer = _QueueWriter(chunks, cancelled, compress)
+    threading.Thread(target=_copy_worker, args=(query, params, writer, chunks), daemon=True).start()
+
+    first = chunks.get()
+    if isinstance(first, Exception):
+        raise first
+
+    def generate() -> Iterator[bytes]:
+        item = first
+        try:
+            while item is not _DONE:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+                item = chunks.get()
+        finally:
+            # Клиент отключился или поток закончился — COPY больше не нужен
+            cancelled.set()
+
+    return generate()
@@ -0,0 +1,161 @@
+import re
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Callable
+
+import psycopg2
+from openpyxl import Workbook
+
+EXCEL_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Каждому автору — отдельный лист, поэтому число авторов в одной выгрузке ограничено
+MAX_EXPORT_AUTHORS = 500
+# Сколько строк именованный курсор забирает с сервера за раз
+FETCH_SIZE = 2000
+# Книга больше этого размера (в байтах) при отдаче из запроса уходит во временный файл
+SPOOL_SIZE = 16 * 1024 * 1024
+
+VAK_COLUMNS = [
+    "authorid",
+    "author_name",
+    "itemid",
+    "title",
+    "issn",
+    "journal_name",
+    "category",
+    "scientificspecialties",
+    "date_start",
+    "date_end",
+]
+SUMMARY_COLUMNS = ["authorid", "author_name", "publications", "journals", "К1", "К2", "К3"]
+
+_SHEET_TITLE_FORBIDDEN = re.compile(r"[\[\]:*?/\\]")
+
+
+def resolve_export_authors(
+    cur: psycopg2.extensions.cursor,
+    author_ids: list[int] | None = None,
+    organization_id: int | None = None,
+) -> list[int]:
+    """authorid для выгрузки: явный список или авторы организации, у которых есть публикации в журналах ВАК"""
+    if organization_id is not None:
+        cur.execute(
+            """
+            SELECT DISTINCT v.authorid
+            FROM author_journal_vak v
+                    JOIN authors a ON a.authorid = v.authorid
+                    JOIN affiliations aff ON aff.author = a.id
+            WHERE aff.affiliationid = %s
+            ORDER BY v.authorid
+            """,
+            (organization_id,),
+        )
+        return [row[0] for row in cur.fetchall()]
+    return sorted(set(author_ids or []))
+
+
+def _sheet_title(author_id: int, author_name: str | None, used: set[str]) -> str:
+    title = _SHEET_TITLE_FORBIDDEN.sub(" ", f"{author_name or ''} {author_id}".strip())[:31]
+    if title in used:
+        title = str(author_id)
+    used.add(title)
+    return title
+
+
+def write_vak_excel(
+    conn: psycopg2.extensions.connection,
+    author_ids: list[int],
+    output: BinaryIO,
+    progress: Callable[[float, str], None] | None = None,
+) -> int:
+    """Пишет в output книгу Excel: лист «Сводка» и по листу на каждого автора
+
+    Строки author_journal_vak читаются именованным (серверным) курсором
+    порциями по FETCH_SIZE и сразу пишутся в книгу в режиме write_only, так
+    что память не зависит от числа строк.
+
+    Returns:
+        Число выгруженных строк
+    """
+    workbook = Workbook(write_only=True)
+    summary = workbook.create_sheet("Сводка")
+    summary.append(SUMMARY_COLUMNS)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT authorid,
+                   max(author_name),
+                   COUNT(DISTINCT itemid),
+                   COUNT(DISTINCT issn),
+                   COUNT(DISTINCT itemid) FILTER (WHERE category = 'К1'),
+                   COUNT(DISTINCT itemid) FILTER (WHERE category = 'К2'),
+                   COUNT(DISTINCT itemid) FILTER (WHERE category = 'К3')
+            FROM author_journal_vak
+            WHERE authorid = ANY(%s)
+            GROUP BY authorid
+            ORDER BY authorid
+            """,
+            (author_ids,),
+        )
+        totals = cur.fetchall()
+    for row in totals:
+        summary.append(list(row))
+
+    written = 0
+    expected = sum(row[2] for row in totals) or 1
+    with conn.cursor(name="vak_excel_export") as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(
+            f"""
+            SELECT {", ".join(VAK_COLUMNS)}
+            FROM author_journal_vak
+            WHERE authorid = ANY(%s)
+            ORDER BY authorid, date_start, itemid
+            """,
+            (author_ids,),
+        )
+
+        sheet, current_author, used_titles = None, None, {"Сводка"}
+        for row in cur:
+            if row[0] != current_author:
+                current_author = row[0]
+                sheet = workbook.create_sheet(_sheet_title(row[0], row[1], used_titles))
+                sheet.append(VAK_COLUMNS)
+            sheet.append(list(row))
+            written += 1
+            if progress and written % FETCH_SIZE == 0:
+                progress(min(written / expected, 0.95), f"Выгружено строк: {written}")
+
+    workbook.save(output)
+    return written
+
+
+def export_file_name(author_ids: list[int] | None = None, organization_id: int | None = None) -> str:
+    if organization_id is not None:
+        return f"organization_{organization_id}_vak.xlsx"
+    if author_ids and len(author_ids) == 1:
+        return f"author_{author_ids[0]}_vak.xlsx"
+    return "authors_vak.xlsx"
+
+
+def export_vak_excel(
+    conn: psycopg2.extensions.connection,
+    output: BinaryIO,
+    author_ids: list[int] | None = None,
+    organization_id: int | None = None,
+    progress: Callable[[float, str], None] | None = None,
+) -> int:
+    """Выгрузка ВАК по списку авторов или по организации
+
+    Raises:
+        ValueError: Авторов больше MAX_EXPORT_AUTHORS
+    """
+    with conn.cursor() as cur:
+        author_ids = resolve_export_authors(cur, author_ids, organization_id)
+    if len(author_ids) > MAX_EXPORT_AUTHORS:
+        raise ValueError(f"Too many authors for one export: {len(author_ids)} > {MAX_EXPORT_AUTHORS}")
+    return write_vak_excel(conn, author_ids, output, progress)
+
+
+def spooled_output() -> SpooledTemporaryFile:
+    return SpooledTemporaryFile(max_size=SPOOL_SIZE)
@@ -0,0 +1,110 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import psycopg2
+
+from ..database.refresh import get_data_version
+
+WORDCLOUD_CACHE_DIR = os.path.abspath(os.getenv("WORDCLOUD_CACHE_DIR", os.path.join("cache", "wordcloud")))
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+# Сколько картинок хранится на диске: старые (по времени изменения) удаляются
+MAX_CACHED_IMAGES = 500
+
+WIDTH = 1600
+HEIGHT = 800
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def render_wordcloud(frequencies: dict[str, int], max_words: int) -> bytes:
+    """PNG облака слов (выполняется в процессе пула)"""
+    from wordcloud import WordCloud
+
+    image = (
+        WordCloud(width=WIDTH, height=HEIGHT, background_color="white", max_words=max_words)
+        .generate_from_frequencies(frequencies)
+        .to_image()
+    )
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+def wordcloud_etag(cur: psycopg2.extensions.cursor, year: int, language: str | None, limit: int) -> str:
+    """ETag картинки: параметры и время обновления keyword_year_stats_mv"""
+    version = get_data_version(cur, ["keyword_year_stats_mv"])
+    payload = json.dumps([year, language, limit, WIDTH, HEIGHT, version])
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _prune_cache() -> None:
+    entries = [entry for entry in os.scandir(WORDCLOUD_CACHE_DIR) if entry.name.endswith(".png")]
+    if len(entries) <= MAX_CACHED_IMAGES:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[: len(entries) - MAX_CACHED_IMAGES]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def get_wordcloud(
+    cur: psycopg2.extensions.cursor, etag: str, year: int, language: str | None, limit: int
+) -> str | None:
+    """Путь к PNG облака ключевых слов за год; отрисовывается при первом запросе
+
+    Returns:
+        Путь к файлу или None, если за год нет ключевых слов
+    """
+    path = os.path.join(WORDCLOUD_CACHE_DIR, f"{etag}.png")
+    if os.path.exists(path):
+        return path
+
+    params: list = [year]
+    language_clause = ""
+    if language:
+        language_clause = "AND language = %s"
+        params.append(language.upper())
+    params.append(limit)
+    cur.execute(
+        f"""
+        SELECT d.keyword, t.total
+        FROM (SELECT keyword_id, sum(count) AS total
+              FROM keyword_year_stats_mv
+              WHERE year = %s {language_clause}
+              GROUP BY keyword_id
+              ORDER BY total DESC
+              LIMIT %s) t
+                 JOIN dim_keywords d ON d.id = t.keyword_id
+        """,
+        params,
+    )
+    frequencies = {keyword: int(count) for keyword, count in cur.fetchall() if keyword}
+    if not frequencies:
+        return None
+
+    png = _get_executor().submit(render_wordcloud, frequencies, limit).result()
+
+    os.makedirs(WORDCLOUD_CACHE_DIR, exist_ok=True)
+    # Запись через временный файл: параллельный запрос не прочитает недописанную картинку
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(png)
+    os.replace(temporary, path)
+    _prune_cache()
+    return path
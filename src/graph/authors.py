@@ -4,65 +4,58 @@ from dataclasses import dataclass, field
 import psycopg2
 from dacite import from_dict
 from flask import Blueprint, abort, jsonify, request
+from werkzeug.exceptions import HTTPException
 
+from ..analytics.coauthorship import coauthorship_index
 from ..database.database import DatabaseService
 from ..entities.datacls import GraphFilter
+from ..jobs import is_async_request, job_accepted, submit_job
 from ..utils.database import fetch_paginated
-from ..utils.graph import tuples_to_graph_links, tuples_to_graph_nodes
+from ..utils.graph import (
+    NODE_VALUE_SOURCES,
+    apply_centrality_values,
+    apply_communities,
+    apply_layout,
+    tuples_to_graph_links,
+    tuples_to_graph_nodes,
+)
+from ..utils.validation import validate_int
 
 authors_bp = Blueprint("authors", __name__, url_prefix="/authors")
 
 
 @dataclass
 class AuthorsFilters(GraphFilter):
+    VIEW_OPTIONS = GraphFilter.VIEW_OPTIONS + ("value_source", "communities")
+
     authors: list[int] = field(default_factory=list)
     organizations: list[int] = field(default_factory=list)
     keywords: list[str] = field(default_factory=list)
     cities: list[str] = field(default_factory=list)
     min_publications: str = "3"
+    value_source: str = ""  # пусто — число публикаций, иначе pagerank, degree, betweenness
+    communities: bool = False  # категории узлов — сообщества соавторства
 
 
 def get_filtered_authors(filters: AuthorsFilters, cur: psycopg2.extensions.cursor):
     min_publications = int(filters.min_publications)
-    query_temp_table = """
-        CREATE TEMP TABLE filtered_authors AS
-        SELECT DISTINCT authorid,
-            lastname || ' ' ||
-            (SELECT string_agg(LEFT(TRIM(word), 1) || '.', '')
-                FROM unnest(string_to_array(regexp_replace(initials, '[.]', ' ', 'g'), ' ')) AS word
-                WHERE TRIM(word) <> '') AS name,
-            a.itemid,
-            CASE
-                WHEN a.language = 'RU' THEN 0
-                WHEN a.language = 'EN' THEN 1
-                ELSE 2
-                END                  as lang_priority
-        FROM authors a
-                JOIN affiliations aff ON a.id = aff.author
-                LEFT JOIN keywords k ON a.itemid = k.itemid
-        {where_clause};
-        
-        CREATE TEMP TABLE related_authors AS
-        WITH related_authors_ids AS (SELECT a.authorid
-                                    FROM authors a
-                                            JOIN filtered_authors fa ON a.itemid = fa.itemid
-                                    WHERE a.authorid != fa.authorid
-                                    GROUP BY a.authorid, fa.authorid
-                                    HAVING COUNT(DISTINCT a.itemid) >= %s)
-        SELECT DISTINCT ON (a.authorid, a.itemid) a.authorid               as authorid,
-                                                lastname || ' ' ||
-                                                (SELECT string_agg(LEFT(TRIM(word), 1) || '.', '')
-                                                FROM unnest(string_to_array(regexp_replace(a.initials, '[.]', ' ', 'g'), ' ')) AS word
-                                                WHERE TRIM(word) <> '') AS name,
-                                                a.itemid                 as itemid,
-                                                CASE
-                                                    WHEN a.language = 'RU' THEN 0
-                                                    WHEN a.language = 'EN' THEN 1
-                                                    ELSE 2
-                                                    END                  as lang_priority
-        FROM authors a
-                JOIN related_authors_ids rela ON a.authorid = rela.authorid
-        WHERE a.authorid NOT IN (SELECT authorid FROM filtered_authors);
+    # Узлы и ребра — одним запросом: множества авторов (самая дорогая часть) считаются один раз
+    query_authors = """
+        WITH filtered_authors AS (SELECT DISTINCT a.authorid, a.itemid
+                                  FROM authors a
+                                          JOIN affiliations aff ON a.id = aff.author
+                                          LEFT JOIN keywords k ON a.itemid = k.itemid
+                                  {where_clause}),
+             related_authors_ids AS (SELECT a.authorid
+                                     FROM authors a
+                                             JOIN filtered_authors fa ON a.itemid = fa.itemid
+                                     WHERE a.authorid != fa.authorid
+                                     GROUP BY a.authorid, fa.authorid
+                                     HAVING COUNT(DISTINCT a.itemid) >= %s),
+             related_authors AS (SELECT DISTINCT a.authorid, a.itemid
+                                 FROM authors a
+                                         JOIN related_authors_ids rela ON a.authorid = rela.authorid
+                                 WHERE a.authorid NOT IN (SELECT authorid FROM filtered_authors))
     """
     where_clauses = ["a.authorid IS NOT NULL"]
     params = []
@@ -85,45 +78,48 @@ def get_filtered_authors(filters: AuthorsFilters, cur: psycopg2.extensions.curso
         where_clause = "WHERE " + " AND ".join(where_clauses)
     else:
         where_clause = ""
-    query_temp_table = query_temp_table.format(where_clause=where_clause)
-    logging.debug(query_temp_table)
-
-    cur.execute(query_temp_table, params)
-    query_nodes = """
-        SELECT authorid,
-            get_unique_sorted_names(array_agg(initcap(name)), array_agg(lang_priority)),
-            COUNT(DISTINCT itemid) AS total_publications,
-            1 as category
-        FROM filtered_authors
-        GROUP BY authorid
-        UNION
-        SELECT authorid,
-            get_unique_sorted_names(array_agg(initcap(name)), array_agg(lang_priority)),
-            COUNT(DISTINCT itemid) AS total_publications,
-            0 as category
-        FROM related_authors
-        GROUP BY authorid
-    """
-    cur.execute(query_nodes)
-    nodes = tuples_to_graph_nodes(cur.fetchall())
-
-    query_edges = """
-        SELECT a1.authorid, a2.authorid, COUNT(DISTINCT a1.itemid)
+    query_authors = query_authors.format(where_clause=where_clause)
+    logging.debug(query_authors)
+
+    # Варианты имени берутся из author_names (краткие имена в порядке приоритета языка)
+    query_graph = query_authors + """,
+             graph_authors AS (SELECT * FROM filtered_authors
+                               UNION
+                               SELECT * FROM related_authors)
+        SELECT 'node',
+            fa.authorid,
+            NULL::int,
+            COALESCE(n.name_variants, ARRAY[fa.authorid::text]),
+            fa.total_publications,
+            fa.category
         FROM (
-            SELECT * FROM filtered_authors
-            UNION
-            SELECT * FROM related_authors
-        ) a1
-        JOIN (
-            SELECT * FROM filtered_authors
-            UNION
-            SELECT * FROM related_authors
-        ) a2 ON a1.itemid = a2.itemid
+            SELECT authorid, COUNT(DISTINCT itemid) AS total_publications, 1 AS category
+            FROM filtered_authors
+            GROUP BY authorid
+            UNION ALL
+            SELECT authorid, COUNT(DISTINCT itemid) AS total_publications, 0 AS category
+            FROM related_authors
+            GROUP BY authorid
+        ) fa
+        LEFT JOIN author_names n ON n.authorid = fa.authorid
+        UNION ALL
+        SELECT 'link', a1.authorid, a2.authorid, NULL, COUNT(DISTINCT a1.itemid), NULL
+        FROM graph_authors a1
+                JOIN graph_authors a2 ON a1.itemid = a2.itemid
         WHERE a1.authorid < a2.authorid
         GROUP BY a1.authorid, a2.authorid;
     """
-    cur.execute(query_edges, (min_publications,))
-    edges = tuples_to_graph_links(cur.fetchall())
+    cur.execute(query_graph, params)
+    node_rows, edge_rows = [], []
+    for kind, authorid, other, names, count, category in cur.fetchall():
+        if kind == "node":
+            node_rows.append((authorid, names, count, category))
+        else:
+            edge_rows.append((authorid, other, count))
+
+    nodes = tuples_to_graph_nodes(node_rows)
+    apply_centrality_values(nodes, filters.value_source, cur)
+    edges = tuples_to_graph_links(edge_rows)
 
     return {
         "nodes": nodes,
@@ -132,17 +128,29 @@ def get_filtered_authors(filters: AuthorsFilters, cur: psycopg2.extensions.curso
     }
 
 
+def build_authors_graph(filters: AuthorsFilters) -> dict:
+    with DatabaseService("new_data") as cur:
+        graph_data = get_filtered_authors(filters, cur)
+    if filters.communities:
+        apply_communities(graph_data)
+    if filters.layout:
+        apply_layout(graph_data, filters.cache_key())
+    return graph_data
+
+
 @authors_bp.route("/data", methods=["POST"])
 def get_authors_graph_data():
     try:
         filters: AuthorsFilters = from_dict(AuthorsFilters, request.get_json())
         if not filters.has_at_least_one_filter():
             abort(400, "At least one filter is required")
+        if filters.value_source and filters.value_source not in NODE_VALUE_SOURCES:
+            abort(400, f"Unknown value_source: {filters.value_source}")
         logging.debug(f"Received filters: {filters}")
 
-        with DatabaseService("new_data") as cur:
-            graph_data = get_filtered_authors(filters, cur)
-            return jsonify(graph_data)
+        if is_async_request():
+            return job_accepted(submit_job("graph", {"graph": "authors", "filters": request.get_json()}))
+        return jsonify(build_authors_graph(filters))
 
     except Exception as e:  # pylint: disable=broad-except
         logging.exception(e)
@@ -173,11 +181,14 @@ def get_author_table_nodes():
                 where_clauses.append("affiliationid = ANY(%s)")
                 params.append(filters.organizations)
             if filters.keywords:
-                where_clauses.append("keyword = ANY(%s)")
-                params.append(filters.keywords)
+                where_clauses.append("keyword_id IN (SELECT id FROM dim_keywords WHERE keyword = ANY(%s))")
+                params.append([keyword.strip().lower() for keyword in filters.keywords])
             if filters.cities:
-                where_clauses.append("town = ANY(%s)")
-                params.append(filters.cities)
+                where_clauses.append(
+                    "city_id IN (SELECT dc.id FROM dim_cities dc JOIN city_aliases ca ON ca.city = dc.city"
+                    " WHERE ca.alias = ANY(%s))"
+                )
+                params.append([city.strip().lower() for city in filters.cities])
 
             where_clause = " AND ".join(where_clauses)
 
@@ -238,11 +249,14 @@ def get_author_table_links():
                 where_clauses.append("a1.affiliationid = ANY(%s)")
                 params.append(filters.organizations)
             if filters.keywords:
-                where_clauses.append("a1.keyword = ANY(%s)")
-                params.append(filters.keywords)
+                where_clauses.append("a1.keyword_id IN (SELECT id FROM dim_keywords WHERE keyword = ANY(%s))")
+                params.append([keyword.strip().lower() for keyword in filters.keywords])
             if filters.cities:
-                where_clauses.append("a1.town = ANY(%s)")
-                params.append(filters.cities)
+                where_clauses.append(
+                    "a1.city_id IN (SELECT dc.id FROM dim_cities dc JOIN city_aliases ca ON ca.city = dc.city"
+                    " WHERE ca.alias = ANY(%s))"
+                )
+                params.append([city.strip().lower() for city in filters.cities])
 
             where_clause = " AND ".join(where_clauses)
 
@@ -275,3 +289,69 @@ def get_author_table_links():
     except Exception as e:
         logging.exception(e)
         return jsonify({"error": str(e)}), 500
+
+
+@authors_bp.route("/path", methods=["GET"])
+def get_authors_path():
+    """
+    Кратчайшая цепочка соавторства между двумя авторами с общими публикациями на каждом шаге
+    """
+    try:
+        source = request.args.get("source", "")
+        target = request.args.get("target", "")
+        if not source.isdigit() or not target.isdigit():
+            return abort(400, description="source and target are required and must be integers")
+
+        max_depth = validate_int(request.args.get("max_depth", "6"), 1, 10, "max_depth")
+        items_per_hop = validate_int(request.args.get("items_per_hop", "5"), 1, 50, "items_per_hop")
+
+        index = coauthorship_index.get()
+        result = index.shortest_path(int(source), int(target), max_depth=max_depth)
+        if not result.found:
+            return jsonify({"found": False, "reason": result.reason, "visited": result.visited})
+
+        hops = []
+        for (first, second), via_item in zip(zip(result.authors, result.authors[1:]), result.items):
+            shared = index.shared_items(index.author_position(first), index.author_position(second))
+            # Публикация, найденная обходом, идет первой
+            item_ids = [via_item] + [int(i) for i in shared if i != via_item][: items_per_hop - 1]
+            hops.append({"source": str(first), "target": str(second), "items": item_ids, "total": len(shared)})
+
+        with DatabaseService("new_data") as cur:
+            cur.execute(
+                "SELECT authorid, display_name FROM author_names WHERE authorid = ANY(%s)",
+                (result.authors,),
+            )
+            names = dict(cur.fetchall())
+
+            cur.execute(
+                """
+                SELECT DISTINCT ON (i.itemid) i.itemid AS key, i.title, i.year, j.name AS journal, i.link
+                FROM items i
+                        LEFT JOIN journals j ON i.itemid = j.itemid
+                WHERE i.itemid = ANY(%s)
+                """,
+                ([item for hop in hops for item in hop["items"]],),
+            )
+            column_names = [desc[0] for desc in cur.description]
+            items = {row[0]: dict(zip(column_names, row)) for row in cur.fetchall()}
+
+        for hop in hops:
+            hop["items"] = [items[item] for item in hop["items"] if item in items]
+
+        return jsonify(
+            {
+                "found": True,
+                "distance": len(result.authors) - 1,
+                "authors": [{"id": str(a), "name": names.get(a, f"Author {a}")} for a in result.authors],
+                "hops": hops,
+                "visited": result.visited,
+            }
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:  # pylint: disable=broad-except
+        logging.exception(e)
+        return jsonify({"error": str(e)}), 500
+
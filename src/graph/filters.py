@@ -6,34 +6,33 @@ from ..utils.database import fetch_paginated_filter_options
 filters_bp = Blueprint("graph_filters", __name__, url_prefix="/filters")
 
 
-@filters_bp.route("/authors", methods=["GET"])
-def get_authors_filter():
-    query = """
-        WITH matched_authors AS (
-            SELECT DISTINCT value
-            FROM authors_names_with_priority_view
-            {where_clauses}
-        )
-        SELECT value, name FROM (
-            SELECT DISTINCT ON (auv.value)
-                auv.value,
-                auv.name
-            FROM authors_names_with_priority_view auv
-            JOIN matched_authors ma ON auv.value = ma.value
-            ORDER BY auv.value, auv.lang_priority, auv.name_length DESC
-        ) AS sub
-        ORDER BY 
-            (name ~ '^[а-яА-ЯёЁ]') DESC,  -- Сначала кириллица (TRUE идет раньше FALSE)
-            name     -- Затем сортировка по алфавиту
-    """
-
-    data = fetch_paginated_filter_options(
-        query=query,
-        label_column="name",
-        value_column="value",
+# Поиск по всем вариантам имени автора, нормализованным так же, как author_names.search_key
+AUTHOR_SEARCH_CLAUSE = "search_key LIKE '%%' || author_search_key(%s) || '%%'"
+
+AUTHORS_FILTER_QUERY = """
+    SELECT n.authorid AS value, n.display_name AS name
+    FROM author_names n
+    {join}
+    {{where_clauses}}
+    ORDER BY
+        (n.display_name ~ '^[а-яА-ЯёЁ]') DESC,  -- Сначала кириллица (TRUE идет раньше FALSE)
+        n.display_name     -- Затем сортировка по алфавиту
+"""
+
+
+def _authors_filter_options(join: str = "") -> dict:
+    return fetch_paginated_filter_options(
+        query=AUTHORS_FILTER_QUERY.format(join=join),
+        label_column="n.display_name",
+        value_column="n.authorid",
         order_by_label=False,
+        search_clause=AUTHOR_SEARCH_CLAUSE,
     )
-    return jsonify(data)
+
+
+@filters_bp.route("/authors", methods=["GET"])
+def get_authors_filter():
+    return jsonify(_authors_filter_options())
 
 
 @filters_bp.route("/cited_authors", methods=["GET"])
@@ -41,36 +40,13 @@ def get_cited_authors():
     """
     Возвращает авторов, которые цитируются другими
     """
-    query = """
-        WITH matched_authors AS (
-            SELECT DISTINCT value
-            FROM authors_names_with_priority_view
-            JOIN (
-                SELECT DISTINCT author_id as authorid
-                FROM author_citations_view
-            ) citing ON authors_names_with_priority_view.value = citing.authorid
-            {where_clauses}
-        )
-        SELECT value, name FROM (
-            SELECT DISTINCT ON (auv.value)
-                auv.value,
-                auv.name
-            FROM authors_names_with_priority_view auv
-            JOIN matched_authors ma ON auv.value = ma.value
-            ORDER BY auv.value, auv.lang_priority, auv.name_length DESC
-        ) AS sub
-        ORDER BY 
-            (name ~ '^[а-яА-ЯёЁ]') DESC,  -- Сначала кириллица (TRUE идет раньше FALSE)
-            name     -- Затем сортировка по алфавиту
+    join = """
+        JOIN (
+            SELECT DISTINCT author_id as authorid
+            FROM author_citations_view
+        ) cited ON n.authorid = cited.authorid
     """
-
-    data = fetch_paginated_filter_options(
-        query=query,
-        label_column="name",
-        value_column="value",
-        order_by_label=False,
-    )
-    return jsonify(data)
+    return jsonify(_authors_filter_options(join))
 
 
 @filters_bp.route("/citing_authors", methods=["GET"])
@@ -78,36 +54,13 @@ def get_citing_authors():
     """
     Возвращает авторов, которые цитируют другие статьи
     """
-    query = """
-        WITH matched_authors AS (
-            SELECT DISTINCT value
-            FROM authors_names_with_priority_view
-            JOIN (
-                SELECT DISTINCT citing_author as authorid
-                FROM author_citations_view
-            ) citing ON authors_names_with_priority_view.value = citing.authorid
-            {where_clauses}
-        )
-        SELECT value, name FROM (
-            SELECT DISTINCT ON (auv.value)
-                auv.value,
-                auv.name
-            FROM authors_names_with_priority_view auv
-            JOIN matched_authors ma ON auv.value = ma.value
-            ORDER BY auv.value, auv.lang_priority, auv.name_length DESC
-        ) AS sub
-        ORDER BY 
-            (name ~ '^[а-яА-ЯёЁ]') DESC,  -- Сначала кириллица (TRUE идет раньше FALSE)
-            name     -- Затем сортировка по алфавиту
+    join = """
+        JOIN (
+            SELECT DISTINCT citing_author as authorid
+            FROM author_citations_view
+        ) citing ON n.authorid = citing.authorid
     """
-
-    data = fetch_paginated_filter_options(
-        query=query,
-        label_column="name",
-        value_column="value",
-        order_by_label=False,
-    )
-    return jsonify(data)
+    return jsonify(_authors_filter_options(join))
 
 
 @filters_bp.route("/organizations", methods=["GET"])
@@ -0,0 +1,127 @@
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+import psycopg2
+from dacite import from_dict
+from flask import Blueprint, abort, jsonify, request
+from werkzeug.exceptions import HTTPException
+
+from ..analytics.cooccurrence import COOCCURRENCE_MEASURES, keyword_cooccurrence_graph
+from ..database.database import DatabaseService
+from ..entities.datacls import GraphFilter
+from ..jobs import is_async_request, job_accepted, submit_job
+from ..utils.graph import apply_layout, tuples_to_graph_links, tuples_to_graph_nodes
+from ..utils.validation import validate_int
+
+keywords_bp = Blueprint("keywords", __name__, url_prefix="/keywords")
+
+# Верхняя граница числа публикаций, по которым строится граф
+MAX_SCOPE_ITEMS = 200_000
+# Узлов в графе: совместные встречаемости узлов считаются плотной матрицей max_nodes x max_nodes
+MAX_NODES = 500
+
+
+@dataclass
+class KeywordsFilters(GraphFilter):
+    keywords: list[str] = field(default_factory=list)
+    organizations: list[int] = field(default_factory=list)
+    year_from: str = ""
+    year_to: str = ""
+    measure: str = "jaccard"
+    min_cooccurrence: str = "2"
+    max_nodes: str = "100"
+
+    def has_at_least_one_filter(self) -> bool:
+        return bool(self.keywords or self.organizations or self.year_from or self.year_to)
+
+
+def get_keyword_pairs(filters: KeywordsFilters, cur: psycopg2.extensions.cursor) -> tuple[np.ndarray, np.ndarray]:
+    """Пары (публикация, нормализованное ключевое слово) для публикаций из области фильтров"""
+    where_clauses = ["k.keyword IS NOT NULL"]
+    params: list = []
+    if filters.keywords:
+        where_clauses.append("lower(trim(k.keyword)) = ANY(%s)")
+        params.append([keyword.strip().lower() for keyword in filters.keywords])
+    if filters.year_from:
+        where_clauses.append("i.year >= %s")
+        params.append(int(filters.year_from))
+    if filters.year_to:
+        where_clauses.append("i.year <= %s")
+        params.append(int(filters.year_to))
+    if filters.organizations:
+        where_clauses.append(
+            "k.itemid IN (SELECT itemid FROM organization_keyword_items_mv WHERE organizationid = ANY(%s))"
+        )
+        params.append(filters.organizations)
+    params.append(MAX_SCOPE_ITEMS)
+
+    query = f"""
+        WITH scope AS (
+            SELECT DISTINCT k.itemid
+            FROM keywords k
+                    JOIN items i ON i.itemid = k.itemid
+            WHERE {" AND ".join(where_clauses)}
+            ORDER BY k.itemid
+            LIMIT %s
+        )
+        SELECT DISTINCT k.itemid, lower(trim(k.keyword))
+        FROM keywords k
+                JOIN scope s ON s.itemid = k.itemid
+        WHERE k.keyword IS NOT NULL AND trim(k.keyword) <> ''
+    """
+    cur.execute(query, params)
+    rows = cur.fetchall()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=object)
+
+    itemids, keywords = zip(*rows)
+    return np.array(itemids, dtype=np.int64), np.array(keywords, dtype=object)
+
+
+def get_filtered_keywords(filters: KeywordsFilters, cur: psycopg2.extensions.cursor):
+    itemids, keywords = get_keyword_pairs(filters, cur)
+    nodes, links = keyword_cooccurrence_graph(
+        itemids,
+        keywords,
+        seeds=[keyword.strip().lower() for keyword in filters.keywords],
+        measure=filters.measure,
+        max_nodes=int(filters.max_nodes),
+        min_cooccurrence=int(filters.min_cooccurrence),
+    )
+    return {
+        "nodes": tuples_to_graph_nodes(nodes),
+        "links": tuples_to_graph_links(links),
+        "categories": [{"name": "Связанные ключевые слова"}, {"name": "Отфильтрованные ключевые слова"}],
+    }
+
+
+def build_keywords_graph(filters: KeywordsFilters) -> dict:
+    with DatabaseService("new_data") as cur:
+        graph_data = get_filtered_keywords(filters, cur)
+    if filters.layout:
+        apply_layout(graph_data, filters.cache_key())
+    return graph_data
+
+
+@keywords_bp.route("/data", methods=["POST"])
+def get_keywords_graph_data():
+    try:
+        filters: KeywordsFilters = from_dict(KeywordsFilters, request.get_json())
+        if not filters.has_at_least_one_filter():
+            abort(400, "At least one filter is required")
+        if filters.measure not in COOCCURRENCE_MEASURES:
+            abort(400, f"Unknown measure: {filters.measure}")
+        validate_int(filters.max_nodes, 1, MAX_NODES, "max_nodes")
+        validate_int(filters.min_cooccurrence, 1, 1_000_000, "min_cooccurrence")
+        logging.debug(f"Received filters: {filters}")
+
+        if is_async_request():
+            return job_accepted(submit_job("graph", {"graph": "keywords", "filters": request.get_json()}))
+        return jsonify(build_keywords_graph(filters))
+
+    except HTTPException:
+        raise
+    except Exception as e:  # pylint: disable=broad-except
+        logging.exception(e)
+        return jsonify({"error": str(e)}), 500
@@ -7,16 +7,20 @@ from flask import Blueprint, abort, jsonify, request
 
 from ..database.database import DatabaseService
 from ..entities.datacls import GraphFilter
+from ..jobs import is_async_request, job_accepted, submit_job
 from ..utils.database import fetch_paginated
-from ..utils.graph import tuples_to_graph_links, tuples_to_graph_nodes
+from ..utils.graph import apply_communities, apply_layout, tuples_to_graph_links, tuples_to_graph_nodes
 
 organizations_bp = Blueprint("organizations", __name__, url_prefix="/organizations")
 
 
 @dataclass
 class OrganizationsFilters(GraphFilter):
+    VIEW_OPTIONS = GraphFilter.VIEW_OPTIONS + ("communities",)
+
     keywords: list[str] = field(default_factory=list)
     min_publications: str = "3"
+    communities: bool = False  # категории узлов — сообщества совместных публикаций
 
 
 def get_filtered_organizations(filters: OrganizationsFilters, cur: psycopg2.extensions.cursor):
@@ -78,6 +82,16 @@ def get_filtered_organizations(filters: OrganizationsFilters, cur: psycopg2.exte
     }
 
 
+def build_organizations_graph(filters: OrganizationsFilters) -> dict:
+    with DatabaseService("new_data") as cur:
+        graph_data = get_filtered_organizations(filters, cur)
+    if filters.communities:
+        apply_communities(graph_data)
+    if filters.layout:
+        apply_layout(graph_data, filters.cache_key())
+    return graph_data
+
+
 @organizations_bp.route("/data", methods=["POST"])
 def get_organizations_graph_data():
     try:
@@ -86,9 +100,9 @@ def get_organizations_graph_data():
             abort(400, "At least one filter is required")
 
         logging.debug(f"Received filters: {filters}")
-        with DatabaseService("new_data") as cur:
-            graph_data = get_filtered_organizations(filters, cur)
-            return jsonify(graph_data)
+        if is_async_request():
+            return job_accepted(submit_job("graph", {"graph": "organizations", "filters": request.get_json()}))
+        return jsonify(build_organizations_graph(filters))
 
     except Exception as e:  # pylint: disable=broad-except
         logging.exception(e)
@@ -7,23 +7,30 @@ from flask import Blueprint, Response, abort, jsonify, request
 
 from ..database.database import DatabaseService
 from ..entities.datacls import GraphFilter
+from ..jobs import is_async_request, job_accepted, submit_job
+from ..utils.graph import NODE_VALUE_SOURCES, apply_centrality_values, apply_layout
 
 references_bp = Blueprint("references", __name__, url_prefix="/references")
 
 
 @dataclass
 class ReferencesFilters(GraphFilter):
+    VIEW_OPTIONS = GraphFilter.VIEW_OPTIONS + ("value_source",)
+
     authors: list[int] = field(default_factory=list)  # цитируемые авторы
     citing_authors: list[int] = field(default_factory=list)  # кто цитирует
+    value_source: str = ""  # пусто — число цитирований, иначе pagerank, degree, betweenness
 
 
 def get_filtered_references(filters: ReferencesFilters):
     query = """
-        SELECT author_id,       -- кого цитируют
-               author_name,
-               citing_author,   -- кто цитирует
-               citing_author_name
-        FROM new_data.author_citations_view
+        SELECT c.author_id,       -- кого цитируют
+               COALESCE(cited.display_name, c.author_name),
+               c.citing_author,   -- кто цитирует
+               COALESCE(citing.display_name, c.citing_author_name)
+        FROM new_data.author_citations_view c
+                LEFT JOIN new_data.author_names cited ON cited.authorid = c.author_id
+                LEFT JOIN new_data.author_names citing ON citing.authorid = c.citing_author
         WHERE TRUE
     """
 
@@ -31,13 +38,13 @@ def get_filtered_references(filters: ReferencesFilters):
     if filters.authors:
         if len(filters.authors) == 1:
             filters.authors.append(-1)
-        query += " AND author_id IN %s"
+        query += " AND c.author_id IN %s"
         params.append(tuple(filters.authors))
 
     if filters.citing_authors:
         if len(filters.citing_authors) == 1:
             filters.citing_authors.append(-1)
-        query += " AND citing_author IN %s"
+        query += " AND c.citing_author IN %s"
         params.append(tuple(filters.citing_authors))
 
     with DatabaseService("new_data") as cur:
@@ -79,6 +86,10 @@ def get_filtered_references(filters: ReferencesFilters):
             }
         )
 
+    if filters.value_source in NODE_VALUE_SOURCES:
+        with DatabaseService("new_data") as cur:
+            apply_centrality_values(nodes, filters.value_source, cur)
+
     # Собираем связи
     links = [
         {
@@ -132,15 +143,28 @@ def get_articles_between_authors():
         return jsonify({"error": str(e)}), 500
 
 
+def build_references_graph(filters: ReferencesFilters) -> dict:
+    # get_filtered_references дополняет списки авторов, ключ считается до этого
+    cache_key = filters.cache_key()
+    graph_data = get_filtered_references(filters)
+    if filters.layout:
+        apply_layout(graph_data, cache_key)
+    return graph_data
+
+
 @references_bp.route("/data", methods=["POST"])
 def get_references_graph_data():
     try:
         filters: ReferencesFilters = from_dict(ReferencesFilters, request.get_json())
         if not filters.has_at_least_one_filter():
             abort(400, "At least one filter is required")
+        if filters.value_source and filters.value_source not in NODE_VALUE_SOURCES:
+            abort(400, f"Unknown value_source: {filters.value_source}")
         logging.debug(f"Received citation filters: {filters}")
 
-        graph_data = get_filtered_references(filters)
+        if is_async_request():
+            return job_accepted(submit_job("graph", {"graph": "references", "filters": request.get_json()}))
+        graph_data = build_references_graph(filters)
         return Response(json.dumps(graph_data, ensure_ascii=False), mimetype="application/json; charset=utf-8")
 
     except Exception as e:  # pylint: disable=broad-except
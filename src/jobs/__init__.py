@@ -0,0 +1,2 @@
+from .routes import is_async_request, job_accepted, jobs_bp
+from .runner import submit_job
@@ -0,0 +1,58 @@
+import logging
+import os
+
+from flask import Blueprint, jsonify, request, send_file, url_for
+
+from .runner import TASKS, submit_job
+from .store import STATUS_DONE, Job, JobStore
+
+jobs_bp = Blueprint("jobs", __name__, url_prefix="/api/jobs")
+
+
+def is_async_request() -> bool:
+    """Клиент попросил выполнить запрос в фоне: ?async=true"""
+    return request.args.get("async", "").lower() in {"1", "true", "yes"}
+
+
+def job_accepted(job: Job):
+    """Ответ 202 со ссылкой на статус задачи"""
+    status_url = url_for("jobs.get_job", job_id=job.id)
+    return jsonify({"id": job.id, "status": job.status, "status_url": status_url}), 202, {"Location": status_url}
+
+
+@jobs_bp.route("", methods=["POST"])
+def create_job():
+    data = request.get_json(silent=True) or {}
+    kind = data.get("kind")
+    if kind not in TASKS:
+        return jsonify({"error": f"Unknown job kind. Allowed values: {', '.join(TASKS)}"}), 400
+
+    try:
+        return job_accepted(submit_job(kind, data.get("params") or {}))
+
+    except Exception as e:  # pylint: disable=broad-except
+        logging.exception(e)
+        return jsonify({"error": str(e)}), 500
+
+
+@jobs_bp.route("/<job_id>", methods=["GET"])
+def get_job(job_id: str):
+    job = JobStore().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    data = job.to_dict()
+    if job.status == STATUS_DONE:
+        data["result_url"] = url_for("jobs.get_job_result", job_id=job.id)
+    return jsonify(data)
+
+
+@jobs_bp.route("/<job_id>/result", methods=["GET"])
+def get_job_result(job_id: str):
+    job = JobStore().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status != STATUS_DONE or not job.result_path or not os.path.exists(job.result_path):
+        return jsonify({"error": f"Job result is not available, status: {job.status}"}), 409
+
+    return send_file(job.result_path, mimetype=job.mimetype, as_attachment=True, download_name=job.result_name)
@@ -0,0 +1,80 @@
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .store import STATUS_DONE, STATUS_FAILED, STATUS_RUNNING, Job, JobStore
+
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+# Сколько секунд хранятся завершенные задачи и их результаты
+JOB_RETENTION = 24 * 3600
+
+# Типы задач: путь к функции вида "module:function" с сигнатурой
+# (params, output, progress) -> (имя файла результата, mimetype)
+TASKS = {
+    "author_vak_excel": "src.jobs.tasks:author_vak_excel",
+    "graph": "src.jobs.tasks:graph",
+}
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: дочерние процессы не наследуют соединения и потоки веб-сервера
+            _executor = ProcessPoolExecutor(JOBS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def submit_job(kind: str, params: dict) -> Job:
+    """Ставит задачу в очередь пула процессов"""
+    if kind not in TASKS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    store = JobStore()
+    store.cleanup(JOB_RETENTION)
+    job = store.create(kind, params)
+    _get_executor().submit(run_job, job.id, store.directory)
+    return job
+
+
+def run_job(job_id: str, directory: str) -> None:
+    """Выполняет задачу в процессе пула и записывает результат в хранилище"""
+    store = JobStore(directory)
+    job = store.get(job_id)
+    if job is None:
+        return
+
+    store.update(job_id, status=STATUS_RUNNING, started_at=time.time())
+
+    def progress(fraction: float, message: str = "") -> None:
+        store.update(job_id, progress=round(fraction, 3), message=message)
+
+    path = store.result_path(job_id, "result")
+    try:
+        module_name, func_name = TASKS[job.kind].split(":")
+        task = getattr(importlib.import_module(module_name), func_name)
+        with open(path, "wb") as output:
+            name, mimetype = task(job.params, output, progress)
+    except Exception as e:  # pylint: disable=broad-except
+        logging.exception("Job %s (%s) failed", job_id, job.kind)
+        if os.path.exists(path):
+            os.remove(path)
+        store.update(job_id, status=STATUS_FAILED, error=str(e), finished_at=time.time())
+        return
+
+    store.update(
+        job_id,
+        status=STATUS_DONE,
+        progress=1.0,
+        finished_at=time.time(),
+        result_path=path,
+        result_name=name,
+        mimetype=mimetype,
+    )
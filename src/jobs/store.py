@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from dataclasses import asdict, dataclass
+
+JOBS_DIR = os.path.abspath(os.getenv("JOBS_DIR", "jobs"))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict
+    status: str
+    progress: float
+    message: str
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    result_path: str | None = None
+    result_name: str | None = None
+    mimetype: str | None = None
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data["result_path"]
+        return data
+
+
+_COLUMNS = [
+    "id",
+    "kind",
+    "params",
+    "status",
+    "progress",
+    "message",
+    "created_at",
+    "started_at",
+    "finished_at",
+    "result_path",
+    "result_name",
+    "mimetype",
+    "error",
+]
+
+
+class JobStore:
+    """Хранилище задач в SQLite
+
+    Каждая операция открывает свое соединение, поэтому хранилищем одновременно
+    пользуются процесс веб-сервера и процессы пула задач.
+    """
+
+    def __init__(self, directory: str = JOBS_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, "jobs.sqlite")
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id          TEXT PRIMARY KEY,
+                    kind        TEXT NOT NULL,
+                    params      TEXT NOT NULL,
+                    status      TEXT NOT NULL,
+                    progress    REAL NOT NULL DEFAULT 0,
+                    message     TEXT NOT NULL DEFAULT '',
+                    created_at  REAL NOT NULL,
+                    started_at  REAL,
+                    finished_at REAL,
+                    result_path TEXT,
+                    result_name TEXT,
+                    mimetype    TEXT,
+                    error       TEXT
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def result_path(self, job_id: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.{extension}")
+
+    def create(self, kind: str, params: dict) -> Job:
+        job = Job(uuid.uuid4().hex, kind, params, STATUS_QUEUED, 0.0, "", time.time())
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, kind, json.dumps(params, ensure_ascii=False), job.status, job.created_at),
+            )
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        values = dict(zip(_COLUMNS, row))
+        values["params"] = json.loads(values["params"])
+        return Job(**values)
+
+    def update(self, job_id: str, **values) -> None:
+        unknown = set(values) - set(_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*values.values(), job_id))
+
+    def cleanup(self, max_age: float) -> int:
+        """Удаляет завершенные задачи старше max_age секунд вместе с файлами результатов"""
+        threshold = time.time() - max_age
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                "SELECT id, result_path FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (threshold,),
+            ).fetchall()
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id, _ in rows])
+
+        for _, path in rows:
+            if path and os.path.exists(path):
+                os.remove(path)
+        return len(rows)
@@ -0,0 +1,46 @@
+import json
+from typing import BinaryIO, Callable
+
+from ..database.database import get_db_connection
+from ..exports.vak import EXCEL_MIMETYPE, export_file_name, export_vak_excel
+
+Progress = Callable[[float, str], None]
+
+
+def author_vak_excel(params: dict, output: BinaryIO, progress: Progress) -> tuple[str, str]:
+    """Выгрузка ВАК: params = {"authorids": [...]} или {"organizationid": ...}"""
+    author_ids = [int(author_id) for author_id in params.get("authorids") or []]
+    organization_id = params.get("organizationid")
+    progress(0.05, "Выгрузка данных ВАК")
+    conn = get_db_connection()
+    try:
+        export_vak_excel(conn, output, author_ids, organization_id, progress)
+    finally:
+        conn.close()
+    return export_file_name(author_ids, organization_id), EXCEL_MIMETYPE
+
+
+def graph(params: dict, output: BinaryIO, progress: Progress) -> tuple[str, str]:
+    """Граф по фильтрам: params = {"graph": authors | organizations | references | keywords, "filters": {...}}"""
+    # Импорт здесь: модули графов сами ставят задачи через src.jobs
+    from dacite import from_dict
+
+    from ..graph.authors import AuthorsFilters, build_authors_graph
+    from ..graph.keywords import KeywordsFilters, build_keywords_graph
+    from ..graph.organizations import OrganizationsFilters, build_organizations_graph
+    from ..graph.references import ReferencesFilters, build_references_graph
+
+    builders = {
+        "authors": (AuthorsFilters, build_authors_graph),
+        "organizations": (OrganizationsFilters, build_organizations_graph),
+        "references": (ReferencesFilters, build_references_graph),
+        "keywords": (KeywordsFilters, build_keywords_graph),
+    }
+    if params.get("graph") not in builders:
+        raise ValueError(f"Unknown graph: {params.get('graph')}")
+
+    filters_cls, build = builders[params["graph"]]
+    progress(0.1, "Построение графа")
+    graph_data = build(from_dict(filters_cls, params.get("filters") or {}))
+    output.write(json.dumps(graph_data, ensure_ascii=False).encode("utf-8"))
+    return f"{params['graph']}_graph.json", "application/json; charset=utf-8"
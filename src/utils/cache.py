@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class Snapshot(Generic[T]):
+    """Лениво загружаемый объект в памяти процесса (индекс, словарь, матрица)
+
+    Раз в ttl секунд сверяется версия данных (если задана функция version)
+    и при ее изменении объект перезагружается. Без version объект просто
+    перезагружается по истечении ttl. Пока один поток перезагружает данные,
+    остальные продолжают работать со старой копией.
+    """
+
+    def __init__(self, loader: Callable[[], T], ttl: float = 600.0, version: Callable[[], object] | None = None):
+        self._loader = loader
+        self._ttl = ttl
+        self._version = version
+        self._lock = threading.Lock()
+        self._value: T | None = None
+        self._token: object = None
+        self._checked_at = 0.0
+
+    def get(self) -> T:
+        if self._value is not None and time.monotonic() - self._checked_at < self._ttl:
+            return self._value
+
+        # Первая загрузка ждет остальных, повторная — нет: старая копия еще годится
+        if not self._lock.acquire(blocking=self._value is None):
+            return self._value  # type: ignore[return-value]
+        try:
+            if self._value is not None and time.monotonic() - self._checked_at < self._ttl:
+                return self._value
+
+            token = self._version() if self._version else None
+            if self._value is None or self._version is None or token != self._token:
+                self._value = self._loader()
+                self._token = token
+            self._checked_at = time.monotonic()
+            return self._value
+        finally:
+            self._lock.release()
+
+    def invalidate(self) -> None:
+        """Принудительная перезагрузка при следующем обращении"""
+        self._checked_at = 0.0
+        self._token = object()
+
+
+class TTLCache(Generic[T]):
+    """Потокобезопасный LRU-кэш значений с ограниченным временем жизни"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._items: OrderedDict[Hashable, tuple[float, T]] = OrderedDict()
+
+    def get(self, key: Hashable) -> T | None:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self._ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: T) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self._maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
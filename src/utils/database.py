@@ -1,10 +1,19 @@
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from flask import request
+import numpy as np
 import psycopg2
+from psycopg2.pool import PoolError
 
-from src.database.database import DatabaseService
+from src.database.database import DatabaseService, get_db_connection, get_pool, get_shared_connection
+
+# Потоков для независимых запросов одного обработчика (см. fetch_parallel)
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "8"))
+
+_query_executor = ThreadPoolExecutor(QUERY_WORKERS, thread_name_prefix="query")
 
 
 def fetch_paginated_filter_options(
@@ -15,6 +24,7 @@ def fetch_paginated_filter_options(
     default_per_page: int = 20,
     order_by_label: bool = True,
     not_null_value: bool = True,
+    search_clause: str = "",
 ) -> dict[str, Any]:
     """Универсальная функция для получения данных с пагинацией и поиском
 
@@ -24,6 +34,8 @@ def fetch_paginated_filter_options(
         value_column: Название колонки со значением
         base_filter: Дополнительные условия WHERE (без WHERE)
         default_per_page: Количество элементов на странице
+        search_clause: Условие поиска с одним параметром %s, в который передается строка q.
+            По умолчанию — label_column ILIKE '%q%'
 
     Returns:
         Ответ в стандартном формате для фильтров: {"items": list[{"label" | "value": str}], "hasMore": bool, "total": int}
@@ -39,7 +51,7 @@ def fetch_paginated_filter_options(
             if base_filter:
                 where_clauses.append(base_filter)
             if q:
-                where_clauses.append(f"{label_column} ILIKE %s")
+                where_clauses.append(search_clause or f"{label_column} ILIKE %s")
 
             where_stmt = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
             full_query = f"""
@@ -50,7 +62,7 @@ def fetch_paginated_filter_options(
 
             params = []
             if q:
-                params.append(f"%{q}%")
+                params.append(q if search_clause else f"%{q}%")
             params.extend([per_page + 1, offset])
 
             logging.debug("query: %s", full_query)
@@ -100,3 +112,85 @@ def fetch_paginated(
         rows = cursor.fetchall()
 
         return (rows, len(rows) > per_page)
+
+
+def fetch_array(
+    cur: psycopg2.extensions.cursor,
+    query: str,
+    params: tuple | list | None = None,
+    dtype: type = np.int64,
+    chunk_size: int = 100_000,
+) -> np.ndarray:
+    """Выполняет запрос и собирает результат в двумерный numpy-массив
+
+    Строки забираются порциями, чтобы не держать в памяти весь список кортежей.
+
+    Args:
+        query: SQL запрос, все колонки которого приводятся к dtype
+        chunk_size: Размер порции fetchmany
+
+    Returns:
+        Массив формы (количество строк, количество колонок)
+    """
+    cur.execute(query, params)
+    width = len(cur.description) if cur.description else 0
+    chunks = []
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=dtype).reshape(-1, width))
+
+    if not chunks:
+        return np.empty((0, width), dtype=dtype)
+    return np.concatenate(chunks)
+
+
+def _fetch_pooled(query: str, params: tuple | list | None) -> list[tuple]:
+    pool = get_pool()
+    try:
+        conn, pooled = pool.getconn(), True
+    except PoolError:
+        # Пул занят — запрос не ждет, а идет через отдельное соединение
+        conn, pooled = get_db_connection(), False
+    try:
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            return cur.fetchall()
+    finally:
+        if pooled:
+            conn.rollback()
+            pool.putconn(conn)
+        else:
+            conn.close()
+
+
+def fetch_parallel(*queries: tuple[str, tuple | list | None]) -> list[list[tuple]]:
+    """Выполняет независимые запросы одновременно, каждый на своем соединении из пула
+
+    Время обработчика — время самого долгого запроса, а не их сумма. Запросы
+    видят каждый свой снимок данных, поэтому не должны зависеть друг от друга
+    (временные таблицы одного недоступны другому). Внутри пакетного запроса
+    (use_connection) запросы выполняются по очереди на общем соединении.
+
+    Args:
+        queries: Пары (SQL, параметры)
+
+    Returns:
+        Результаты fetchall в порядке запросов
+    """
+    shared = get_shared_connection()
+    if shared is not None or len(queries) < 2:
+        conn = shared or get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                results = []
+                for query, params in queries:
+                    cur.execute(query, params)
+                    results.append(cur.fetchall())
+                return results
+        finally:
+            conn.close()
+
+    futures = [_query_executor.submit(_fetch_pooled, query, params) for query, params in queries]
+    return [future.result() for future in futures]
@@ -1,3 +1,21 @@
+import numpy as np
+import psycopg2
+
+from ..analytics.centrality import CENTRALITY_COLUMNS
+from ..analytics.communities import label_propagation
+from ..analytics.layout import force_layout
+from .cache import TTLCache
+
+# Альтернативные источники value для узлов-авторов
+NODE_VALUE_SOURCES = tuple(CENTRALITY_COLUMNS)
+
+LAYOUT_TIME_BUDGET = 1.0
+# Сообщества сверх этого числа объединяются в одну категорию
+MAX_COMMUNITIES = 20
+
+# Координаты узлов по ключу кэша графа (GraphFilter.cache_key)
+_layout_cache: TTLCache[dict[str, tuple[float, float]]] = TTLCache(maxsize=256, ttl=3600.0)
+
 def tuples_to_graph_nodes(
     tuples: list[tuple],
 ) -> list[dict]:
@@ -23,3 +41,78 @@ def tuples_to_graph_links(
         }
         for t in tuples
     ]
+
+
+def apply_centrality_values(
+    nodes: list[dict],
+    value_source: str,
+    cur: psycopg2.extensions.cursor,
+) -> list[dict]:
+    """Подставляет в value узлов-авторов предрассчитанную метрику центральности
+
+    Args:
+        nodes: Узлы графа, id которых — authorid
+        value_source: Ключ CENTRALITY_COLUMNS. Для остальных значений узлы не меняются
+    """
+    column = CENTRALITY_COLUMNS.get(value_source)
+    if column is None or not nodes:
+        return nodes
+
+    cur.execute(
+        f"SELECT authorid, {column} FROM author_centrality WHERE authorid = ANY(%s)",
+        ([int(node["id"]) for node in nodes],),
+    )
+    values = dict(cur.fetchall())
+    for node in nodes:
+        node["value"] = values.get(int(node["id"])) or 0
+    return nodes
+
+
+def apply_layout(graph: dict, cache_key: str) -> dict:
+    """Добавляет узлам графа координаты x/y, рассчитанные на сервере
+
+    Раскладка берется из кэша по cache_key и пересчитывается, если в ней нет
+    какого-либо из узлов (данные графа изменились).
+    """
+    ids = [node["id"] for node in graph["nodes"]]
+    positions = _layout_cache.get(cache_key)
+    if positions is None or any(node_id not in positions for node_id in ids):
+        index = {node_id: pos for pos, node_id in enumerate(ids)}
+        links = [link for link in graph["links"] if link["source"] in index and link["target"] in index]
+        coords = force_layout(
+            len(ids),
+            np.array([index[link["source"]] for link in links], dtype=np.int64),
+            np.array([index[link["target"]] for link in links], dtype=np.int64),
+            np.array([float(link["weight"] or 0) for link in links]),
+            time_budget=LAYOUT_TIME_BUDGET,
+        )
+        positions = {node_id: (round(float(x), 1), round(float(y), 1)) for node_id, (x, y) in zip(ids, coords)}
+        _layout_cache.set(cache_key, positions)
+
+    for node in graph["nodes"]:
+        node["x"], node["y"] = positions[node["id"]]
+    return graph
+
+
+def apply_communities(graph: dict) -> dict:
+    """Заменяет категории графа сообществами, найденными распространением меток по весам ребер"""
+    ids = [node["id"] for node in graph["nodes"]]
+    index = {node_id: pos for pos, node_id in enumerate(ids)}
+    links = [link for link in graph["links"] if link["source"] in index and link["target"] in index]
+    labels = label_propagation(
+        len(ids),
+        np.array([index[link["source"]] for link in links], dtype=np.int64),
+        np.array([index[link["target"]] for link in links], dtype=np.int64),
+        np.array([float(link["weight"] or 0) for link in links]),
+    )
+
+    # Сообщества пронумерованы по убыванию размера; одиночные узлы и хвост — в «Другие»
+    sizes = np.bincount(labels) if len(labels) else np.empty(0, dtype=np.int64)
+    n_named = int(min(MAX_COMMUNITIES - 1, (sizes > 1).sum()))
+    for node, label in zip(graph["nodes"], labels.tolist()):
+        node["category"] = label if label < n_named else n_named
+
+    graph["categories"] = [{"name": f"Сообщество {number + 1}"} for number in range(n_named)]
+    if n_named < len(sizes):
+        graph["categories"].append({"name": "Другие"})
+    return graph
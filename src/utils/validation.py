@@ -0,0 +1,30 @@
+from typing import Optional
+
+from flask import abort
+
+
+def validate_int(value: Optional[str], min_val: int, max_val: int, param_name: str) -> Optional[int]:
+    try:
+        if value is None:
+            return None
+        num = int(value)
+        if not (min_val <= num <= max_val):
+            abort(400, description=f"{param_name} must be between {min_val}-{max_val}")
+        return num
+    except ValueError:
+        abort(400, description=f"Invalid {param_name} value")
+
+
+def validate_enum(value: Optional[str], allowed_values: set, param_name: str):
+    if value and value.lower() not in {v.lower() for v in allowed_values}:
+        abort(400, description=f"Invalid {param_name}. Allowed values: {', '.join(allowed_values)}")
+
+
+def validate_bool(value: Optional[str], param_name: str) -> bool:
+    if value is None or value == "":
+        return False
+    if value.lower() in {"1", "true", "yes"}:
+        return True
+    if value.lower() in {"0", "false", "no"}:
+        return False
+    abort(400, description=f"Invalid {param_name} value")
@@ -6,6 +6,10 @@ import json
 import psycopg2
 import json
 import os
+import gzip
+import hashlib
+import time
+import numpy as np
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -208,6 +212,62 @@ def test_publications_by_year(client):
     data = json.loads(response.data)
     assert all(2010 <= int(year) <= 2020 for year in data.keys())
 
+    # Срез по языку не больше общего числа
+    response = client.get('/api/statistics/publications-by-year?year_from=2010&year_to=2020&language=ru')
+    assert response.status_code == 200
+    by_language = json.loads(response.data)
+    assert all(count <= data[year] for year, count in by_language.items())
+
+
+def test_publication_year_counts_reingest():
+    from src.database.database import get_db_connection
+    from src.database.publication_counts import refresh_publication_year_counts
+
+    totals_query = "SELECT year, sum(publications) FROM publication_year_counts GROUP BY year ORDER BY year"
+    items_query = "SELECT year, count(*) FROM items WHERE year IS NOT NULL GROUP BY year ORDER BY year"
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            refresh_publication_year_counts(cur)
+            cur.execute(totals_query)
+            before = cur.fetchall()
+
+            # Повторная загрузка: те же публикации с новой датой загрузки
+            cur.execute(
+                "UPDATE items SET dateinstall = now() + interval '1 day' "
+                "WHERE itemid IN (SELECT itemid FROM items WHERE year IS NOT NULL LIMIT 100)"
+            )
+            refresh_publication_year_counts(cur)
+            cur.execute(totals_query)
+            assert cur.fetchall() == before
+
+            cur.execute(items_query)
+            assert cur.fetchall() == before
+
+            # Повторная загрузка со сменой года: старый год должен уменьшиться
+            cur.execute("SELECT year FROM items WHERE year IS NOT NULL GROUP BY year ORDER BY count(*) DESC LIMIT 1")
+            old_year = cur.fetchone()[0]
+            cur.execute(
+                "UPDATE items SET year = year + 1, dateinstall = now() + interval '2 day' "
+                "WHERE itemid IN (SELECT itemid FROM items WHERE year = %s LIMIT 10)",
+                (old_year,),
+            )
+            moved = cur.rowcount
+            # Удаленные публикации тоже не должны оставаться в счетчиках
+            cur.execute("DELETE FROM items WHERE itemid IN (SELECT itemid FROM items WHERE year = %s LIMIT 1)", (old_year,))
+            removed = cur.rowcount
+            refresh_publication_year_counts(cur)
+
+            cur.execute("SELECT sum(publications) FROM publication_year_counts WHERE year = %s", (old_year,))
+            assert cur.fetchone()[0] == dict(before)[old_year] - moved - removed
+            cur.execute(totals_query)
+            totals = cur.fetchall()
+            cur.execute(items_query)
+            assert totals == cur.fetchall()
+    finally:
+        conn.rollback()
+        conn.close()
+
 
 def test_authors_by_city_distribution(client):
     # Тест с минимальным количеством публикаций
@@ -242,6 +302,42 @@ def test_authors_by_city_search(client):
     response = client.get('/api/authors/by-city')
     assert response.status_code == 400
 
+def test_authors_by_city_aliases(client):
+    from src.database.database import get_db_connection
+
+    # Написания одного города сводятся к каноническому через city_aliases
+    canonical = json.loads(client.get('/api/authors/by-city?city=Москва').data)
+    assert canonical
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT alias FROM city_aliases WHERE city = 'Москва' ORDER BY alias LIMIT 5")
+            aliases = [row[0] for row in cur.fetchall()]
+    finally:
+        conn.close()
+    assert 'москва' in aliases
+    for alias in aliases:
+        response = client.get('/api/authors/by-city', query_string={'city': alias})
+        assert response.status_code == 200
+        assert json.loads(response.data) == canonical
+
+    cities = [entry[0] for entry in json.loads(client.get('/api/statistics/authors-by-city?min_publications=1').data)]
+    assert len(cities) == len(set(cities))
+
+def test_city_aliases_ambiguous_match():
+    from src.database.city_aliases import canonical_cities
+
+    aliases = canonical_cities(
+        ['новгород', 'нижни новгород', 'г. москва'],
+        ['Великий Новгород', 'Нижний Новгород', 'Москва'],
+    ).set_index('alias')
+    # Почти одинаково похож на два разных города — не объединяется ни с одним
+    assert aliases.loc['новгород', 'method'] == 'unmatched'
+    assert aliases.loc['нижни новгород', 'city'] == 'Нижний Новгород'
+    assert aliases.loc['г. москва', 'city'] == 'Москва'
+
+
 def test_all_keywords(client):
     response = client.get('/api/keywords/all')
     assert response.status_code == 200
@@ -294,3 +390,327 @@ def test_keywords_statistics_endpoint(client):
     data = json.loads(response.data)
     for entry in data:
         assert entry['language'].upper() == 'RU'
+
+
+def test_top_authors(client):
+    for metric in ['pagerank', 'degree', 'betweenness']:
+        response = client.get(f'/api/authors/top?metric={metric}&limit=5')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data) <= 5
+        values = [entry['value'] for entry in data]
+        assert values == sorted(values, reverse=True)
+
+    response = client.get('/api/authors/top?metric=unknown')
+    assert response.status_code == 400
+
+
+def test_authors_path(client):
+    response = client.get('/api/authors?limit=1&language=ru')
+    assert response.status_code == 200
+    authors = json.loads(response.data)
+    if not authors:
+        return
+
+    authorid = authors[0]['authorid']
+    response = client.get(f'/api/graph/authors/path?source={authorid}&target={authorid}')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['found'] is True
+    assert data['distance'] == 0
+
+    response = client.get('/api/graph/authors/path?source=abc')
+    assert response.status_code == 400
+
+    for params in ['max_depth=abc', 'max_depth=11', 'items_per_hop=0']:
+        response = client.get(f'/api/graph/authors/path?source={authorid}&target={authorid}&{params}')
+        assert response.status_code == 400
+
+
+def test_keywords_graph(client):
+    response = client.post('/api/graph/keywords/data', json={'keywords': ['интернет'], 'measure': 'jaccard'})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert all(key in data for key in ['nodes', 'links', 'categories'])
+    node_ids = {node['id'] for node in data['nodes']}
+    for link in data['links']:
+        assert link['source'] in node_ids and link['target'] in node_ids
+        assert 0 < link['weight'] <= 1
+
+    response = client.post('/api/graph/keywords/data', json={})
+    assert response.status_code in [400, 500]
+
+    response = client.post('/api/graph/keywords/data', json={'keywords': ['интернет'], 'max_nodes': '100000'})
+    assert response.status_code == 400
+
+    # Пары, встречающиеся вместе не чаще случайного (PMI <= 0), не становятся ребрами
+    response = client.post('/api/graph/keywords/data', json={'keywords': ['интернет'], 'measure': 'npmi'})
+    assert response.status_code == 200
+    assert all(link['weight'] > 0 for link in json.loads(response.data)['links'])
+
+
+def test_similar_authors(client):
+    response = client.get('/api/authors/top?metric=degree&limit=1')
+    assert response.status_code == 200
+    top = json.loads(response.data)
+    if not top:
+        return
+
+    authorid = top[0]['authorid']
+    response = client.get(f'/api/authors/{authorid}/similar?limit=5')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert len(data) <= 5
+    assert all(entry['authorid'] != authorid for entry in data)
+    scores = [entry['score'] for entry in data]
+    assert scores == sorted(scores, reverse=True)
+    assert all(0 <= score <= 1 for score in scores)
+
+
+
+def test_rating_keywords_dedup(client):
+    response = client.get('/api/statistics/rating/keywords?min_publications=10')
+    assert response.status_code == 200
+    all_keywords = set(json.loads(response.data))
+
+    response = client.get('/api/statistics/rating/keywords?min_publications=10&dedup=true')
+    assert response.status_code == 200
+    # Без дубликатов публикаций слов с тем же порогом не больше
+    assert set(json.loads(response.data)) <= all_keywords
+
+    response = client.get('/api/statistics/rating/keywords?dedup=maybe')
+    assert response.status_code in [400, 500]
+
+
+def test_authors_filter_search(client):
+    response = client.get('/api/graph/filters/authors?q=иванов&per_page=5')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert 'error' not in data
+    assert len(data['items']) <= 5
+
+    # Поиск не зависит от регистра и точек в инициалах
+    if data['items']:
+        name = data['items'][0]['label']
+        response = client.get(f'/api/graph/filters/authors?q={name.upper().replace(".", " ")}')
+        assert response.status_code == 200
+        labels = [item['label'] for item in json.loads(response.data)['items']]
+        assert name in labels
+
+
+def test_graph_layout(client):
+    payload = {'keywords': ['интернет'], 'layout': True}
+    response = client.post('/api/graph/keywords/data', json=payload)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    for node in data['nodes']:
+        assert 0 <= node['x'] <= 1000
+        assert 0 <= node['y'] <= 1000
+
+    # Повторный запрос берет раскладку из кэша
+    response = client.post('/api/graph/keywords/data', json=payload)
+    again = json.loads(response.data)
+    assert [(n['x'], n['y']) for n in again['nodes']] == [(n['x'], n['y']) for n in data['nodes']]
+
+
+def test_force_layout_negative_weights():
+    from src.analytics.layout import LAYOUT_SIZE, force_layout
+
+    positions = force_layout(4, np.array([0, 1, 2]), np.array([1, 2, 3]), np.array([-2.0, 0.5, 3.0]), time_budget=0.1)
+    assert np.isfinite(positions).all()
+    assert ((positions >= 0) & (positions <= LAYOUT_SIZE)).all()
+
+
+def test_authors_graph_communities(client):
+    response = client.get('/api/authors/top?metric=degree&limit=1')
+    top = json.loads(response.data)
+    if not top:
+        return
+
+    response = client.post('/api/graph/authors/data', json={'authors': [top[0]['authorid']], 'communities': True})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert all(0 <= node['category'] < len(data['categories']) for node in data['nodes'])
+
+
+def test_async_job(client):
+    response = client.get('/api/export/author-vak-excel?authorid=1&async=true')
+    assert response.status_code == 202
+    job = json.loads(response.data)
+    assert response.headers['Location'] == job['status_url']
+
+    for _ in range(120):
+        status = json.loads(client.get(job['status_url']).data)
+        if status['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.5)
+    assert status['status'] == 'done'
+
+    response = client.get(status['result_url'])
+    assert response.status_code == 200
+    assert response.data[:2] == b'PK'  # xlsx — zip-архив
+
+    response = client.post('/api/jobs', json={'kind': 'unknown'})
+    assert response.status_code == 400
+    response = client.get('/api/jobs/unknown')
+    assert response.status_code == 404
+
+
+def test_vak_excel_multiple_authors(client):
+    response = client.get('/api/export/author-vak-excel?authorid=1,2')
+    assert response.status_code == 200
+    assert response.data[:2] == b'PK'
+
+    response = client.get('/api/export/author-vak-excel')
+    assert response.status_code in [400, 500]
+
+
+def test_vak_list_page_hashes():
+    from src.database.vak_list import page_hashes
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Категорирование Перечня.pdf')
+    hashes = page_hashes(path)
+    assert len(hashes) > 1
+    # Разные страницы — разные хэши (а не хэш пустого содержимого)
+    assert hashes[0] != hashes[1]
+    assert hashlib.sha1(b'').hexdigest() not in hashes
+
+
+def test_vak_statistics_batch(client):
+    response = client.get('/api/statistics/vak-categories/batch?authorid=1,2&date_from=2015-01-01')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert set(data) == {'1', '2'}
+    for specialties in data.values():
+        for counts in specialties.values():
+            assert set(counts) == {'К1', 'К2', 'К3'}
+
+    # Пакетный результат совпадает с запросом по одному автору
+    single = json.loads(client.get('/api/statistics/vak-categories?authorid=1&date_from=2015-01-01').data)
+    assert single == data['1']
+
+    response = client.get('/api/statistics/vak-categories/batch')
+    assert response.status_code == 400
+    response = client.get('/api/statistics/vak-categories/batch?authorid=1&date_from=2015-13-01')
+    assert response.status_code == 400
+
+
+def test_city_publications_map_viewport(client):
+    response = client.get('/api/map/city-publications')
+    assert response.status_code == 200
+    points = json.loads(response.data)
+
+    # Европейская часть России: только точки внутри области
+    response = client.get('/api/map/city-publications?bbox=20,40,60,70&zoom=10')
+    assert response.status_code == 200
+    visible = json.loads(response.data)
+    assert all(20 <= p['lon'] <= 60 and 40 <= p['lat'] <= 70 for p in visible)
+
+    # На мелком масштабе точки объединяются, сумма публикаций сохраняется
+    response = client.get('/api/map/city-publications?zoom=2')
+    clusters = json.loads(response.data)
+    assert len(clusters) <= len(points)
+    assert sum(c['publications'] for c in clusters) == sum(p['publications'] for p in points)
+
+    response = client.get('/api/map/city-connections?bbox=20,40,60,70&zoom=3')
+    assert response.status_code == 200
+
+    response = client.get('/api/map/city-publications?bbox=1,2,3')
+    assert response.status_code == 400
+
+
+def test_batch(client):
+    response = client.post('/api/batch', json=[
+        {'path': '/api/statistics/years'},
+        {'path': '/api/statistics/publications-by-year', 'params': {'year_from': 2010, 'year_to': 2020}},
+        {'path': '/api/statistics/rating/keywords', 'params': {'min_publications': 10}},
+    ])
+    assert response.status_code == 200
+    results = json.loads(response.data)['results']
+    assert len(results) == 3
+    assert all(result['status'] == 200 for result in results)
+    assert results[0]['body'] == json.loads(client.get('/api/statistics/years').data)
+
+    response = client.post('/api/batch', json=[{'path': '/api/export/items'}])
+    assert response.status_code == 400
+    response = client.post('/api/batch', json={'path': '/api/statistics/years'})
+    assert response.status_code == 400
+
+
+def test_export_dataset(client):
+    response = client.get('/api/export/popular_keywords_mv?columns=keyword,publications_count')
+    assert response.status_code == 200
+    assert response.data.decode('utf-8').splitlines()[0] == 'keyword,publications_count'
+
+    response = client.get('/api/export/authors_items_view?authorid=1&year_from=2000&gzip=true')
+    assert response.status_code == 200
+    assert gzip.decompress(response.data).startswith(b'authorid,')
+
+    assert client.get('/api/export/unknown_table').status_code == 404
+    assert client.get('/api/export/popular_keywords_mv?columns=password').status_code == 400
+
+
+def test_keywords_wordcloud(client):
+    response = client.get('/api/statistics/keywords/wordcloud.png?year=2020&language=ru&limit=100')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.data[:8] == b'\x89PNG\r\n\x1a\n'
+
+    etag = response.headers['ETag']
+    response = client.get(
+        '/api/statistics/keywords/wordcloud.png?year=2020&language=ru&limit=100',
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 304
+
+    response = client.get('/api/statistics/keywords/wordcloud.png?language=de')
+    assert response.status_code == 400
+
+
+def test_keywords_trends(client):
+    response = client.get('/api/statistics/keywords/trends?year_from=2015&year_to=2020&top=5')
+    assert response.status_code == 200
+    data = response.json
+    assert data['years'] == list(range(2015, 2021))
+    for group in ('emerging', 'growing', 'declining'):
+        assert len(data[group]) <= 5
+        for item in data[group]:
+            assert len(item['series']) == 6
+            assert {'keyword', 'total', 'growth', 'cagr', 'emerging_score'} <= item.keys()
+
+    response = client.get('/api/statistics/keywords/trends?year_from=2020&year_to=2015')
+    assert response.status_code == 400
+
+
+def test_conditional_get(client):
+    response = client.get('/api/statistics/years')
+    assert response.status_code == 200
+    assert 'max-age' in response.headers['Cache-Control']
+
+    # Сразу после refresh-mv ETag не выдается (VERSION_SETTLE_SECONDS)
+    etag = response.headers.get('ETag')
+    if etag:
+        assert etag.startswith('W/')
+        assert 'Last-Modified' in response.headers
+        response = client.get('/api/statistics/years', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+        response = client.get('/api/statistics/keywords?year=2020', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+
+
+def test_response_compression(client):
+    plain = client.get('/api/keywords/all')
+    assert plain.status_code == 200
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    response = client.get('/api/keywords/all', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+
+    response = client.get('/api/export/popular_keywords_mv?columns=keyword', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert gzip.decompress(response.data).decode('utf-8').splitlines()[0] == 'keyword'